@@ -2,12 +2,13 @@ import uuid
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional
-import jwt
 import bcrypt
 from sqlalchemy.orm import Session
 from database.models.db_models import User, RefreshToken
 from auth.schemas import UserCreate, UserLogin, TokenData
+from auth.signing_keys import get_key_ring
 from settings import settings
+from monitoring.metrics import track_bcrypt
 
 
 class AuthService:
@@ -18,16 +19,18 @@ class AuthService:
     
     def hash_password(self, password: str) -> str:
         """Hash a password using bcrypt."""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+        with track_bcrypt("hash"):
+            salt = bcrypt.gensalt()
+            hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash."""
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'), 
-            hashed_password.encode('utf-8')
-        )
+        with track_bcrypt("verify"):
+            return bcrypt.checkpw(
+                plain_password.encode('utf-8'), 
+                hashed_password.encode('utf-8')
+            )
     
     def create_user(self, user_data: UserCreate) -> User | None:
         """Create a new user."""
@@ -87,8 +90,7 @@ class AuthService:
             "exp": expire
         }
         
-        encoded_jwt = jwt.encode(to_encode, settings.SECRET_AUTH_KEY, algorithm="HS256")
-        return encoded_jwt
+        return get_key_ring().sign(to_encode)
     
     def get_user_by_id(self, user_id: uuid.UUID) -> Optional[User]:
         """Get a user by their ID."""
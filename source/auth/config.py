@@ -1,19 +1,122 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Header
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Request
 from sqlalchemy.orm import Session
 import jwt
 import dotenv
 import os
+import requests
+import threading
+import time
 import uuid
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional
 from database.session import get_session, get_db
 from database.models.db_models import User
 from auth.schemas import TokenData
+from auth.signing_keys import VerificationKey, get_key_ring
+from monitoring.profiling import RequestProfiler
+from settings import settings
 
 dotenv.load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_AUTH_KEY")
 
 
+class TokenVerifier:
+    """Verifies access tokens locally against parsed keys cached by ``kid``.
+
+    Keys are parsed once, so a check costs one signature verification.
+    They come from this API's key ring or, with ``jwks_url``, from a
+    published JWKS, which is refetched when a token names an unknown
+    ``kid`` (at most every ``min_refresh`` seconds); that is how a rotated
+    key is picked up. Tokens without a ``kid`` are legacy HS256 ones and
+    are only accepted while ``secret`` is set.
+
+    Clients resend the same token on every request, so the last
+    ``cache_size`` verified tokens are remembered until they expire.
+    """
+
+    def __init__(
+        self,
+        keys: Optional[Dict[str, VerificationKey]] = None,
+        secret: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        min_refresh: float = 60.0,
+        cache_size: int = 10000,
+    ):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.min_refresh = min_refresh
+        self.cache_size = cache_size
+        self._verified: Dict[str, dict] = {}
+        self._keys: Dict[str, VerificationKey] = dict(keys or {})
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._fetched_at = float("-inf")
+
+    def decode(self, token: str) -> dict:
+        """Verified claims; raises ``jwt.InvalidTokenError`` (or a subclass) otherwise."""
+        claims = self._verified.get(token)
+        if claims is not None:
+            if claims.get("exp", float("inf")) <= time.time():
+                self._verified.pop(token, None)
+                raise jwt.ExpiredSignatureError("Signature has expired")
+            return claims
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if not self.secret:
+                raise jwt.InvalidTokenError("Token has no key id")
+            claims = jwt.decode(token, self.secret, algorithms=["HS256"])
+        else:
+            key = self._keys.get(kid)
+            if key is None and self.jwks_url:
+                self._refresh()
+                key = self._keys.get(kid)
+            if key is None:
+                raise jwt.InvalidTokenError("Unknown key id")
+            claims = jwt.decode(token, key.key, algorithms=[key.algorithm])
+
+        if not self.cache_size:
+            return claims
+        with self._lock:
+            while len(self._verified) >= self.cache_size:
+                self._verified.pop(next(iter(self._verified)))
+            self._verified[token] = claims
+        return claims
+
+    def _refresh(self):
+        with self._refresh_lock:
+            if time.monotonic() - self._fetched_at < self.min_refresh:
+                return
+            self._fetched_at = time.monotonic()
+            try:
+                response = requests.get(self.jwks_url, timeout=5)
+                response.raise_for_status()
+                jwks = response.json()["keys"]
+            except (requests.RequestException, ValueError, KeyError):
+                return
+            keys = dict(self._keys)
+            for jwk in jwks:
+                try:
+                    parsed = jwt.PyJWK(jwk)
+                except jwt.PyJWKError:
+                    continue
+                if jwk.get("kid"):
+                    keys[jwk["kid"]] = VerificationKey(jwk["kid"], parsed.algorithm_name, parsed.key, jwk)
+            self._keys = keys
+
+
+@lru_cache(maxsize=1)
+def get_token_verifier() -> TokenVerifier:
+    return TokenVerifier(
+        keys=get_key_ring().keys,
+        secret=settings.SECRET_AUTH_KEY if settings.JWT_ACCEPT_HS256 else None,
+        jwks_url=settings.JWT_JWKS_URL,
+        min_refresh=settings.JWT_JWKS_MIN_REFRESH_SECONDS,
+        cache_size=settings.JWT_VERIFIED_CACHE_SIZE,
+    )
+
+
 def verify_jwt(x_user_jwt: str = Header(..., alias="X-User-JWT")) -> dict:
     """Verify JWT token from custom header and return payload."""
     if not x_user_jwt:
@@ -24,7 +127,7 @@ def verify_jwt(x_user_jwt: str = Header(..., alias="X-User-JWT")) -> dict:
         )
     
     try:
-        payload = jwt.decode(x_user_jwt, SECRET_KEY, algorithms=["HS256"])
+        payload = get_token_verifier().decode(x_user_jwt)
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -95,3 +198,15 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)) -> Us
             detail="Not enough permissions"
         )
     return current_user
+
+
+def get_request_profiler(
+    request: Request,
+    x_profile: Optional[str] = Header(None, alias="X-Profile"),
+    current_user: User = Depends(get_current_user),
+) -> Optional[RequestProfiler]:
+    """Return a profiler for this request when an admin sends X-Profile."""
+    if not x_profile:
+        return None
+    get_current_admin_user(current_user)
+    return RequestProfiler(label=f"{request.method} {request.url.path}")
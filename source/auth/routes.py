@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
 from database.session import get_db
 from auth.schemas import (
@@ -8,6 +8,9 @@ from auth.schemas import (
 )
 from auth.auth_service import AuthService
 from auth.config import get_current_active_user
+from auth.signing_keys import get_key_ring
+from middleware.conditional import compute_etag, etag_matches
+from settings import settings
 from database.models.db_models import User
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -15,6 +18,7 @@ from slowapi.errors import RateLimitExceeded
 from config_logging import auth_logger
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
+well_known_router = APIRouter(tags=["authentication"])
 
 limiter = Limiter(key_func=get_remote_address)
 
@@ -183,3 +187,18 @@ def logout(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
+
+
+# Served from memory and async, so key lookups never wait for a worker thread.
+@well_known_router.get("/.well-known/jwks.json")
+async def jwks(request: Request):
+    """Public keys for verifying access tokens locally, matched by the token's ``kid``."""
+    body = get_key_ring().jwks
+    etag = compute_etag(body)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.JWT_JWKS_MAX_AGE_SECONDS}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
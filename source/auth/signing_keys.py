@@ -0,0 +1,122 @@
+import base64
+import hashlib
+import json
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+from settings import settings
+
+# Members that define each key type's RFC 7638 thumbprint, in the order it hashes them.
+_THUMBPRINT_MEMBERS = {"OKP": ("crv", "kty", "x"), "EC": ("crv", "kty", "x", "y")}
+
+
+class VerificationKey(NamedTuple):
+    kid: str
+    algorithm: str
+    key: object  # parsed public key, ready for jwt.decode
+    jwk: dict
+
+
+def _algorithm_for(public_key) -> str:
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return "EdDSA"
+    if isinstance(public_key, ec.EllipticCurvePublicKey) and isinstance(public_key.curve, ec.SECP256R1):
+        return "ES256"
+    raise ValueError("JWT keys must be Ed25519 or EC P-256")
+
+
+def _public_jwk(public_key, algorithm: str) -> dict:
+    encoder = OKPAlgorithm if algorithm == "EdDSA" else ECAlgorithm
+    jwk = encoder.to_jwk(public_key, as_dict=True)
+    members = {name: jwk[name] for name in _THUMBPRINT_MEMBERS[jwk["kty"]]}
+    thumbprint = hashlib.sha256(
+        json.dumps(members, separators=(",", ":"), sort_keys=True).encode()
+    ).digest()
+    kid = base64.urlsafe_b64encode(thumbprint).rstrip(b"=").decode()
+    return {**jwk, "kid": kid, "alg": algorithm, "use": "sig"}
+
+
+def verification_key(public_key) -> VerificationKey:
+    algorithm = _algorithm_for(public_key)
+    jwk = _public_jwk(public_key, algorithm)
+    return VerificationKey(jwk["kid"], algorithm, public_key, jwk)
+
+
+def _load_pem(path: str):
+    """A private key, or a public key for a retired one; returns ``(private, public)``."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"PRIVATE KEY" in data:
+        private_key = serialization.load_pem_private_key(data, password=None)
+        return private_key, private_key.public_key()
+    return None, serialization.load_pem_public_key(data)
+
+
+class KeyRing:
+    """Keys this API signs access tokens with and publishes in its JWKS.
+
+    The active key (``JWT_SIGNING_KEY_FILE``, Ed25519 for EdDSA or P-256
+    for ES256) signs every new token, with its RFC 7638 thumbprint as the
+    ``kid`` header, so every worker loading the same file agrees on it.
+    ``JWT_VERIFY_KEY_FILES`` are keys that are still accepted and published
+    but no longer sign: the previous key during a rotation, or the next one
+    ahead of it. Without a signing key, tokens are HS256 with
+    ``SECRET_AUTH_KEY`` as before.
+    """
+
+    def __init__(
+        self,
+        signing_key_file: Optional[str],
+        verify_key_files: Sequence[str] = (),
+        secret: Optional[str] = None,
+    ):
+        self.secret = secret
+        self.keys: Dict[str, VerificationKey] = {}
+        self._signing_key = None
+        self._signing_kid: Optional[str] = None
+
+        if signing_key_file:
+            private_key, public_key = _load_pem(signing_key_file)
+            if private_key is None:
+                raise ValueError(f"{signing_key_file} does not hold a private key")
+            key = verification_key(public_key)
+            self._signing_key, self._signing_kid = private_key, key.kid
+            self.keys[key.kid] = key
+        for path in verify_key_files:
+            key = verification_key(_load_pem(path)[1])
+            self.keys.setdefault(key.kid, key)
+
+        self.jwks = json.dumps(
+            {"keys": [key.jwk for key in self.keys.values()]}, separators=(",", ":")
+        ).encode()
+
+    @property
+    def algorithm(self) -> str:
+        return self.keys[self._signing_kid].algorithm if self._signing_kid else "HS256"
+
+    def sign(self, claims: dict) -> str:
+        if self._signing_key is None:
+            return jwt.encode(claims, self.secret, algorithm="HS256")
+        return jwt.encode(
+            claims,
+            self._signing_key,
+            algorithm=self.algorithm,
+            headers={"kid": self._signing_kid},
+        )
+
+    def public_keys(self) -> List[VerificationKey]:
+        return list(self.keys.values())
+
+
+@lru_cache(maxsize=1)
+def get_key_ring() -> KeyRing:
+    return KeyRing(
+        signing_key_file=settings.JWT_SIGNING_KEY_FILE,
+        verify_key_files=settings.JWT_VERIFY_KEY_FILES,
+        secret=settings.SECRET_AUTH_KEY,
+    )
@@ -0,0 +1,283 @@
+"""Load-test the API against local SerpAPI/FaceCrawler/profile-site/crt.sh/DNS stubs.
+
+Usage (from ``source/``)::
+
+    python -m benchmarks.run --concurrency 1,8,32 --requests 200 --save baseline
+    python -m benchmarks.run --concurrency 1,8,32 --requests 200 --compare baseline
+
+The app runs in-process under uvicorn so SQLAlchemy round trips can be
+counted per route. The database is taken from the usual ``DATABASE_*``
+variables or from ``DATABASE_URL``.
+"""
+import argparse
+import functools
+import io
+import itertools
+import json
+import os
+import resource
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import requests
+from benchmarks.stubs import (
+    StubConfig,
+    StubServer,
+    SerpAPIStubHandler,
+    FaceCrawlerStubHandler,
+    UsernameStubHandler,
+    CrtShStubHandler,
+    DnsStubServer,
+    write_username_sites,
+)
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+RECON_ZONE = "bench.test"
+
+ROUTES = {
+    "health": ("GET", "/health-check"),
+    "text-search": ("POST", "/target/text-search"),
+    "image-send": ("POST", "/target/image-search/send"),
+    "image-receive": ("POST", "/target/image-search/receive"),
+    "username-search": ("POST", "/target/username-search"),
+    "domain-recon": ("POST", "/target/text-search"),
+}
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@functools.lru_cache(maxsize=1)
+def sample_image() -> bytes:
+    """A 12 MP phone-style JPEG, so image-send exercises the real preprocessing path."""
+    from PIL import Image
+
+    image = Image.effect_noise((1000, 750), 48).resize((4000, 3000)).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=95)
+    return output.getvalue()
+
+
+def build_request(route: str) -> dict:
+    if route == "text-search":
+        return {"json": {"name": "Maria Silva", "type": "person", "categories": ["social", "files"]}}
+    if route == "image-send":
+        return {"files": {"image_file": ("face.jpg", sample_image(), "image/jpeg")}}
+    if route == "username-search":
+        # Fresh handles, so every request sweeps the sites instead of hitting the cache.
+        return {"json": {"username": f"user-{uuid.uuid4().hex[:12]}"}}
+    if route == "domain-recon":
+        # A fresh domain inside the stub zone, so DNS and CT lookups miss their caches.
+        return {"json": {
+            "name": "Bench Corp", "type": "company", "categories": ["social"],
+            "domain": {"name": f"c{uuid.uuid4().hex[:12]}.{RECON_ZONE}"},
+        }}
+    if route == "image-receive":
+        return {"json": {"id_search": uuid.uuid4().hex}}
+    return {}
+
+
+def start_app(port: int):
+    import uvicorn
+    from main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def create_bench_user(create_schema: bool) -> str:
+    from database.base import SessionLocal, engine
+    from database.models.base_model import Base
+    from auth.auth_service import AuthService
+    from auth.schemas import UserCreate
+
+    if create_schema:
+        Base.metadata.create_all(engine)
+
+    with SessionLocal() as db:
+        service = AuthService(db)
+        email = "bench@example.com"
+        user = service.get_user_by_email(email) or service.create_user(
+            UserCreate(email=email, first_name="Bench", last_name="User", password="benchmark-password")
+        )
+        return service.create_access_token(user)
+
+
+def run_level(base_url: str, route: str, token: str, concurrency: int, total: int, db_counter) -> dict:
+    method, path = ROUTES[route]
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = itertools.count()
+    local = threading.local()
+
+    def worker():
+        nonlocal errors
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            local.session.headers["X-User-JWT"] = token
+        while next(remaining) < total:
+            start = time.perf_counter()
+            try:
+                response = local.session.request(method, base_url + path, **build_request(route))
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+
+    db_before = db_counter()
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "route": route,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+        "db_round_trips_per_request": round((db_counter() - db_before) / max(len(latencies), 1), 2),
+    }
+
+
+def print_results(results: list[dict], baseline: list[dict] | None = None):
+    previous = {(r["route"], r["concurrency"]): r for r in baseline or []}
+    header = f"{'route':<14}{'conc':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>6}{'db/req':>8}{'rss':>8}"
+    print(header)
+    for r in results:
+        line = (
+            f"{r['route']:<14}{r['concurrency']:>5}{r['rps']:>9}{r['p50_ms']:>9}"
+            f"{r['p95_ms']:>9}{r['p99_ms']:>9}{r['errors']:>6}"
+            f"{r['db_round_trips_per_request']:>8}{r['rss_mb']:>8}"
+        )
+        old = previous.get((r["route"], r["concurrency"]))
+        if old:
+            rps_delta = (r["rps"] - old["rps"]) / old["rps"] * 100 if old["rps"] else 0
+            p95_delta = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0
+            line += f"   rps {rps_delta:+.1f}%  p95 {p95_delta:+.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", default=",".join(ROUTES))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route and concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--results", type=int, default=10, help="organic results per SerpAPI response")
+    parser.add_argument("--snippet-bytes", type=int, default=160)
+    parser.add_argument("--face-items", type=int, default=20)
+    parser.add_argument("--progress-step", type=int, default=25)
+    parser.add_argument("--username-sites", type=int, default=500, help="site templates for username-search")
+    parser.add_argument("--username-hosts", type=int, default=25, help="stub hosts the site templates are spread over")
+    parser.add_argument("--dns-latency-ms", type=float, default=20.0, help="delay of the stub DNS server's answers")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--create-schema", action="store_true", help="create tables before running")
+    parser.add_argument("--save", metavar="NAME", help="save results as a named baseline")
+    parser.add_argument("--compare", metavar="NAME", help="compare against a saved baseline")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        results=args.results,
+        snippet_bytes=args.snippet_bytes,
+        face_items=args.face_items,
+        progress_step=args.progress_step,
+    )
+    serp_stub = StubServer(SerpAPIStubHandler, config).start()
+    face_stub = StubServer(FaceCrawlerStubHandler, config).start()
+
+    site_stubs = [StubServer(UsernameStubHandler, config).start() for _ in range(args.username_hosts)]
+    sites_file = Path(tempfile.gettempdir()) / f"username_sites_{os.getpid()}.json"
+    write_username_sites(str(sites_file), [stub.url for stub in site_stubs], args.username_sites)
+    crtsh_stub = StubServer(CrtShStubHandler, config).start()
+    dns_stub = DnsStubServer(RECON_ZONE, latency_ms=args.dns_latency_ms).start()
+    dns_host, dns_port = dns_stub.address
+
+    os.environ["USERNAME_SITES_FILE"] = str(sites_file)
+    os.environ["SERPAPI_BASE_URL"] = serp_stub.url
+    os.environ["SITE_URL"] = face_stub.url
+    os.environ["DOMAIN_CT_BASE_URL"] = crtsh_stub.url
+    os.environ["DOMAIN_DNS_NAMESERVERS"] = json.dumps([dns_host])
+    os.environ["DOMAIN_DNS_PORT"] = str(dns_port)
+    os.environ.setdefault("SERPAPI_KEY", "bench")
+    os.environ.setdefault("FACECRAWLER_KEY", "bench")
+
+    from sqlalchemy import event
+    from database.base import engine
+
+    statements = itertools.count()
+    db_total = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        db_total[0] = next(statements) + 1
+
+    token = create_bench_user(args.create_schema)
+    server = start_app(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    results = []
+    try:
+        for route in args.routes.split(","):
+            for level in (int(c) for c in args.concurrency.split(",")):
+                results.append(run_level(base_url, route, token, level, args.requests, lambda: db_total[0]))
+    finally:
+        server.should_exit = True
+        serp_stub.stop()
+        face_stub.stop()
+        crtsh_stub.stop()
+        dns_stub.stop()
+        for stub in site_stubs:
+            stub.stop()
+        sites_file.unlink(missing_ok=True)
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())["results"]
+    print_results(results, baseline)
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        (BASELINE_DIR / f"{args.save}.json").write_text(json.dumps({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "stub_config": vars(config),
+            "results": results,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
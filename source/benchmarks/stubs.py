@@ -0,0 +1,313 @@
+"""Local stand-ins for SerpAPI, FaceCrawler, profile sites, crt.sh and DNS used by the benchmark harness."""
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0
+    results: int = 10
+    snippet_bytes: int = 160
+    face_items: int = 20
+    progress_step: int = 25
+    usernames: tuple = ("maria.silva", "msilva")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    config: StubConfig
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self):
+        cfg = self.config
+        delay = cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+        time.sleep(max(delay, 0) / 1000)
+
+    def _failed(self) -> bool:
+        return random.random() < self.config.error_rate
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SerpAPIStubHandler(_StubHandler):
+    """Emulates ``GET /search`` with ``organic_results``."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/search":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._delay()
+        if self._failed():
+            self._send_json(500, {"error": "stub failure"})
+            return
+
+        query = parse_qs(url.query).get("q", [""])[0]
+        # Subdomain dorks ("site:*.<domain> ...") get results on subdomains.
+        subdomain_of = re.match(r"site:\*\.(\S+)", query)
+        host = lambda i: f"page{i}.{subdomain_of.group(1)}" if subdomain_of else "example.com"
+        snippet = ("lorem ipsum " * (self.config.snippet_bytes // 12 + 1))[: self.config.snippet_bytes]
+        organic = [
+            {
+                "position": i + 1,
+                "title": f"Result {i + 1} for {query[:40]}",
+                "link": f"https://{host(i)}/{uuid.uuid4().hex}",
+                # Every other result carries contacts so entity extraction does real work.
+                "snippet": (
+                    f"user{i}@example.com +55 11 9{i:04d}-{i:04d} instagram.com/user{i} " if i % 2 == 0 else ""
+                ) + snippet,
+                "source": "example.com",
+            }
+            for i in range(self.config.results)
+        ]
+        self._send_json(200, {
+            "search_metadata": {"status": "Success"},
+            "organic_results": organic,
+        })
+
+
+class FaceCrawlerStubHandler(_StubHandler):
+    """Emulates ``/api/upload_pic`` and a progressing ``/api/search``."""
+
+    searches: dict
+    lock: threading.Lock
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path == "/api/upload_pic":
+            self._delay()
+            if self._failed():
+                self._send_json(200, {"error": "stub upload failure", "code": 500})
+                return
+            id_search = uuid.uuid4().hex
+            with self.lock:
+                self.searches[id_search] = 0
+            self._send_json(200, {"id_search": id_search, "code": 200})
+        elif self.path == "/api/search":
+            self._delay()
+            if self._failed():
+                self._send_json(200, {"error": "stub search failure", "code": 500})
+                return
+            id_search = json.loads(body or b"{}").get("id_search")
+            with self.lock:
+                progress = self.searches.get(id_search, 0)
+                progress = min(progress + self.config.progress_step, 100)
+                self.searches[id_search] = progress
+            if progress < 100:
+                self._send_json(200, {"code": 200, "progress": progress})
+                return
+            items = [
+                {
+                    "guid": uuid.uuid4().hex,
+                    "score": random.randint(50, 99),
+                    "url": f"https://example.com/face/{i}",
+                    "base64": "A" * 512,
+                }
+                for i in range(self.config.face_items)
+            ]
+            self._send_json(200, {"code": 200, "output": {"items": items}})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+class UsernameStubHandler(_StubHandler):
+    """Emulates profile pages: ``/{check}/{site}/{username}``.
+
+    Usernames listed in ``StubConfig.usernames`` exist on every site. A
+    missing one gets a 404 under ``/status/``, a 200 "not found" page under
+    ``/message/`` and a redirect to the home page under ``/redirect/``.
+    """
+
+    def do_GET(self):
+        parts = urlparse(self.path).path.strip("/").split("/")
+        if len(parts) != 3:
+            self._send_json(200, {"home": True})
+            return
+        check, site, username = parts
+        self._delay()
+        if self._failed():
+            self._send_json(500, {"error": "stub failure"})
+            return
+        if username in self.config.usernames:
+            self._send_json(200, {"site": site, "username": username})
+        elif check == "message":
+            self._send_json(200, {"error": "User not found"})
+        elif check == "redirect":
+            self.send_response(302)
+            self.send_header("Location", "/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+class CrtShStubHandler(_StubHandler):
+    """Emulates crt.sh ``/?q=%.<domain>&output=json`` with ``results`` certificates."""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        domain = query.lstrip("%.")
+        self._delay()
+        if self._failed() or not domain:
+            self._send_json(502, {"error": "stub failure"})
+            return
+        certs = [
+            {
+                "common_name": f"host{i}.{domain}",
+                "name_value": f"host{i}.{domain}\n*.api{i % 3}.{domain}",
+            }
+            for i in range(self.config.results)
+        ]
+        body = json.dumps(certs).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DnsStubServer:
+    """Authoritative UDP DNS stand-in for one zone, on a local port.
+
+    Every name inside ``zone`` has an A record, the apex also MX, TXT and NS;
+    names outside it are NXDOMAIN. Answers carry ``ttl`` and are delayed by
+    ``latency_ms``.
+    """
+
+    def __init__(self, zone: str, latency_ms: float = 0.0, ttl: int = 300, host: str = "127.0.0.1"):
+        self.zone = zone.lower().rstrip(".")
+        self.latency_ms = latency_ms
+        self.ttl = ttl
+        self.queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def address(self) -> tuple:
+        return self.sock.getsockname()
+
+    def start(self) -> "DnsStubServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.sock.close()
+
+    def _records(self, name: str, rdtype: str) -> list:
+        if rdtype == "A":
+            return [f"10.0.{len(name) % 256}.{sum(map(ord, name)) % 254 + 1}"]
+        if name != self.zone:
+            return []
+        return {
+            "MX": [f"10 mail.{self.zone}."],
+            "TXT": ['"v=spf1 -all"'],
+            "NS": [f"ns1.{self.zone}.", f"ns2.{self.zone}."],
+        }.get(rdtype, [])
+
+    def _serve(self):
+        while True:
+            try:
+                data, client = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            self.queries += 1
+            threading.Thread(target=self._answer, args=(data, client), daemon=True).start()
+
+    def _answer(self, data: bytes, client: tuple):
+        import dns.message
+        import dns.rcode
+        import dns.rdatatype
+        import dns.rrset
+
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        name = question.name.to_text().rstrip(".").lower()
+        rdtype = dns.rdatatype.to_text(question.rdtype)
+        if name != self.zone and not name.endswith(f".{self.zone}"):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        else:
+            records = self._records(name, rdtype)
+            if records:
+                response.answer.append(
+                    dns.rrset.from_text_list(question.name, self.ttl, "IN", rdtype, records)
+                )
+            else:
+                response.authority.append(dns.rrset.from_text(
+                    f"{self.zone}.", self.ttl, "IN", "SOA",
+                    f"ns1.{self.zone}. admin.{self.zone}. 1 3600 600 86400 {self.ttl}",
+                ))
+        time.sleep(self.latency_ms / 1000)
+        try:
+            self.sock.sendto(response.to_wire(), client)
+        except OSError:
+            pass  # stopped while this answer was delayed
+
+
+def write_username_sites(path: str, base_urls: list, count: int):
+    """Write a site-template file with ``count`` sites spread over the stub hosts."""
+    checks = ("status_code", "message", "redirect")
+    prefixes = {"status_code": "status", "message": "message", "redirect": "redirect"}
+    sites = []
+    for i in range(count):
+        check = checks[i % len(checks)]
+        site = {
+            "name": f"stub-site-{i}",
+            "category": "stub",
+            "url": f"{base_urls[i % len(base_urls)]}/{prefixes[check]}/site{i}/{{username}}",
+            "check": check,
+        }
+        if check == "message":
+            site["absent"] = ["User not found"]
+        sites.append(site)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"sites": sites}, f)
+
+
+class StubServer:
+    """Runs a stub handler on a local port in a background thread."""
+
+    def __init__(self, handler_cls, config: StubConfig, host: str = "127.0.0.1", port: int = 0):
+        attrs = {"config": config}
+        if handler_cls is FaceCrawlerStubHandler:
+            attrs.update(searches={}, lock=threading.Lock())
+        handler = type(handler_cls.__name__, (handler_cls,), attrs)
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,47 +1,135 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+from contextvars import ContextVar
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from datetime import datetime, timezone
+from settings import settings
 
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+_STANDARD_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class RequestContextFilter(logging.Filter):
+    """Anexa o request_id corrente ao registro (executa na thread da requisição)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Mantém apenas uma fração dos registros DEBUG; demais níveis passam sempre."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler que não formata na thread chamadora.
+
+    A fila é local ao processo, então o registro pode seguir intacto e toda a
+    formatação acontece na thread do QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+
+_listeners: list[QueueListener] = []
+
+
+def stop_logging() -> None:
+    """Esvazia as filas e encerra as threads dos listeners."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_logging)
+
+
 def setup_logger(
     name: str = "autosint",
     log_level: int = logging.INFO,
     log_to_file: bool = True,
-    log_to_console: bool = True
+    log_to_console: bool = True,
+    debug_sample_rate: float = 1.0,
 ) -> logging.Logger:
     """
     Configura e retorna um logger.
-    
+
+    O logger recebe apenas um QueueHandler; a escrita em console/arquivo é
+    feita pelo QueueListener em uma thread separada.
+
     Args:
         name: Nome do logger
         log_level: Nível de log (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_to_file: Se True, salva logs em arquivo
         log_to_console: Se True, exibe logs no console
-    
+        debug_sample_rate: Fração dos registros DEBUG mantidos (0.0 a 1.0)
+
     Returns:
         Logger configurado
     """
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
-    
+
     if logger.handlers:
         return logger
-    
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
+
+    formatter = _build_formatter()
+    sinks = []
+
     if log_to_console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(log_level)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-    
+        sinks.append(console_handler)
+
     if log_to_file:
         log_file = LOG_DIR / f"{name}.log"
         file_handler = RotatingFileHandler(
@@ -51,13 +139,32 @@ def setup_logger(
         )
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
+        sinks.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *sinks, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    if debug_sample_rate < 1.0:
+        queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
     return logger
 
 
-main_logger = setup_logger("autosint", logging.INFO)
-auth_logger = setup_logger("autosint.auth", logging.INFO)
-db_logger = setup_logger("autosint.database", logging.INFO)
-api_logger = setup_logger("autosint.api", logging.INFO)
+_level = logging.getLevelName(settings.LOG_LEVEL.upper())
 
+main_logger = setup_logger("autosint", _level, debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE)
+auth_logger = setup_logger("autosint.auth", _level, debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE)
+db_logger = setup_logger("autosint.database", _level, debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE)
+api_logger = setup_logger("autosint.api", _level, debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE)
+sql_logger = setup_logger(
+    "sqlalchemy.engine",
+    logging.INFO if settings.LOG_SQL_ECHO else logging.WARNING,
+    log_to_file=False,
+    debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE,
+)
@@ -1,7 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
+from monitoring.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CHECKED_OUT, DB_POOL_SIZE
 import os
+import time
 
 load_dotenv()
 
@@ -11,7 +14,37 @@ db_host = os.getenv("DATABASE_HOST", "localhost")
 db_port = os.getenv("DATABASE_PORT", 5432)
 db_name = os.getenv("DATABASE_NAME", "database")
 
-DATABASE_URL = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}",
+)
+
+# SQL statements are logged through the "sqlalchemy.engine" queue logger set up
+# in config_logging (LOG_SQL_ECHO) instead of echo=True, which writes inline.
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+engine = create_engine(DATABASE_URL, echo=False, poolclass=InstrumentedQueuePool)
+DB_POOL_SIZE.set(engine.pool.size())
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
 
-engine = create_engine(DATABASE_URL, echo=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
@@ -1,4 +1,13 @@
 from .base_model import Base
-from .db_models import ScanHistory, TargetResult
+from .db_models import (
+    ScanHistory, TargetResult, Watchlist, GraphNode, GraphEdge, ImageHash,
+    UsageScans, UsageUpstream, UsageCache, UsageLatency, RollupState,
+    ResponseBlob, ScanResponse, CompressionDict,
+)
 
-__all__ = ["Base", "Target", "ScanHistory", "TargetResult", "AuditLog"]
+__all__ = [
+    "Base", "Target", "ScanHistory", "TargetResult", "AuditLog", "Watchlist",
+    "GraphNode", "GraphEdge", "ImageHash",
+    "UsageScans", "UsageUpstream", "UsageCache", "UsageLatency", "RollupState",
+    "ResponseBlob", "ScanResponse", "CompressionDict",
+]
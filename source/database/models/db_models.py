@@ -1,12 +1,13 @@
 import uuid
 from typing import Optional, List
 from sqlalchemy.orm import mapped_column, Mapped, relationship
-from sqlalchemy import String, Boolean, DateTime, JSON
-from sqlalchemy import ForeignKey
+from sqlalchemy import String, Boolean, Date, DateTime, Float, JSON, BigInteger, Integer, LargeBinary, UniqueConstraint
+from sqlalchemy import ForeignKey, ForeignKeyConstraint, Index, DDL, event, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from .base_model import Base
+from database.partitions import create_initial_partitions
 from settings import settings
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 class User(Base):
@@ -32,6 +33,10 @@ class User(Base):
         "RefreshToken", back_populates="user", cascade="all, delete-orphan"
     )
 
+    watchlist: Mapped[List["Watchlist"]] = relationship(
+        "Watchlist", back_populates="user", cascade="all, delete-orphan"
+    )
+
 
 class RefreshToken(Base):
     __tablename__ = settings.DB_REFRESH_TOKEN
@@ -53,20 +58,39 @@ class RefreshToken(Base):
 
 
 class ScanHistory(Base):
+    """One search run.
+
+    On Postgres the table is range-partitioned by month on ``timestamp``
+    (see ``database.partitions``), so the partition key is part of the
+    primary key and ``parent_scan_id`` is a plain, unconstrained reference.
+    """
+
     __tablename__ = settings.DB_SCAN_HISTORY
-    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+    __table_args__ = {
+        "extend_existing": settings.DATABASE_SCHEMA,
+        "postgresql_partition_by": "RANGE (timestamp)",
+    }
 
     scan_id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey(f"{settings.DB_USER}.user_id"), nullable=False
+        ForeignKey(f"{settings.DB_USER}.user_id"), nullable=False, index=True
     )
     search_type: Mapped[str] = mapped_column(nullable=False)
     engine: Mapped[str] = mapped_column(nullable=False)
     query: Mapped[Optional[str]] = mapped_column(nullable=True)
     image_metadata: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
-    id_search: Mapped[Optional[str]] = mapped_column(nullable=True)
+    id_search: Mapped[Optional[str]] = mapped_column(nullable=True, index=True)
     status: Mapped[str] = mapped_column(nullable=False, default="STARTED")
-    timestamp: Mapped[datetime] = mapped_column(default=datetime.utcnow, nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(
+        primary_key=True, default=datetime.utcnow, nullable=False, index=True
+    )
+    parent_scan_id: Mapped[Optional[uuid.UUID]] = mapped_column(nullable=True, index=True)
+    watch_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey(f"{settings.DB_WATCHLIST}.watch_id"), nullable=True, index=True
+    )
+    raw_response_key: Mapped[Optional[str]] = mapped_column(
+        String(64), ForeignKey(f"{settings.DB_RESPONSE_BLOB}.blob_key"), nullable=True, index=True
+    )
 
     user: Mapped["User"] = relationship("User", back_populates="scans")
     results: Mapped[List["TargetResult"]] = relationship(
@@ -75,13 +99,29 @@ class ScanHistory(Base):
 
 
 class TargetResult(Base):
+    """A result of a scan, partitioned like ``scan_history`` on the scan's timestamp.
+
+    ``scan_timestamp`` copies ``ScanHistory.timestamp`` so a result lands in
+    the same month as its scan and both partitions expire together.
+    """
+
     __tablename__ = settings.DB_TARGET_RESULT
-    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["scan_id", "scan_timestamp"],
+            [f"{settings.DB_SCAN_HISTORY}.scan_id", f"{settings.DB_SCAN_HISTORY}.timestamp"],
+            name=f"fk_{settings.DB_TARGET_RESULT}_scan",
+            ondelete="CASCADE",
+        ),
+        {
+            "extend_existing": settings.DATABASE_SCHEMA,
+            "postgresql_partition_by": "RANGE (scan_timestamp)",
+        },
+    )
 
     result_id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    scan_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("scan_history.scan_id"), nullable=False
-    )
+    scan_id: Mapped[uuid.UUID] = mapped_column(nullable=False, index=True)
+    scan_timestamp: Mapped[datetime] = mapped_column(primary_key=True, nullable=False)
     title: Mapped[Optional[str]] = mapped_column(nullable=True)
     link: Mapped[Optional[str]] = mapped_column(nullable=True)
     snippet: Mapped[Optional[str]] = mapped_column(nullable=True)
@@ -91,3 +131,254 @@ class TargetResult(Base):
     processed: Mapped[bool] = mapped_column(default=False, nullable=False)
 
     scan: Mapped["ScanHistory"] = relationship("ScanHistory", back_populates="results")
+
+
+# Postgres: monthly partitions from the start; database.partitions keeps them ahead.
+for _table in (ScanHistory.__table__, TargetResult.__table__):
+    event.listen(_table, "after_create", create_initial_partitions)
+
+
+RESULTS_FTS_TABLE = f"{settings.DB_TARGET_RESULT}_fts"
+
+
+def result_search_document(title, snippet):
+    """tsvector over title and snippet; shared by the GIN index and the queries."""
+    empty = text("''")
+    return func.to_tsvector(
+        text(f"'{settings.FTS_LANGUAGE}'::regconfig"),
+        func.coalesce(title, empty)
+        .op("||")(text("' '"))
+        .op("||")(func.coalesce(snippet, empty)),
+    )
+
+
+# Postgres: expression GIN index, kept up to date by Postgres on every insert.
+Index(
+    f"ix_{settings.DB_TARGET_RESULT}_search",
+    result_search_document(TargetResult.__table__.c.title, TargetResult.__table__.c.snippet),
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+# SQLite (local/tests): FTS5 table maintained by triggers.
+RESULTS_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {RESULTS_FTS_TABLE} "
+    f"USING fts5(result_id UNINDEXED, title, snippet)",
+    f"CREATE TRIGGER IF NOT EXISTS {RESULTS_FTS_TABLE}_ai AFTER INSERT ON {settings.DB_TARGET_RESULT} BEGIN "
+    f"INSERT INTO {RESULTS_FTS_TABLE} (result_id, title, snippet) "
+    f"VALUES (new.result_id, coalesce(new.title, ''), coalesce(new.snippet, '')); END",
+    f"CREATE TRIGGER IF NOT EXISTS {RESULTS_FTS_TABLE}_ad AFTER DELETE ON {settings.DB_TARGET_RESULT} BEGIN "
+    f"DELETE FROM {RESULTS_FTS_TABLE} WHERE result_id = old.result_id; END",
+)
+for _statement in RESULTS_FTS_DDL:
+    event.listen(
+        TargetResult.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite")
+    )
+
+
+class Watchlist(Base):
+    __tablename__ = settings.DB_WATCHLIST
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    watch_id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey(f"{settings.DB_USER}.user_id"), nullable=False, index=True
+    )
+    target: Mapped[dict] = mapped_column(JSON, nullable=False)
+    interval_hours: Mapped[int] = mapped_column(nullable=False, default=168)
+    notify_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    fingerprints: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    last_scan_id: Mapped[Optional[uuid.UUID]] = mapped_column(nullable=True)
+    next_run_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    user: Mapped["User"] = relationship("User", back_populates="watchlist")
+
+
+# SQLite only auto-increments INTEGER primary keys.
+GraphId = BigInteger().with_variant(Integer, "sqlite")
+
+
+class GraphNode(Base):
+    """Entity-graph node: a target, canonical URL, domain, handle, contact or face match."""
+
+    __tablename__ = settings.DB_GRAPH_NODE
+    __table_args__ = (
+        UniqueConstraint("kind", "key", name=f"uq_{settings.DB_GRAPH_NODE}_kind_key"),
+        {"extend_existing": settings.DATABASE_SCHEMA},
+    )
+
+    node_id: Mapped[int] = mapped_column(GraphId, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    key: Mapped[str] = mapped_column(String(500), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class GraphEdge(Base):
+    """Directed adjacency row; every link is stored in both directions.
+
+    ``scan_id`` records provenance and is deliberately not a foreign key:
+    edges may be indexed before a write-behind scan row is flushed.
+    """
+
+    __tablename__ = settings.DB_GRAPH_EDGE
+    __table_args__ = (
+        UniqueConstraint(
+            "src_id", "dst_id", "scan_id", name=f"uq_{settings.DB_GRAPH_EDGE}_src_dst_scan"
+        ),
+        Index(f"ix_{settings.DB_GRAPH_EDGE}_user_src", "user_id", "src_id"),
+        {"extend_existing": settings.DATABASE_SCHEMA},
+    )
+
+    edge_id: Mapped[int] = mapped_column(GraphId, primary_key=True, autoincrement=True)
+    src_id: Mapped[int] = mapped_column(
+        GraphId, ForeignKey(f"{settings.DB_GRAPH_NODE}.node_id"), nullable=False
+    )
+    dst_id: Mapped[int] = mapped_column(
+        GraphId, ForeignKey(f"{settings.DB_GRAPH_NODE}.node_id"), nullable=False
+    )
+    scan_id: Mapped[uuid.UUID] = mapped_column(nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ImageHash(Base):
+    """64-bit perceptual hash of an uploaded image, for near-duplicate lookups.
+
+    ``phash`` holds the unsigned hash reinterpreted as a signed 64-bit
+    integer; ``hash_id`` orders rows so in-memory indexes can load new ones
+    incrementally.
+    """
+
+    __tablename__ = settings.DB_IMAGE_HASH
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    hash_id: Mapped[int] = mapped_column(GraphId, primary_key=True, autoincrement=True)
+    # Not a foreign key: a partitioned scan_history can only be referenced
+    # with its partition key. Rows go with their scan's partition.
+    scan_id: Mapped[uuid.UUID] = mapped_column(nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(nullable=False)
+    phash: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ResponseBlob(Base):
+    """Raw upstream response body, zstd-compressed and addressed by its SHA-256.
+
+    ``dict_id`` is the trained dictionary the frame needs (0 for none), as
+    also recorded in the frame header.
+    """
+
+    __tablename__ = settings.DB_RESPONSE_BLOB
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    blob_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    dict_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    raw_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # Refreshed whenever the body is archived again.
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class ScanResponse(Base):
+    """Archived response of a scan that made more than one upstream call.
+
+    Name-variant and planned searches fetch several SERP pages; each gets a
+    row here, in fetch order. ``scan_history.raw_response_key`` still holds
+    the first one, so single-call scans need no rows.
+    """
+
+    __tablename__ = settings.DB_SCAN_RESPONSE
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    # Not a foreign key, like image_hash.scan_id. Rows go with their scan.
+    scan_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    blob_key: Mapped[str] = mapped_column(
+        String(64), ForeignKey(f"{settings.DB_RESPONSE_BLOB}.blob_key"), nullable=False, index=True
+    )
+
+
+class CompressionDict(Base):
+    """Trained zstd dictionary; kept for as long as blobs reference it."""
+
+    __tablename__ = settings.DB_COMPRESSION_DICT
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    dict_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False, index=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Daily usage rollups, maintained incrementally for the admin dashboard.
+# Rows are only ever upserted with increments, so several workers can flush
+# into them concurrently.
+
+class UsageScans(Base):
+    """Scans per day, user, engine and category (``scan_history.search_type``)."""
+
+    __tablename__ = settings.DB_USAGE_SCANS
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    engine: Mapped[str] = mapped_column(String(32), primary_key=True)
+    category: Mapped[str] = mapped_column(String(32), primary_key=True)
+    scans: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class UsageUpstream(Base):
+    """Upstream API calls, errors and estimated spend per day and operation."""
+
+    __tablename__ = settings.DB_USAGE_UPSTREAM
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    upstream: Mapped[str] = mapped_column(String(32), primary_key=True)
+    operation: Mapped[str] = mapped_column(String(32), primary_key=True)
+    calls: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    errors: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    cost: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class UsageCache(Base):
+    """Cache hits and misses per day and cache."""
+
+    __tablename__ = settings.DB_USAGE_CACHE
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    cache: Mapped[str] = mapped_column(String(32), primary_key=True)
+    hits: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    misses: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class UsageLatency(Base):
+    """Latency histogram per day and series (``http`` routes, ``upstream`` calls).
+
+    ``bucket`` is ``ceil(3 * log2(ms))``: buckets grow by a factor of 2^(1/3),
+    so merged counts give percentiles within about 26%.
+    """
+
+    __tablename__ = settings.DB_USAGE_LATENCY
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), primary_key=True)
+    name: Mapped[str] = mapped_column(String(200), primary_key=True)
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class RollupState(Base):
+    """High-water mark of a rollup over an append-mostly table."""
+
+    __tablename__ = settings.DB_ROLLUP_STATE
+    __table_args__ = {"extend_existing": settings.DATABASE_SCHEMA}
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    watermark: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,267 @@
+from .session import get_session
+from config_logging import db_logger
+from settings import settings
+from sqlalchemy import text, true
+from datetime import date, datetime
+from typing import Dict, List, Optional
+import asyncio
+import re
+
+# Month-partitioned tables, referenced table first.
+PARTITIONED_TABLES = (settings.DB_SCAN_HISTORY, settings.DB_TARGET_RESULT)
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> Optional[date]:
+    """First month that is kept, or None when scans are kept forever."""
+    if settings.SCAN_RETENTION_MONTHS <= 0:
+        return None
+    return add_months(month_start(now or datetime.utcnow()), -settings.SCAN_RETENTION_MONTHS)
+
+
+def within_retention(column):
+    """Condition keeping ``column`` inside the retention window; always true when scans are kept forever.
+
+    Lookups by scan id alone carry it so Postgres can skip the partitions
+    of expired months instead of probing every month's index.
+    """
+    cutoff = retention_cutoff()
+    if cutoff is None:
+        return true()
+    return column >= datetime(cutoff.year, cutoff.month, 1)
+
+
+def create_partitions(
+    connection, table: str, now: Optional[datetime] = None, since: Optional[date] = None
+):
+    """Create this month's partition and ``SCAN_PARTITION_PREMAKE_MONTHS`` ahead
+    (and every month from ``since`` on, for existing rows)."""
+    current = month_start(now or datetime.utcnow())
+    month = min(since or current, current)
+    last = add_months(current, settings.SCAN_PARTITION_PREMAKE_MONTHS)
+    while month <= last:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+            f"PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        month = add_months(month, 1)
+
+
+def create_initial_partitions(target, connection, **kw):
+    """``after_create`` hook: a partitioned table cannot take rows before it has partitions."""
+    if connection.dialect.name == "postgresql":
+        create_partitions(connection, target.name)
+
+
+def is_partitioned(connection, table: str) -> bool:
+    return connection.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table"
+        ),
+        {"table": table},
+    ).first() is not None
+
+
+def partitions(connection, table: str) -> Dict[date, str]:
+    """Attached monthly partitions of ``table`` by month."""
+    names = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table"
+        ),
+        {"table": table},
+    ).scalars()
+    months = {}
+    for name in names:
+        match = _PARTITION_SUFFIX.search(name)
+        if match:
+            months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return months
+
+
+class PartitionMaintenance:
+    """Keeps the scan tables' monthly partitions ahead of time and applies retention.
+
+    On Postgres each run creates missing partitions up to
+    ``SCAN_PARTITION_PREMAKE_MONTHS`` ahead and, with
+    ``SCAN_RETENTION_MONTHS`` set, detaches the partitions of months that
+    fell out of the window (``target_result`` before ``scan_history``),
+    dropping them too when ``SCAN_RETENTION_MODE`` is ``drop``. Detached
+    partitions stay behind as plain tables for archiving. Databases whose
+    tables are not partitioned (SQLite, or Postgres tables created before
+    partitioning) get the same retention through batched deletes.
+
+    The expired scans' side tables (image hashes, archive links, graph
+    edges) go with them. Graph nodes left without edges and archived
+    bodies no scan references are then collected, if they are older than
+    the window; detached partitions still reference their bodies, so those
+    are only collected once scans are dropped or deleted.
+    """
+
+    def run_cycle(self, now: Optional[datetime] = None) -> List[str]:
+        """Apply one maintenance pass; returns the partitions detached or dropped."""
+        now = now or datetime.utcnow()
+        cutoff = retention_cutoff(now)
+        with get_session() as session:
+            connection = session.connection()
+            partitioned = connection.dialect.name == "postgresql" and all(
+                is_partitioned(connection, table) for table in PARTITIONED_TABLES
+            )
+            if partitioned:
+                for table in PARTITIONED_TABLES:
+                    create_partitions(connection, table, now)
+        if cutoff is None:
+            return []
+        if partitioned:
+            return self._expire_partitions(cutoff)
+        self._delete_expired(cutoff)
+        return []
+
+    def _expire_partitions(self, cutoff: date) -> List[str]:
+        expired: List[str] = []
+        with get_session() as session:
+            connection = session.connection()
+            months = {table: partitions(connection, table) for table in PARTITIONED_TABLES}
+        scan_months = months[settings.DB_SCAN_HISTORY]
+        for month in sorted(m for m in scan_months if m < cutoff):
+            # One transaction per month: results, then the scans' side
+            # tables, then scans.
+            with get_session() as session:
+                connection = session.connection()
+                result_partition = months[settings.DB_TARGET_RESULT].get(month)
+                if result_partition:
+                    self._detach(connection, settings.DB_TARGET_RESULT, result_partition)
+                for table in (settings.DB_IMAGE_HASH, settings.DB_SCAN_RESPONSE, settings.DB_GRAPH_EDGE):
+                    connection.execute(text(
+                        f"DELETE FROM {table} "
+                        f"WHERE scan_id IN (SELECT scan_id FROM {scan_months[month]})"
+                    ))
+                self._detach(connection, settings.DB_SCAN_HISTORY, scan_months[month])
+            expired.extend(filter(None, (result_partition, scan_months[month])))
+            db_logger.info(
+                f"Scan partitions for {month:%Y-%m} "
+                f"{'dropped' if settings.SCAN_RETENTION_MODE == 'drop' else 'detached'}"
+            )
+        self._collect_garbage(cutoff, blobs=settings.SCAN_RETENTION_MODE == "drop")
+        return expired
+
+    @staticmethod
+    def _detach(connection, table: str, partition: str):
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+        if settings.SCAN_RETENTION_MODE == "drop":
+            connection.execute(text(f"DROP TABLE {partition}"))
+            return
+        # A detached result partition keeps a copy of the foreign key to
+        # scan_history, which would block detaching the scans' partition.
+        for name in connection.execute(
+            text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"),
+            {"table": partition},
+        ).scalars().all():
+            connection.execute(text(f'ALTER TABLE {partition} DROP CONSTRAINT "{name}"'))
+
+    def _delete_expired(self, cutoff: date):
+        since = datetime(cutoff.year, cutoff.month, 1)
+        batch = settings.SCAN_RETENTION_DELETE_BATCH
+        statements = (
+            f"DELETE FROM {settings.DB_TARGET_RESULT} WHERE result_id IN ("
+            f"SELECT result_id FROM {settings.DB_TARGET_RESULT} WHERE scan_timestamp < :since LIMIT {batch})",
+            f"DELETE FROM {settings.DB_IMAGE_HASH} WHERE hash_id IN ("
+            f"SELECT h.hash_id FROM {settings.DB_IMAGE_HASH} h JOIN {settings.DB_SCAN_HISTORY} s "
+            f"ON s.scan_id = h.scan_id WHERE s.timestamp < :since LIMIT {batch})",
+            f"DELETE FROM {settings.DB_SCAN_RESPONSE} WHERE scan_id IN ("
+            f"SELECT r.scan_id FROM {settings.DB_SCAN_RESPONSE} r JOIN {settings.DB_SCAN_HISTORY} s "
+            f"ON s.scan_id = r.scan_id WHERE s.timestamp < :since LIMIT {batch})",
+            f"DELETE FROM {settings.DB_GRAPH_EDGE} WHERE edge_id IN ("
+            f"SELECT e.edge_id FROM {settings.DB_GRAPH_EDGE} e JOIN {settings.DB_SCAN_HISTORY} s "
+            f"ON s.scan_id = e.scan_id WHERE s.timestamp < :since LIMIT {batch})",
+            f"DELETE FROM {settings.DB_SCAN_HISTORY} WHERE scan_id IN ("
+            f"SELECT scan_id FROM {settings.DB_SCAN_HISTORY} WHERE timestamp < :since LIMIT {batch})",
+        )
+        self._delete_batched(statements, since)
+        self._collect_garbage(cutoff, blobs=True)
+
+    def _collect_garbage(self, cutoff: date, blobs: bool):
+        """Delete graph nodes without edges and, with ``blobs``, archived
+        bodies no scan references.
+
+        Only rows created before the window are candidates: the graph
+        indexer inserts a node before its edges, and a body is archived
+        before the scan that references it is written (re-archiving an
+        existing body refreshes its ``created_at``).
+        """
+        since = datetime(cutoff.year, cutoff.month, 1)
+        batch = settings.SCAN_RETENTION_DELETE_BATCH
+        # Edges are stored in both directions, so every linked node is a src_id.
+        statements = [
+            f"DELETE FROM {settings.DB_GRAPH_NODE} WHERE node_id IN ("
+            f"SELECT n.node_id FROM {settings.DB_GRAPH_NODE} n WHERE n.created_at < :since "
+            f"AND NOT EXISTS (SELECT 1 FROM {settings.DB_GRAPH_EDGE} e WHERE e.src_id = n.node_id) "
+            f"LIMIT {batch})",
+        ]
+        if blobs:
+            statements.append(
+                f"DELETE FROM {settings.DB_RESPONSE_BLOB} WHERE created_at < :since AND blob_key IN ("
+                f"SELECT b.blob_key FROM {settings.DB_RESPONSE_BLOB} b WHERE b.created_at < :since "
+                f"AND NOT EXISTS (SELECT 1 FROM {settings.DB_SCAN_HISTORY} s WHERE s.raw_response_key = b.blob_key) "
+                f"AND NOT EXISTS (SELECT 1 FROM {settings.DB_SCAN_RESPONSE} r WHERE r.blob_key = b.blob_key) "
+                f"LIMIT {batch})"
+            )
+        self._delete_batched(statements, since)
+
+    @staticmethod
+    def _delete_batched(statements, since: datetime):
+        batch = settings.SCAN_RETENTION_DELETE_BATCH
+        for statement in statements:
+            deleted = batch
+            while deleted >= batch:
+                # Short transactions, so writers are never blocked for long.
+                with get_session() as session:
+                    deleted = session.execute(text(statement), {"since": since}).rowcount
+
+
+class PartitionScheduler:
+    """In-process loop that runs partition maintenance off the event loop."""
+
+    def __init__(self, service: Optional[PartitionMaintenance] = None):
+        self.service = service or PartitionMaintenance()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.service.run_cycle)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                db_logger.error(f"Partition maintenance error: {str(e)}", exc_info=True)
+            await asyncio.sleep(settings.SCAN_PARTITION_INTERVAL_SECONDS)
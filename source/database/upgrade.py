@@ -0,0 +1,130 @@
+"""Bring an existing database up to the current models.
+
+Usage (from ``source/``, with the API stopped and a backup taken)::
+
+    python -m database.upgrade            # create/alter, then partition scan tables
+    python -m database.upgrade --keep-legacy
+
+Every step checks the current state first, so the script can be re-run
+after a failure or on an already current database:
+
+1. creates missing tables (watchlist, graph, archive, usage rollups, ...);
+2. adds missing columns to existing tables (``scan_history.parent_scan_id``,
+   ``watch_id``, ``raw_response_key``, ``target_results.scan_timestamp``)
+   and backfills ``scan_timestamp`` from the scan;
+3. on Postgres, converts unpartitioned ``scan_history``/``target_results``
+   into monthly partitioned tables: the old tables are renamed to
+   ``*_legacy``, the new ones created with a partition for every month
+   that has rows, the rows copied over and the legacy tables dropped
+   (kept with ``--keep-legacy``). This runs in one transaction and holds
+   both tables locked while it copies;
+4. creates missing indexes, and on SQLite the results full-text table,
+   filling it from the stored results.
+"""
+from .base import engine
+from .models import Base
+from .models.db_models import RESULTS_FTS_DDL, RESULTS_FTS_TABLE, ScanHistory, TargetResult
+from .partitions import PARTITIONED_TABLES, create_partitions, is_partitioned, month_start
+from config_logging import db_logger
+from settings import settings
+from sqlalchemy import inspect, text
+import argparse
+
+SCAN = settings.DB_SCAN_HISTORY
+RESULT = settings.DB_TARGET_RESULT
+
+
+def add_missing_columns(connection):
+    """Add model columns the database lacks, as nullable; backfill ``scan_timestamp``."""
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+            db_logger.info(f"Added column {table.name}.{column.name}")
+    connection.execute(text(
+        f"UPDATE {RESULT} SET scan_timestamp = "
+        f"(SELECT s.timestamp FROM {SCAN} s WHERE s.scan_id = {RESULT}.scan_id) "
+        f"WHERE scan_timestamp IS NULL"
+    ))
+
+
+def partition_scan_tables(connection, keep_legacy: bool = False):
+    """Postgres: move unpartitioned scan tables into monthly partitioned ones."""
+    if all(is_partitioned(connection, table) for table in PARTITIONED_TABLES):
+        return
+    connection.execute(text(f"LOCK TABLE {SCAN}, {RESULT} IN ACCESS EXCLUSIVE MODE"))
+    for table in PARTITIONED_TABLES:
+        # Index names are schema-wide; move the old ones out of the way.
+        for (index,) in connection.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :table"), {"table": table}
+        ).all():
+            connection.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_legacy"'))
+        connection.execute(text(f"ALTER TABLE {table} RENAME TO {table}_legacy"))
+
+    ScanHistory.__table__.create(connection)
+    TargetResult.__table__.create(connection)
+    oldest = connection.execute(text(f"SELECT min(timestamp) FROM {SCAN}_legacy")).scalar()
+    if oldest is not None:
+        for table in PARTITIONED_TABLES:
+            create_partitions(connection, table, since=month_start(oldest))
+
+    scan_columns = ", ".join(f'"{c.name}"' for c in ScanHistory.__table__.columns)
+    connection.execute(text(
+        f"INSERT INTO {SCAN} ({scan_columns}) SELECT {scan_columns} FROM {SCAN}_legacy"
+    ))
+    result_columns = [c.name for c in TargetResult.__table__.columns if c.name != "scan_timestamp"]
+    connection.execute(text(
+        f"INSERT INTO {RESULT} ({', '.join(result_columns)}, scan_timestamp) "
+        f"SELECT {', '.join('r.' + c for c in result_columns)}, s.timestamp "
+        f"FROM {RESULT}_legacy r JOIN {SCAN}_legacy s ON s.scan_id = r.scan_id"
+    ))
+    if not keep_legacy:
+        connection.execute(text(f"DROP TABLE {RESULT}_legacy, {SCAN}_legacy CASCADE"))
+    db_logger.info("Partitioned scan tables")
+
+
+def create_missing_indexes(connection):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def create_results_fts(connection):
+    """SQLite: the FTS5 table and triggers, filled with results stored before they existed."""
+    for statement in RESULTS_FTS_DDL:
+        connection.execute(text(statement))
+    connection.execute(text(
+        f"INSERT INTO {RESULTS_FTS_TABLE} (result_id, title, snippet) "
+        f"SELECT result_id, coalesce(title, ''), coalesce(snippet, '') FROM {RESULT} "
+        f"WHERE result_id NOT IN (SELECT result_id FROM {RESULTS_FTS_TABLE})"
+    ))
+
+
+def upgrade(keep_legacy: bool = False):
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+        add_missing_columns(connection)
+        if connection.dialect.name == "postgresql":
+            partition_scan_tables(connection, keep_legacy)
+        create_missing_indexes(connection)
+        if connection.dialect.name == "sqlite":
+            create_results_fts(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keep-legacy", action="store_true", help="Keep the unpartitioned tables as *_legacy")
+    args = parser.parse_args()
+    upgrade(keep_legacy=args.keep_legacy)
+    print("Database is up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from .session import get_session
+from config_logging import db_logger
+from settings import settings
+from sqlalchemy import insert
+from typing import Dict, List, Optional, Tuple, Type
+import queue
+import threading
+import time
+
+# One unit of work: rows that must be written together, parents first.
+Entry = List[Tuple[Type, dict]]
+
+
+class WriteBehindBuffer:
+    """Queues inserts in memory and writes them in multi-row batches.
+
+    A background thread flushes every ``flush_interval`` seconds or as soon as
+    ``batch_size`` entries are pending, whichever comes first. The buffer is
+    bounded: ``add`` waits up to ``put_timeout`` seconds for room
+    (backpressure) and then writes the entry synchronously in the caller.
+    Pending entries are flushed by ``stop``.
+    """
+
+    def __init__(
+        self,
+        max_pending: int,
+        batch_size: int,
+        flush_interval: float,
+        put_timeout: float,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue[Entry]" = queue.Queue(maxsize=max_pending)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write everything still queued."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        while batch := self._drain(None):
+            self._flush(batch)
+
+    def add(self, entry: Entry):
+        if self._thread is None:
+            self._write([entry])
+            return
+        try:
+            self._queue.put(entry, timeout=self.put_timeout)
+        except queue.Full:
+            db_logger.warning("Write-behind buffer full, writing synchronously")
+            self._write([entry])
+
+    def _run(self):
+        while not self._stopping.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            self._flush(self._drain(deadline))
+
+    def _drain(self, deadline: Optional[float]) -> List[Entry]:
+        """Collect up to ``batch_size`` entries, waiting until ``deadline`` for more."""
+        batch: List[Entry] = []
+        while len(batch) < self.batch_size:
+            try:
+                if deadline is None:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0 or self._stopping.is_set():
+                        break
+                    batch.append(self._queue.get(timeout=min(timeout, 0.1)))
+            except queue.Empty:
+                if deadline is None:
+                    break
+        return batch
+
+    def _flush(self, batch: List[Entry]):
+        if not batch:
+            return
+        try:
+            self._write(batch)
+        except Exception as e:
+            db_logger.error(
+                f"Write-behind batch of {len(batch)} failed, retrying one by one: {str(e)}"
+            )
+            for entry in batch:
+                try:
+                    self._write([entry])
+                except Exception as e:
+                    db_logger.error(f"Write-behind entry dropped: {str(e)}", exc_info=True)
+
+    def _write(self, entries: List[Entry]):
+        # Models are inserted in order of first appearance, so parent rows
+        # (listed first in every entry) land before the rows referencing them.
+        rows: Dict[Type, List[dict]] = {}
+        for entry in entries:
+            for model, values in entry:
+                rows.setdefault(model, []).append(values)
+        with get_session() as session:
+            for model, values in rows.items():
+                session.execute(insert(model), values)
+
+
+scan_writer = WriteBehindBuffer(
+    max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_MS / 1000,
+    put_timeout=settings.WRITE_BEHIND_PUT_TIMEOUT_MS / 1000,
+)
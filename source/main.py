@@ -1,18 +1,72 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from modules.target.routes.target_routes import router as target_router
-from auth.routes import router as auth_router, limiter
+from modules.admin.routes.admin_routes import router as admin_router
+from auth.routes import router as auth_router, well_known_router, limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi import _rate_limit_exceeded_handler
+from middleware.request_context import RequestContextMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.bulkhead import BulkheadMiddleware, readiness
+from middleware.compression import CompressionMiddleware
+from monitoring.metrics import render_metrics, mark_process_dead
+from modules.target.domain.target_watchlist import WatchlistScheduler
+from modules.admin.domain.usage_rollups import UsageRollupScheduler
+from services.facecrawler.image_preprocessing import shutdown_image_pool
+from services.usernames.username_checker import username_checker
+from database.write_behind import scan_writer
+from database.partitions import PartitionScheduler
+from modules.target.domain.target_graph import shutdown_graph_indexer
+from modules.target.domain.target_domain_recon import shutdown_domain_recon
+from modules.target.domain.target_replay import shutdown_replay_pool
+from settings import settings
+import anyio.to_thread
+import asyncio
 import dotenv
 
 dotenv.load_dotenv()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    if settings.WRITE_BEHIND_ENABLED:
+        scan_writer.start()
+    scheduler = WatchlistScheduler()
+    if settings.WATCHLIST_SCHEDULER_ENABLED:
+        scheduler.start()
+    usage_rollups = UsageRollupScheduler()
+    if settings.USAGE_ROLLUP_ENABLED:
+        usage_rollups.start()
+    partitions = PartitionScheduler()
+    if settings.SCAN_PARTITION_MAINTENANCE_ENABLED:
+        partitions.start()
+    yield
+    await scheduler.stop()
+    await username_checker.aclose()
+    await asyncio.to_thread(scan_writer.stop)
+    await usage_rollups.stop()
+    await partitions.stop()
+    await asyncio.to_thread(shutdown_graph_indexer)
+    await asyncio.to_thread(shutdown_domain_recon)
+    shutdown_image_pool()
+    shutdown_replay_pool()
+    mark_process_dead()
+
+
 app = FastAPI(
     title="HexaOSINT API",
     description="A modular OSINT API for text and image searches",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(BulkheadMiddleware)
+
+# Added after the bulkhead so CORS wraps it: shed 503s still carry CORS headers.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -26,15 +80,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
+
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Health and readiness are async so they never wait for a worker thread.
 @app.get("/health-check")
-def health_check():
+async def health_check():
     return {"status": "ok"}
 
+
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    is_ready, bulkheads = readiness()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "overloaded", "bulkheads": bulkheads},
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 app.include_router(auth_router)
+app.include_router(well_known_router)
 app.include_router(target_router)
+app.include_router(admin_router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from typing import Dict, Optional
+from middleware.metrics import route_group
+from monitoring.metrics import BULKHEAD_QUEUE_DEPTH, BULKHEAD_REJECTED
+from settings import settings
+
+
+class Bulkhead:
+    """Concurrency limit with a bounded number of waiters."""
+
+    def __init__(self, group: str, limit: int, max_queue: int):
+        self.group = group
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+        self._depth = BULKHEAD_QUEUE_DEPTH.labels(group)
+
+    def try_enter(self) -> bool:
+        """False when every slot is busy and the queue is already full."""
+        return not (self._semaphore.locked() and self.waiting >= self.max_queue)
+
+    async def acquire(self):
+        self.waiting += 1
+        self._depth.inc()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+            self._depth.dec()
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.waiting,
+            "max_queue": self.max_queue,
+        }
+
+
+def build_bulkheads() -> Dict[str, Bulkhead]:
+    return {
+        group: Bulkhead(group, limit, settings.BULKHEAD_QUEUE_LIMITS.get(group, limit))
+        for group, limit in settings.BULKHEAD_LIMITS.items()
+    }
+
+
+bulkheads = build_bulkheads()
+
+
+class BulkheadMiddleware:
+    """Caps concurrent requests per route group and sheds the excess.
+
+    Sync routes share one worker threadpool, so without a cap a slow upstream
+    behind ``/target`` can hold every thread and stall ``/auth`` and the
+    health checks. Groups listed in ``BULKHEAD_LIMITS`` may hold at most that
+    many requests at once (keep their sum below ``THREADPOOL_SIZE``); up to
+    ``BULKHEAD_QUEUE_LIMITS`` more wait for a slot, and anything beyond that
+    is rejected immediately with 503 and ``Retry-After``. A slot is held
+    until the response, including a streamed body, has been sent.
+    """
+
+    def __init__(self, app, groups: Optional[Dict[str, Bulkhead]] = None):
+        self.app = app
+        self.groups = bulkheads if groups is None else groups
+
+    async def __call__(self, scope, receive, send):
+        bulkhead = None
+        if scope["type"] == "http":
+            bulkhead = self.groups.get(route_group(scope["path"]))
+        if bulkhead is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not bulkhead.try_enter():
+            BULKHEAD_REJECTED.labels(bulkhead.group).inc()
+            await self._reject(send)
+            return
+
+        await bulkhead.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release()
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Server busy, retry later."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(settings.BULKHEAD_RETRY_AFTER_SECONDS).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def readiness() -> tuple[bool, dict]:
+    """Not ready while any bulkhead queue is above ``READINESS_QUEUE_RATIO`` full."""
+    ready = all(
+        bulkhead.waiting < settings.READINESS_QUEUE_RATIO * max(bulkhead.max_queue, 1)
+        for bulkhead in bulkheads.values()
+    )
+    return ready, {group: bulkhead.snapshot() for group, bulkhead in bulkheads.items()}
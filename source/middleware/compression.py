@@ -0,0 +1,118 @@
+import gzip
+from typing import Optional
+from settings import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/x-ndjson")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header, if acceptable."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Compresses large, single-message JSON/text responses with br or gzip.
+
+    Bodies under ``COMPRESSION_MIN_SIZE`` and streamed responses (batch
+    NDJSON, exports) are passed through untouched, so small responses pay no
+    CPU and streams keep flushing per chunk. A strong ``ETag`` gets the
+    content-coding appended (``"<hash>-br"``) because the bytes differ;
+    ``middleware.conditional`` strips it again when comparing.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = choose_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        started = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, started
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or started:
+                await send(message)
+                return
+
+            started = True
+            body = message.get("body", b"")
+            headers = list(start_message.get("headers", []))
+            names = {name.lower() for name, _ in headers}
+            content_type = next((v for n, v in headers if n.lower() == b"content-type"), b"")
+            if start_message["status"] == 304:
+                # Echo the tag of the representation the client would receive.
+                headers = [
+                    (name, self._tag(value, encoding) if name.lower() == b"etag" else value)
+                    for name, value in headers
+                ]
+                await send({**start_message, "headers": headers})
+                await send(message)
+                return
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or b"content-encoding" in names
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = [
+                (name, self._tag(value, encoding) if name.lower() == b"etag" else value)
+                for name, value in headers
+                if name.lower() != b"content-length"
+            ]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _tag(etag: bytes, encoding: str) -> bytes:
+        if etag.endswith(b'"'):
+            return etag[:-1] + b"-" + encoding.encode() + b'"'
+        return etag
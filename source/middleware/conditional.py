@@ -0,0 +1,60 @@
+import hashlib
+from typing import Any, Optional
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+CODING_SUFFIXES = ("-br", "-gzip")
+
+
+def compute_etag(*parts: Any) -> str:
+    """Strong ETag from a cheap hash of the values that define a response."""
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in CODING_SUFFIXES:
+            if candidate.endswith(suffix + '"'):
+                candidate = candidate[: -len(suffix) - 1] + '"'
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(request: Request, *fingerprint: Any) -> Optional[Response]:
+    """An empty 304 when the client's ``If-None-Match`` matches ``fingerprint``.
+
+    Lets a route answer before loading anything once a cheap fingerprint is
+    known; the full response must then be sent with the same fingerprint.
+    """
+    etag = compute_etag(*fingerprint)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return None
+
+
+def conditional_json(request: Request, payload: BaseModel, *fingerprint: Any) -> Response:
+    """Return ``payload`` with an ETag, or an empty 304 when the client has it.
+
+    ``fingerprint`` should be the fields that determine the body; on a match
+    the payload is never serialized.
+    """
+    unchanged = not_modified(request, *fingerprint)
+    if unchanged is not None:
+        return unchanged
+    return Response(
+        content=payload.model_dump_json(),
+        media_type="application/json",
+        headers=_cache_headers(compute_etag(*fingerprint)),
+    )
+
+
+def _cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
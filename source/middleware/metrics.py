@@ -0,0 +1,49 @@
+import time
+from monitoring.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_PROGRESS
+from monitoring.usage import usage_recorder
+
+EXCLUDED_PATHS = {"/metrics"}
+
+
+def route_group(path: str) -> str:
+    """First path segment (``/target``, ``/auth``...), a bounded label set."""
+    return "/" + path.lstrip("/").split("/", 1)[0]
+
+
+class MetricsMiddleware:
+    """Records per-route latency and in-flight requests.
+
+    Latency is labelled by the matched route template (``scope["route"]``,
+    set by FastAPI during routing) rather than the raw path so label
+    cardinality stays bounded. In-flight requests are labelled by route group
+    because the route is not known until the request has been dispatched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route_group(scope["path"]))
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            elapsed = time.perf_counter() - start
+            HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(elapsed)
+            usage_recorder.latency("http", f"{method} {route}", elapsed)
+            in_progress.dec()
@@ -0,0 +1,54 @@
+import time
+import uuid
+from config_logging import api_logger, request_id_var
+
+
+class RequestContextMiddleware:
+    """Assigns a request ID to every HTTP request and logs its latency.
+
+    Implemented as a plain ASGI middleware to avoid the per-request overhead
+    of ``BaseHTTPMiddleware``. The request ID is taken from ``X-Request-ID``
+    when the client sends one and is echoed back on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            api_logger.info(
+                "request completed",
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+                },
+            )
+            request_id_var.reset(token)
@@ -0,0 +1,320 @@
+from modules.admin.schemas import (
+    ScanUsageRow,
+    ScanUsageResponse,
+    LatencySummary,
+    UpstreamUsageRow,
+    UpstreamUsageResponse,
+    CacheUsageRow,
+    CacheUsageResponse,
+    RouteLatencyRow,
+    RouteLatencyResponse,
+)
+from database.models.db_models import (
+    ScanHistory,
+    UsageScans,
+    UsageUpstream,
+    UsageCache,
+    UsageLatency,
+    RollupState,
+)
+from database.session import get_session
+from monitoring.usage import usage_recorder, bucket_upper_ms
+from config_logging import api_logger
+from settings import settings
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import asyncio
+
+SCAN_ROLLUP = "scans"
+
+SCAN_DIMENSIONS = {
+    "day": UsageScans.day,
+    "user_id": UsageScans.user_id,
+    "engine": UsageScans.engine,
+    "category": UsageScans.category,
+}
+
+# Windows rolled per cycle while catching up on a backlog.
+MAX_WINDOWS_PER_CYCLE = 50
+
+
+def _insert(session):
+    return sqlite.insert if session.get_bind().dialect.name == "sqlite" else postgresql.insert
+
+
+def _upsert_increments(session, model, keys: List[str], counters: List[str], rows: List[dict]):
+    """Insert rows, or add their counters to the existing rows with the same key."""
+    if not rows:
+        return
+    stmt = _insert(session)(model)
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in counters},
+        ),
+        rows,
+    )
+
+
+def _as_date(value) -> date:
+    # func.date() gives a date on Postgres and an ISO string on SQLite.
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def summarize_latency(buckets: Dict[int, int]) -> LatencySummary:
+    count = sum(buckets.values())
+    if not count:
+        return LatencySummary()
+    percentiles = {}
+    seen = 0
+    targets = iter((("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)))
+    name, quantile = next(targets)
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        while name is not None and seen >= quantile * count:
+            percentiles[name] = round(bucket_upper_ms(bucket), 1)
+            name, quantile = next(targets, (None, None))
+    return LatencySummary(count=count, **percentiles)
+
+
+class UsageRollupService:
+    """Daily usage rollups for the admin dashboard.
+
+    Scan counts are folded in from ``scan_history`` one window at a time,
+    from the high-water mark in ``rollup_state`` up to
+    ``USAGE_ROLLUP_SETTLE_SECONDS`` ago (so write-behind rows have landed);
+    the mark is locked with ``SKIP LOCKED`` so one worker rolls each window.
+    Upstream calls, cache lookups and latencies are counted in memory by
+    each worker and flushed as increments. Dashboard reads only touch the
+    rollup tables.
+    """
+
+    # --- maintenance ----------------------------------------------------
+
+    def roll_scans(self) -> bool:
+        """Roll the next window of scans; returns whether a backlog remains."""
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.USAGE_ROLLUP_SETTLE_SECONDS)
+        with get_session() as session:
+            state = self._claim(session, SCAN_ROLLUP, cutoff)
+            if state is None:
+                return False
+            end = min(cutoff, state.watermark + timedelta(hours=settings.USAGE_ROLLUP_MAX_WINDOW_HOURS))
+            if end <= state.watermark:
+                return False
+
+            day = func.date(ScanHistory.timestamp)
+            rows = session.execute(
+                select(day, ScanHistory.user_id, ScanHistory.engine, ScanHistory.search_type, func.count())
+                .where(ScanHistory.timestamp > state.watermark, ScanHistory.timestamp <= end)
+                .group_by(day, ScanHistory.user_id, ScanHistory.engine, ScanHistory.search_type)
+            ).all()
+            _upsert_increments(
+                session,
+                UsageScans,
+                ["day", "user_id", "engine", "category"],
+                ["scans"],
+                [
+                    {
+                        "day": _as_date(row[0]),
+                        "user_id": row[1],
+                        "engine": row[2][:32],
+                        "category": row[3][:32],
+                        "scans": row[4],
+                    }
+                    for row in rows
+                ],
+            )
+            state.watermark = end
+            state.updated_at = now
+        return end < cutoff
+
+    def _claim(self, session, name: str, cutoff: datetime) -> Optional[RollupState]:
+        """Lock the rollup's mark, creating it just before the oldest row on first use."""
+        if session.get(RollupState, name) is None:
+            oldest = session.execute(select(func.min(ScanHistory.timestamp))).scalar()
+            start = oldest - timedelta(microseconds=1) if oldest is not None else cutoff
+            session.execute(
+                _insert(session)(RollupState)
+                .values(name=name, watermark=start, updated_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+        return session.execute(
+            select(RollupState)
+            .where(RollupState.name == name)
+            .with_for_update(skip_locked=True)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+
+    def flush_recorded(self):
+        """Add this worker's in-memory usage counters to the rollup tables."""
+        deltas = usage_recorder.drain()
+        if not (deltas.upstream or deltas.cache or deltas.latency):
+            return
+        try:
+            with get_session() as session:
+                _upsert_increments(
+                    session,
+                    UsageUpstream,
+                    ["day", "upstream", "operation"],
+                    ["calls", "errors", "cost"],
+                    [
+                        {"day": day, "upstream": upstream[:32], "operation": operation[:32],
+                         "calls": calls, "errors": errors, "cost": cost}
+                        for (day, upstream, operation), (calls, errors, cost) in deltas.upstream.items()
+                    ],
+                )
+                _upsert_increments(
+                    session,
+                    UsageCache,
+                    ["day", "cache"],
+                    ["hits", "misses"],
+                    [
+                        {"day": day, "cache": cache[:32], "hits": hits, "misses": misses}
+                        for (day, cache), (hits, misses) in deltas.cache.items()
+                    ],
+                )
+                _upsert_increments(
+                    session,
+                    UsageLatency,
+                    ["day", "kind", "name", "bucket"],
+                    ["count"],
+                    [
+                        {"day": day, "kind": kind, "name": name[:200], "bucket": bucket, "count": count}
+                        for (day, kind, name, bucket), count in deltas.latency.items()
+                    ],
+                )
+        except Exception:
+            usage_recorder.restore(deltas)
+            raise
+
+    def run_cycle(self):
+        self.flush_recorded()
+        for _ in range(MAX_WINDOWS_PER_CYCLE):
+            if not self.roll_scans():
+                break
+
+    # --- dashboard queries ----------------------------------------------
+
+    def scan_usage(self, start: date, end: date, group_by: List[str]) -> ScanUsageResponse:
+        columns = [SCAN_DIMENSIONS[name].label(name) for name in group_by]
+        with get_session() as session:
+            rows = session.execute(
+                select(*columns, func.sum(UsageScans.scans).label("scans"))
+                .where(UsageScans.day >= start, UsageScans.day <= end)
+                .group_by(*columns)
+                .order_by(*columns)
+            ).mappings().all()
+        data = [ScanUsageRow(**row) for row in rows]
+        return ScanUsageResponse(
+            start=start, end=end, group_by=group_by, data=data, total=sum(row.scans for row in data)
+        )
+
+    def upstream_usage(self, start: date, end: date) -> UpstreamUsageResponse:
+        with get_session() as session:
+            rows = session.execute(
+                select(
+                    UsageUpstream.upstream,
+                    UsageUpstream.operation,
+                    func.sum(UsageUpstream.calls),
+                    func.sum(UsageUpstream.errors),
+                    func.sum(UsageUpstream.cost),
+                )
+                .where(UsageUpstream.day >= start, UsageUpstream.day <= end)
+                .group_by(UsageUpstream.upstream, UsageUpstream.operation)
+                .order_by(UsageUpstream.upstream, UsageUpstream.operation)
+            ).all()
+            latency = self._latency(session, "upstream", start, end)
+        data = [
+            UpstreamUsageRow(
+                upstream=upstream,
+                operation=operation,
+                calls=calls,
+                errors=errors,
+                error_rate=round(errors / calls, 4) if calls else 0.0,
+                cost=round(cost, 4),
+                latency=latency.get(f"{upstream}.{operation}", LatencySummary()),
+            )
+            for upstream, operation, calls, errors, cost in rows
+        ]
+        return UpstreamUsageResponse(
+            start=start, end=end, data=data, total_cost=round(sum(row.cost for row in data), 4)
+        )
+
+    def cache_usage(self, start: date, end: date) -> CacheUsageResponse:
+        with get_session() as session:
+            rows = session.execute(
+                select(UsageCache.cache, func.sum(UsageCache.hits), func.sum(UsageCache.misses))
+                .where(UsageCache.day >= start, UsageCache.day <= end)
+                .group_by(UsageCache.cache)
+                .order_by(UsageCache.cache)
+            ).all()
+        return CacheUsageResponse(
+            start=start,
+            end=end,
+            data=[
+                CacheUsageRow(
+                    cache=cache,
+                    hits=hits,
+                    misses=misses,
+                    hit_rate=round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                )
+                for cache, hits, misses in rows
+            ],
+        )
+
+    def route_latency(self, start: date, end: date) -> RouteLatencyResponse:
+        with get_session() as session:
+            latency = self._latency(session, "http", start, end)
+        return RouteLatencyResponse(
+            start=start,
+            end=end,
+            data=[RouteLatencyRow(route=route, latency=summary) for route, summary in sorted(latency.items())],
+        )
+
+    def _latency(self, session, kind: str, start: date, end: date) -> Dict[str, LatencySummary]:
+        buckets: Dict[str, Dict[int, int]] = {}
+        for name, bucket, count in session.execute(
+            select(UsageLatency.name, UsageLatency.bucket, func.sum(UsageLatency.count))
+            .where(UsageLatency.day >= start, UsageLatency.day <= end, UsageLatency.kind == kind)
+            .group_by(UsageLatency.name, UsageLatency.bucket)
+        ):
+            buckets.setdefault(name, {})[bucket] = count
+        return {name: summarize_latency(counts) for name, counts in buckets.items()}
+
+
+class UsageRollupScheduler:
+    """In-process loop that keeps the usage rollups current, off the event loop."""
+
+    def __init__(self, service: Optional[UsageRollupService] = None):
+        self.service = service or UsageRollupService()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await asyncio.to_thread(self.service.flush_recorded)
+            except Exception as e:
+                api_logger.error(f"Usage rollup final flush failed: {str(e)}", exc_info=True)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(settings.USAGE_ROLLUP_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self.service.run_cycle)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                api_logger.error(f"Usage rollup error: {str(e)}", exc_info=True)
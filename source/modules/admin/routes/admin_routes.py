@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import PlainTextResponse
+from auth.config import get_current_admin_user
+from database.models.db_models import User
+from modules.admin.domain.usage_rollups import UsageRollupService
+from modules.admin.schemas import (
+    ScanUsageResponse,
+    UpstreamUsageResponse,
+    CacheUsageResponse,
+    RouteLatencyResponse,
+)
+from monitoring.profiling import load_profile
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Optional, Tuple
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+DEFAULT_USAGE_DAYS = 30
+
+
+def usage_period(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+) -> Tuple[date, date]:
+    """Inclusive UTC day range; defaults to the last 30 days."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_USAGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    return start, end
+
+
+@router.get("/profiles/{profile_id}")
+def get_request_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|folded)$"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Return a stored request profile as JSON or as collapsed stacks."""
+    profile = load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    if format == "folded":
+        return PlainTextResponse(profile["folded"])
+    return profile
+
+
+@router.get("/usage/scans", response_model=ScanUsageResponse)
+def get_scan_usage(
+    group_by: List[Literal["day", "user_id", "engine", "category"]] = Query(["day"]),
+    period: Tuple[date, date] = Depends(usage_period),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Scans per day, user, engine and/or category, from the daily rollup."""
+    return UsageRollupService().scan_usage(*period, list(dict.fromkeys(group_by)))
+
+
+@router.get("/usage/upstream", response_model=UpstreamUsageResponse)
+def get_upstream_usage(
+    period: Tuple[date, date] = Depends(usage_period),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Upstream calls, error rates, estimated spend and latency percentiles."""
+    return UsageRollupService().upstream_usage(*period)
+
+
+@router.get("/usage/caches", response_model=CacheUsageResponse)
+def get_cache_usage(
+    period: Tuple[date, date] = Depends(usage_period),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Hit rates of the SERP, DNS, CT and username caches."""
+    return UsageRollupService().cache_usage(*period)
+
+
+@router.get("/usage/routes", response_model=RouteLatencyResponse)
+def get_route_latency(
+    period: Tuple[date, date] = Depends(usage_period),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Latency percentiles per API route."""
+    return UsageRollupService().route_latency(*period)
@@ -0,0 +1,11 @@
+from .usage_response import (
+    ScanUsageRow,
+    ScanUsageResponse,
+    LatencySummary,
+    UpstreamUsageRow,
+    UpstreamUsageResponse,
+    CacheUsageRow,
+    CacheUsageResponse,
+    RouteLatencyRow,
+    RouteLatencyResponse,
+)
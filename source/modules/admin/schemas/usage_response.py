@@ -0,0 +1,72 @@
+from pydantic import BaseModel, Field
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+
+
+class ScanUsageRow(BaseModel):
+    """Scan count for one combination of the requested ``group_by`` fields."""
+
+    day: Optional[date] = None
+    user_id: Optional[UUID] = None
+    engine: Optional[str] = None
+    category: Optional[str] = None
+    scans: int
+
+
+class ScanUsageResponse(BaseModel):
+    start: date
+    end: date
+    group_by: List[str]
+    data: List[ScanUsageRow] = Field(default_factory=list)
+    total: int = Field(default=0)
+
+
+class LatencySummary(BaseModel):
+    """Percentiles are the upper bound of the histogram bucket they fall in."""
+
+    count: int = 0
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+
+
+class UpstreamUsageRow(BaseModel):
+    upstream: str
+    operation: str
+    calls: int
+    errors: int
+    error_rate: float
+    cost: float
+    latency: LatencySummary
+
+
+class UpstreamUsageResponse(BaseModel):
+    start: date
+    end: date
+    data: List[UpstreamUsageRow] = Field(default_factory=list)
+    total_cost: float = 0.0
+
+
+class CacheUsageRow(BaseModel):
+    cache: str
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class CacheUsageResponse(BaseModel):
+    start: date
+    end: date
+    data: List[CacheUsageRow] = Field(default_factory=list)
+
+
+class RouteLatencyRow(BaseModel):
+    route: str
+    latency: LatencySummary
+
+
+class RouteLatencyResponse(BaseModel):
+    start: date
+    end: date
+    data: List[RouteLatencyRow] = Field(default_factory=list)
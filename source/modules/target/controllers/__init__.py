@@ -1 +1,19 @@
-from .get_target import get_target_text_data, send_target_image, get_target_image_data
+from .get_target import (
+    get_target_text_data,
+    get_target_text_batch,
+    search_target_username,
+    create_watchlist_entry,
+    list_watchlist_entries,
+    delete_watchlist_entry,
+    get_watchlist_changes,
+    search_target_results,
+    export_scan_results,
+    replay_archived_scans,
+    send_target_image,
+    find_similar_images,
+    get_target_image_data,
+    get_target_image_fingerprint,
+    send_target_image_batch,
+    get_target_image_batch_data,
+    get_graph_neighborhood,
+)
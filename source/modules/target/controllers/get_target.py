@@ -1,28 +1,176 @@
 from modules.target.schemas import (
     TargetTextSearchSchema,
+    TargetUsernameSearchSchema,
+    TargetReplaySchema,
+    CreateWatchlistSchema,
+    WatchlistResponse,
+    ListWatchlistResponse,
+    ListWatchlistChangesResponse,
+    ListTargetResultSearchResponse,
     ListTargetsResponse,
     TargetImageSearchSchema,
     ListTargetsImageResponse,
     TargetSendImageSchemaResponse,
+    ListSimilarImagesResponse,
+    TargetImageBatchSearchSchema,
+    TargetImageBatchSendResponse,
+    TargetImageBatchResponse,
+    GraphResponse,
 )
 from modules.target.domain.target_search import (
     TargetSearchService,
     TargetImageService,
 )
+from modules.target.domain.target_batch import TargetBatchService
+from modules.target.domain.target_domain_recon import DomainReconService
+from modules.target.domain.target_entities import text_result_entities, face_match_entities
+from modules.target.domain.target_image_similarity import ImageSimilarityService
+from modules.target.domain.target_image_batch import TargetImageBatchService
+from modules.target.domain.target_watchlist import WatchlistService
+from modules.target.domain.target_results_search import ResultSearchService
+from modules.target.domain.target_export import ScanExportService
+from modules.target.domain.target_replay import TargetReplayService
+from modules.target.domain.target_graph import GraphService, parse_node
+from modules.target.domain.target_usernames import TargetUsernameService
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from uuid import UUID
 
 
 def get_target_text_data(request: TargetTextSearchSchema, user_id: UUID) -> ListTargetsResponse:
     service = TargetSearchService()
-    results = service.text_search(request, user_id)
-    return ListTargetsResponse(data=results, total=len(results))
+    recon_service = DomainReconService(search_service=service)
+    recon = recon_service.start(request)
+    results, plan = service.text_search(request, user_id)
+    return ListTargetsResponse(
+        data=results,
+        total=len(results),
+        entities=text_result_entities(results, request.country),
+        domain_recon=recon_service.result(recon),
+        plan=plan,
+    )
 
 
-def send_target_image(target_image: str, user_id: UUID) -> TargetSendImageSchemaResponse:
+def get_target_text_batch(
+    targets: List[TargetTextSearchSchema], user_id: UUID
+) -> Iterator[str]:
+    service = TargetBatchService()
+    return service.run(targets, user_id)
+
+
+def search_target_username(
+    request: TargetUsernameSearchSchema, user_id: UUID
+) -> AsyncIterator[str]:
+    """Raises ``ValueError`` before streaming when the site filters match nothing."""
+    service = TargetUsernameService()
+    sites = service.select_sites(request)
+    return service.run(request, sites, user_id)
+
+
+def create_watchlist_entry(request: CreateWatchlistSchema, user_id: UUID) -> WatchlistResponse:
+    service = WatchlistService()
+    return WatchlistResponse.model_validate(service.create(request, user_id))
+
+
+def list_watchlist_entries(user_id: UUID) -> ListWatchlistResponse:
+    service = WatchlistService()
+    entries = [WatchlistResponse.model_validate(e) for e in service.list(user_id)]
+    return ListWatchlistResponse(data=entries, total=len(entries))
+
+
+def delete_watchlist_entry(watch_id: UUID, user_id: UUID) -> bool:
+    service = WatchlistService()
+    return service.delete(watch_id, user_id)
+
+
+def get_watchlist_changes(
+    watch_id: UUID, user_id: UUID, limit: int
+) -> Optional[ListWatchlistChangesResponse]:
+    service = WatchlistService()
+    runs = service.changes(watch_id, user_id, limit)
+    if runs is None:
+        return None
+    return ListWatchlistChangesResponse(data=runs, total=len(runs))
+
+
+def search_target_results(
+    query: str,
+    user_id: Optional[UUID],
+    scan_id: Optional[UUID],
+    category: Optional[str],
+    limit: int,
+    offset: int,
+) -> ListTargetResultSearchResponse:
+    service = ResultSearchService()
+    results, total = service.search(query, user_id, scan_id, category, limit, offset)
+    return ListTargetResultSearchResponse(query=query, data=results, total=total)
+
+
+def export_scan_results(
+    format: str,
+    user_id: Optional[UUID],
+    scan_id: Optional[UUID],
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> Iterator[bytes]:
+    service = ScanExportService()
+    return service.stream(format, user_id, scan_id, since, until)
+
+
+def replay_archived_scans(request: TargetReplaySchema, user_id: Optional[UUID]) -> Iterator[bytes]:
+    service = TargetReplayService()
+    return service.stream(request, user_id)
+
+
+def send_target_image(
+    target_image: bytes, user_id: UUID, reuse_similar: bool = False
+) -> TargetSendImageSchemaResponse:
     service = TargetImageService()
-    return service.send_image(target_image, user_id)
+    return service.send_image(target_image, user_id, reuse_similar=reuse_similar)
+
+
+def find_similar_images(
+    target_image: bytes, user_id: Optional[UUID], max_distance: int, with_results: bool
+) -> ListSimilarImagesResponse:
+    service = ImageSimilarityService()
+    return service.similar(target_image, user_id, max_distance, with_results)
 
 
 def get_target_image_data(request: TargetImageSearchSchema, user_id: UUID) -> ListTargetsImageResponse:
     service = TargetImageService()
-    return service.check_image_search(request, user_id)
+    response = service.check_image_search(request, user_id)
+    response.entities = face_match_entities(response.data)
+    return response
+
+
+def get_target_image_fingerprint(request: TargetImageSearchSchema, user_id: UUID) -> Optional[tuple]:
+    service = TargetImageService()
+    return service.stored_fingerprint(request, user_id)
+
+
+def send_target_image_batch(
+    images: List[Tuple[str, bytes]], user_id: UUID
+) -> TargetImageBatchSendResponse:
+    service = TargetImageBatchService()
+    return service.send(images, user_id)
+
+
+def get_target_image_batch_data(
+    request: TargetImageBatchSearchSchema, user_id: UUID
+) -> Optional[TargetImageBatchResponse]:
+    service = TargetImageBatchService()
+    response = service.check(request.group_id, user_id, demo=request.demo)
+    if response is not None:
+        response.entities = face_match_entities(response.data)
+    return response
+
+
+def get_graph_neighborhood(
+    node: str, depth: int, user_id: Optional[UUID], provenance: bool
+) -> Optional[GraphResponse]:
+    """``None`` when the node does not exist; raises ``ValueError`` on a malformed node."""
+    ref = parse_node(node)
+    if ref is None:
+        raise ValueError("Node must be '<kind>:<key>'")
+    service = GraphService()
+    return service.neighborhood(ref, depth, user_id, provenance=provenance)
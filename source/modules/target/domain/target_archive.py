@@ -0,0 +1,184 @@
+from database.models.db_models import ResponseBlob, CompressionDict
+from database.session import get_session
+from services.archive.zstd_codec import (
+    ZstdCodec,
+    MissingDictionary,
+    content_key,
+    train_dictionary,
+)
+from config_logging import api_logger
+from settings import settings
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Dict, Iterable, List, Optional, Sequence
+from datetime import datetime
+import threading
+import time
+import uuid
+
+
+def _insert(session):
+    return sqlite.insert if session.get_bind().dialect.name == "sqlite" else postgresql.insert
+
+
+class ResponseArchive:
+    """Content-addressed archive of raw upstream bodies in ``response_blob``.
+
+    Bodies are keyed by their SHA-256, so repeats (a cached SERP page, a
+    re-polled search) are stored once. Kinds in ``ARCHIVE_DICT_KINDS`` are
+    compressed against a zstd dictionary trained on their own bodies: until
+    one exists, the first ``ARCHIVE_DICT_MIN_SAMPLES`` bodies are kept in
+    memory and a dictionary is trained from them on a background thread.
+    Dictionaries live in ``compression_dict`` and are never replaced, only
+    superseded, so every stored frame stays readable.
+
+    Archiving never fails the request that produced the body.
+    """
+
+    def __init__(self):
+        self.codec = ZstdCodec(settings.ARCHIVE_ZSTD_LEVEL)
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+        self._samples: Dict[str, List[bytes]] = {}
+        self._training: set = set()
+        self._checked: Dict[str, float] = {}
+
+    def put(self, kind: str, raw: bytes) -> Optional[str]:
+        """Store ``raw`` and return its key, or ``None`` when archiving is off or failed."""
+        if not settings.ARCHIVE_ENABLED or not raw:
+            return None
+        try:
+            key = content_key(raw)
+            dict_id = self._dictionary_for(kind)
+            data = self.codec.compress(raw, dict_id)
+            with get_session() as session:
+                session.execute(
+                    _insert(session)(ResponseBlob)
+                    .values(blob_key=key, kind=kind, dict_id=dict_id or 0, raw_size=len(raw), data=data)
+                    # A body archived again is in use again: retention only
+                    # collects unreferenced blobs older than its window.
+                    .on_conflict_do_update(index_elements=["blob_key"], set_={"created_at": datetime.utcnow()})
+                )
+            if not dict_id:
+                self._collect(kind, raw)
+            return key
+        except Exception as e:
+            api_logger.error(f"Archiving {kind} response failed: {str(e)}", exc_info=True)
+            return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        with get_session() as session:
+            data = session.execute(
+                select(ResponseBlob.data).where(ResponseBlob.blob_key == key)
+            ).scalar_one_or_none()
+        return None if data is None else self.decompress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        try:
+            return self.codec.decompress(data)
+        except MissingDictionary as e:
+            self.dictionaries([e.args[0]])
+            return self.codec.decompress(data)
+
+    def dictionaries(self, dict_ids: Iterable[int]) -> Dict[int, bytes]:
+        """Dictionary bytes by ID (loading unknown ones into this codec), for replay workers."""
+        dict_ids = sorted({dict_id for dict_id in dict_ids if dict_id})
+        if not dict_ids:
+            return {}
+        with get_session() as session:
+            rows = session.execute(
+                select(CompressionDict.dict_id, CompressionDict.data)
+                .where(CompressionDict.dict_id.in_(dict_ids))
+            ).all()
+        for _, data in rows:
+            self.codec.add_dictionary(data)
+        return {dict_id: data for dict_id, data in rows}
+
+    def train(self, kind: str, samples: List[bytes]) -> int:
+        """Train, store and activate a dictionary for ``kind``; returns its ID."""
+        data = train_dictionary(samples, settings.ARCHIVE_DICT_SIZE)
+        dict_id = self.codec.add_dictionary(data)
+        with get_session() as session:
+            session.execute(
+                _insert(session)(CompressionDict)
+                .values(dict_id=dict_id, kind=kind, data=data)
+                .on_conflict_do_nothing(index_elements=["dict_id"])
+            )
+        with self._lock:
+            self._active[kind] = dict_id
+        return dict_id
+
+    def _dictionary_for(self, kind: str) -> int:
+        if kind not in settings.ARCHIVE_DICT_KINDS:
+            return 0
+        dict_id = self._active.get(kind)
+        if dict_id:
+            return dict_id
+        checked = self._checked.get(kind)
+        if checked is not None and time.monotonic() - checked < settings.ARCHIVE_DICT_RECHECK_SECONDS:
+            return 0
+        # Adopt the newest dictionary any worker has trained; a miss is
+        # only remembered for ARCHIVE_DICT_RECHECK_SECONDS.
+        dict_id = self._adopt(kind)
+        if not dict_id:
+            with self._lock:
+                self._checked[kind] = time.monotonic()
+        return dict_id
+
+    def _adopt(self, kind: str) -> int:
+        """Activate the newest stored dictionary for ``kind``; 0 when there is none."""
+        with get_session() as session:
+            row = session.execute(
+                select(CompressionDict.dict_id, CompressionDict.data)
+                .where(CompressionDict.kind == kind)
+                .order_by(CompressionDict.created_at.desc())
+                .limit(1)
+            ).first()
+        if row is None:
+            return 0
+        dict_id = self.codec.add_dictionary(row.data)
+        with self._lock:
+            return self._active.setdefault(kind, dict_id)
+
+    def _collect(self, kind: str, raw: bytes):
+        if kind not in settings.ARCHIVE_DICT_KINDS:
+            return
+        with self._lock:
+            if self._active.get(kind) or kind in self._training:
+                return
+            samples = self._samples.setdefault(kind, [])
+            samples.append(raw)
+            if len(samples) < settings.ARCHIVE_DICT_MIN_SAMPLES:
+                return
+            self._training.add(kind)
+            del self._samples[kind]
+        threading.Thread(
+            target=self._train_in_background, args=(kind, samples), name=f"zstd-dict-{kind}", daemon=True
+        ).start()
+
+    def _train_in_background(self, kind: str, samples: List[bytes]):
+        try:
+            if self._adopt(kind):
+                # Another worker got there first.
+                return
+            dict_id = self.train(kind, samples)
+            api_logger.info(f"Trained zstd dictionary {dict_id} for {kind} from {len(samples)} samples")
+        except Exception as e:
+            api_logger.error(f"Training zstd dictionary for {kind} failed: {str(e)}", exc_info=True)
+        finally:
+            with self._lock:
+                self._training.discard(kind)
+
+
+def scan_responses(scan_id: uuid.UUID, keys: Sequence[str]) -> List[dict]:
+    """``scan_response`` rows for a scan archived as ``keys``; none for a single body,
+    which ``scan_history.raw_response_key`` already references."""
+    if len(keys) < 2:
+        return []
+    return [
+        {"scan_id": scan_id, "position": position, "blob_key": key}
+        for position, key in enumerate(keys)
+    ]
+
+
+response_archive = ResponseArchive()
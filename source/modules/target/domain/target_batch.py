@@ -0,0 +1,190 @@
+from modules.target.schemas import (
+    TargetTextSearchSchema,
+    TargetBatchItemResponse,
+    TargetBatchSummaryResponse,
+    CreateScanSchema,
+)
+from modules.target.domain.target_search import TargetSearchService
+from modules.target.domain.target_entities import text_result_entities
+from database.repository import BaseRepository
+from database.models.db_models import ScanHistory
+from database.session import get_session
+from database.partitions import within_retention
+from config_logging import api_logger
+from settings import settings
+from sqlalchemy import select
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pydantic import ValidationError
+from typing import Dict, Iterator, List, Tuple
+from uuid import UUID
+import csv
+import io
+import re
+import threading
+
+_batch_executor = ThreadPoolExecutor(
+    max_workers=settings.BATCH_MAX_WORKERS, thread_name_prefix="batch-search"
+)
+# Per-user slot semaphore and how many running batches and in-flight items
+# hold it; dropped when the last one lets go.
+_user_slots: Dict[UUID, Tuple[threading.BoundedSemaphore, int]] = {}
+_user_slots_lock = threading.Lock()
+
+
+def _hold_slots(user_id: UUID) -> threading.BoundedSemaphore:
+    with _user_slots_lock:
+        slots, holders = _user_slots.get(user_id) or (
+            threading.BoundedSemaphore(settings.BATCH_PER_USER_CONCURRENCY), 0
+        )
+        _user_slots[user_id] = (slots, holders + 1)
+        return slots
+
+
+def _let_go_slots(user_id: UUID):
+    with _user_slots_lock:
+        slots, holders = _user_slots[user_id]
+        if holders > 1:
+            _user_slots[user_id] = (slots, holders - 1)
+        else:
+            del _user_slots[user_id]
+
+
+def parse_targets_csv(content: bytes) -> List[TargetTextSearchSchema]:
+    """Parse a case-file CSV export into search targets.
+
+    Expected columns: ``name``, ``type`` and ``categories`` (separated by
+    ``;`` or ``|``), plus optional ``country`` and ``search_engine``.
+    Raises ``ValueError`` listing every invalid row.
+    """
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    targets, errors = [], []
+    for row_number, row in enumerate(reader, start=2):
+        fields = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+        data = {
+            "name": fields.get("name"),
+            "type": fields.get("type") or "person",
+            "categories": [c.strip() for c in re.split(r"[;|]", fields.get("categories", "")) if c.strip()],
+        }
+        for optional in ("country", "search_engine"):
+            if fields.get(optional):
+                data[optional] = fields[optional]
+        try:
+            targets.append(TargetTextSearchSchema(**data))
+        except ValidationError as e:
+            errors.append(f"row {row_number}: {e.errors()[0]['msg']}")
+    if errors:
+        raise ValueError("; ".join(errors[:20]))
+    if not targets:
+        raise ValueError("CSV file has no targets")
+    return targets
+
+
+class TargetBatchService:
+    """Runs many text searches for one user and yields results as they finish.
+
+    All batches share one worker pool. Each user may only hold
+    ``BATCH_PER_USER_CONCURRENCY`` slots in it at a time (across all of their
+    batches), so a user submitting hundreds of targets cannot starve others.
+    Items share the SerpAPI result cache, so repeated targets are fetched once.
+    """
+
+    def __init__(self):
+        self.search_service = TargetSearchService()
+
+    def run(self, targets: List[TargetTextSearchSchema], user_id: UUID) -> Iterator[str]:
+        batch_scan_id = self._create_batch_scan(targets, user_id)
+        pending = {}
+        next_index = 0
+        completed = failed = total_results = 0
+
+        def release(_):
+            # Items can outlive the batch (cancelled late, or still running).
+            slots.release()
+            _let_go_slots(user_id)
+
+        slots = _hold_slots(user_id)
+        try:
+            while next_index < len(targets) or pending:
+                while next_index < len(targets) and slots.acquire(blocking=not pending):
+                    _hold_slots(user_id)
+                    future = _batch_executor.submit(
+                        self._search_one, targets[next_index], user_id, batch_scan_id
+                    )
+                    future.add_done_callback(release)
+                    pending[future] = next_index
+                    next_index += 1
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    target = targets[index]
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        api_logger.error(f"Batch item {index} failed: {str(e)}", exc_info=True)
+                        failed += 1
+                        item = TargetBatchItemResponse(
+                            index=index, name=target.name, status="error",
+                            message="Search failed.",
+                        )
+                    else:
+                        completed += 1
+                        total_results += len(results)
+                        item = TargetBatchItemResponse(
+                            index=index, name=target.name, status="success",
+                            data=results, total=len(results),
+                            entities=text_result_entities(results, target.country),
+                        )
+                    yield item.model_dump_json() + "\n"
+        finally:
+            for future in pending:
+                future.cancel()
+            _let_go_slots(user_id)
+            status = "COMPLETED" if completed + failed == len(targets) else "PARTIAL"
+            self._finish_batch_scan(batch_scan_id, status, completed, failed, total_results)
+
+        yield TargetBatchSummaryResponse(
+            scan_id=str(batch_scan_id),
+            status=status,
+            targets=len(targets),
+            completed=completed,
+            failed=failed,
+            results=total_results,
+        ).model_dump_json() + "\n"
+
+    def _search_one(self, target: TargetTextSearchSchema, user_id: UUID, batch_scan_id: UUID):
+        results, _ = self.search_service.text_search(target, user_id, parent_scan_id=batch_scan_id)
+        return results
+
+    def _create_batch_scan(self, targets: List[TargetTextSearchSchema], user_id: UUID) -> UUID:
+        with get_session() as session:
+            scan_repo = BaseRepository[ScanHistory, CreateScanSchema, None](ScanHistory)
+            scan = scan_repo.create(
+                session=session,
+                obj_in=CreateScanSchema(
+                    user_id=user_id,
+                    query=f"batch of {len(targets)} targets",
+                    engine=",".join(sorted({t.search_engine.value for t in targets})),
+                    search_type="batch",
+                    status="STARTED",
+                    image_metadata={"targets": len(targets)},
+                ),
+            )
+            return scan.scan_id
+
+    def _finish_batch_scan(
+        self, scan_id: UUID, status: str, completed: int, failed: int, results: int
+    ):
+        with get_session() as session:
+            scan = session.execute(
+                select(ScanHistory).where(
+                    ScanHistory.scan_id == scan_id, within_retention(ScanHistory.timestamp)
+                )
+            ).scalar_one()
+            scan.status = status
+            scan.image_metadata = {
+                **(scan.image_metadata or {}),
+                "completed": completed,
+                "failed": failed,
+                "results": results,
+            }
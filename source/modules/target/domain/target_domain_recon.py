@@ -0,0 +1,180 @@
+from modules.target.schemas import (
+    TargetTextSearchSchema,
+    SubdomainResponse,
+    DomainReconResponse,
+)
+from modules.target.domain.target_search import TargetSearchService
+from services.domainrecon.dns_resolver import CachingResolver
+from services.domainrecon.ct_sources import (
+    CertificateTransparencySource,
+    get_ct_source,
+    subdomains_of,
+)
+from services.dorkgen.dork_generator import build_subdomain_dork
+from enums.target_type import TargetType
+from config_logging import api_logger
+from settings import settings
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Coroutine, Dict, Optional, Set
+from urllib.parse import urlsplit
+import asyncio
+import threading
+import time
+
+
+class _ReconLoop:
+    """Event loop on a daemon thread, shared by every recon pipeline.
+
+    Text searches run on worker threads; they hand their recon coroutine to
+    this loop and keep going, so the DNS cache, CT cache and HTTP pools
+    outlive individual requests.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.resolver: Optional[CachingResolver] = None
+        self.ct_source: Optional[CertificateTransparencySource] = None
+
+    def submit(self, coro: Coroutine) -> Future:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="domain-recon", daemon=True
+                ).start()
+                self.resolver = CachingResolver(
+                    nameservers=settings.DOMAIN_DNS_NAMESERVERS,
+                    port=settings.DOMAIN_DNS_PORT,
+                    timeout=settings.DOMAIN_DNS_TIMEOUT_SECONDS,
+                    min_ttl=settings.DOMAIN_DNS_MIN_TTL_SECONDS,
+                    max_ttl=settings.DOMAIN_DNS_MAX_TTL_SECONDS,
+                    negative_ttl=settings.DOMAIN_DNS_NEGATIVE_TTL_SECONDS,
+                )
+                self.ct_source = get_ct_source(settings.DOMAIN_CT_SOURCE)
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def stop(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self.ct_source is not None:
+            asyncio.run_coroutine_threadsafe(self.ct_source.aclose(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+_recon_loop = _ReconLoop()
+
+
+def shutdown_domain_recon():
+    """Close the CT client and stop the recon loop; called on application shutdown."""
+    _recon_loop.stop()
+
+
+class DomainReconService:
+    """DNS and subdomain reconnaissance for ``COMPANY`` targets with a ``domain``.
+
+    The pipeline runs on a shared event loop alongside the text search:
+    the apex records, certificate-transparency names and a SERP ``site:``
+    dork are fetched concurrently, and every discovered subdomain is
+    resolved as soon as its source reports it, with at most
+    ``DOMAIN_DNS_CONCURRENCY`` lookups in flight. Whatever has finished by
+    ``DOMAIN_RECON_TIMEOUT_SECONDS`` is returned, with ``complete`` false.
+
+    ``resolver`` and ``ct_source`` replace the configured ones, e.g. with
+    local stand-ins.
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[CachingResolver] = None,
+        ct_source: Optional[CertificateTransparencySource] = None,
+        search_service: Optional[TargetSearchService] = None,
+    ):
+        self._resolver = resolver
+        self._ct_source = ct_source
+        self.search_service = search_service or TargetSearchService()
+
+    def start(self, request: TargetTextSearchSchema) -> Optional[Future]:
+        """Start recon in the background when the request asks for it."""
+        if request.type != TargetType.COMPANY or not request.domain:
+            return None
+        return _recon_loop.submit(self.run(request))
+
+    def result(self, future: Optional[Future]) -> Optional[DomainReconResponse]:
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=settings.DOMAIN_RECON_TIMEOUT_SECONDS + 1)
+        except FutureTimeout:
+            future.cancel()
+        except Exception as e:
+            api_logger.error(f"Domain recon failed: {str(e)}", exc_info=True)
+        return None
+
+    async def run(self, request: TargetTextSearchSchema) -> DomainReconResponse:
+        domain = request.domain["name"]
+        resolver = self._resolver or _recon_loop.resolver
+        ct_source = self._ct_source if self._ct_source is not None else _recon_loop.ct_source
+        start = time.perf_counter()
+        deadline = time.monotonic() + settings.DOMAIN_RECON_TIMEOUT_SECONDS
+
+        response = DomainReconResponse(domain=domain)
+        found: Dict[str, SubdomainResponse] = {}
+        lookups = asyncio.Semaphore(settings.DOMAIN_DNS_CONCURRENCY)
+        tasks: Set[asyncio.Task] = set()
+
+        async def records():
+            response.records = await resolver.resolve_many(domain, settings.DOMAIN_RECORD_TYPES)
+
+        async def addresses(subdomain: SubdomainResponse):
+            async with lookups:
+                resolved = await resolver.resolve_many(subdomain.name, ("A", "AAAA"))
+            subdomain.addresses = resolved.get("A", []) + resolved.get("AAAA", [])
+
+        async def discover(source: str, lookup: Coroutine):
+            try:
+                names = await lookup
+            except Exception as e:
+                response.errors[source] = f"{type(e).__name__}: {str(e)}"[:200]
+                return
+            for name in sorted(names):
+                subdomain = found.get(name)
+                if subdomain is None:
+                    if len(found) >= settings.DOMAIN_MAX_SUBDOMAINS:
+                        response.errors.setdefault("subdomains", "limit reached")
+                        continue
+                    subdomain = found[name] = SubdomainResponse(name=name)
+                    tasks.add(asyncio.create_task(addresses(subdomain)))
+                subdomain.sources.append(source)
+
+        tasks.add(asyncio.create_task(records()))
+        tasks.add(asyncio.create_task(discover("serp", asyncio.to_thread(self._serp_subdomains, request))))
+        if ct_source is not None:
+            tasks.add(asyncio.create_task(discover(ct_source.name, ct_source.subdomains(domain))))
+
+        # Resolution tasks are added while sources report, so wait in rounds.
+        pending = set(tasks)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            pending |= {task for task in tasks if not task.done()}
+        for task in pending:
+            task.cancel()
+        response.complete = not pending
+
+        response.subdomains = sorted(found.values(), key=lambda subdomain: subdomain.name)
+        response.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        return response
+
+    def _serp_subdomains(self, request: TargetTextSearchSchema) -> Set[str]:
+        domain = request.domain["name"]
+        results = self.search_service.fetch_organic_results(build_subdomain_dork(domain), request)
+        return subdomains_of(
+            domain, (urlsplit(item.get("link") or "").hostname or "" for item in results or [])
+        )
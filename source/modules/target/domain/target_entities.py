@@ -0,0 +1,44 @@
+from modules.target.schemas import ContactEntityResponse, TargetTextSchemaResponse
+from services.entities.contact_extractor import extract_contacts
+from enums.country_type import ContryEnum
+from typing import List, Optional
+
+FACE_MATCH_TEXT_FIELDS = ("url", "title", "snippet")
+
+
+def text_result_entities(
+    results: List[TargetTextSchemaResponse], country: Optional[ContryEnum] = None
+) -> List[ContactEntityResponse]:
+    """Contacts in the title, snippet and link of each SERP result.
+
+    National phone numbers are resolved with the search's ``country``.
+    """
+    texts = [f"{r.title} {r.snippet} {r.link}" for r in results]
+    return [
+        ContactEntityResponse(
+            type=entity.type,
+            value=entity.value,
+            platform=entity.platform,
+            source_index=entity.source,
+            source_link=results[entity.source].link or None,
+        )
+        for entity in extract_contacts(texts, country)
+    ]
+
+
+def face_match_entities(items: List[dict]) -> List[ContactEntityResponse]:
+    """Contacts in the URL and text of FaceCrawler matches (international phones only)."""
+    texts = [
+        " ".join(str(item.get(field) or "") for field in FACE_MATCH_TEXT_FIELDS)
+        for item in items
+    ]
+    return [
+        ContactEntityResponse(
+            type=entity.type,
+            value=entity.value,
+            platform=entity.platform,
+            source_index=entity.source,
+            source_link=items[entity.source].get("url"),
+        )
+        for entity in extract_contacts(texts)
+    ]
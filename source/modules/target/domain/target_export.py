@@ -0,0 +1,171 @@
+from database.models.db_models import ScanHistory, TargetResult
+from database.base import SessionLocal
+from settings import settings
+from sqlalchemy import select
+from datetime import datetime
+from typing import Iterator, List, Optional
+from uuid import UUID
+import csv
+import io
+import json
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_COLUMNS = [
+    ("scan_id", ScanHistory.scan_id),
+    ("timestamp", ScanHistory.timestamp),
+    ("search_type", ScanHistory.search_type),
+    ("engine", ScanHistory.engine),
+    ("query", ScanHistory.query),
+    ("result_id", TargetResult.result_id),
+    ("title", TargetResult.title),
+    ("link", TargetResult.link),
+    ("snippet", TargetResult.snippet),
+    ("image_url", TargetResult.image_url),
+    ("source_type", TargetResult.source_type),
+    ("score", TargetResult.score),
+]
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+
+def _plain(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every row group."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ScanExportService:
+    """Streams scan results without materializing the result set.
+
+    Rows are read through a server-side cursor (``yield_per``) in batches of
+    ``EXPORT_BATCH_SIZE`` and each batch is encoded and yielded before the
+    next one is fetched, so memory use does not grow with the export size.
+    """
+
+    def stream(
+        self,
+        format: str,
+        user_id: Optional[UUID],
+        scan_id: Optional[UUID] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[bytes]:
+        stmt = (
+            select(*(col for _, col in EXPORT_COLUMNS))
+            .join(
+                ScanHistory,
+                (ScanHistory.scan_id == TargetResult.scan_id)
+                & (ScanHistory.timestamp == TargetResult.scan_timestamp),
+            )
+            .order_by(ScanHistory.timestamp, TargetResult.result_id)
+        )
+        if user_id is not None:
+            stmt = stmt.where(ScanHistory.user_id == user_id)
+        if scan_id is not None:
+            stmt = stmt.where(ScanHistory.scan_id == scan_id)
+        # Bounds on both partition keys, so each side only reads the months asked for.
+        if since is not None:
+            stmt = stmt.where(ScanHistory.timestamp >= since, TargetResult.scan_timestamp >= since)
+        if until is not None:
+            stmt = stmt.where(ScanHistory.timestamp < until, TargetResult.scan_timestamp < until)
+
+        encoder = {
+            "csv": self._encode_csv,
+            "ndjson": self._encode_ndjson,
+            "parquet": self._encode_parquet,
+        }[format]
+
+        session = SessionLocal()
+        try:
+            result = session.execute(
+                stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+            )
+            yield from encoder(result.partitions())
+        finally:
+            session.close()
+
+    def _encode_csv(self, batches) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMN_NAMES)
+        for rows in batches:
+            writer.writerows([_plain(v) for v in row] for row in rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def _encode_ndjson(self, batches) -> Iterator[bytes]:
+        for rows in batches:
+            yield "".join(
+                json.dumps(dict(zip(COLUMN_NAMES, map(_plain, row))), ensure_ascii=False) + "\n"
+                for row in rows
+            ).encode("utf-8")
+
+    def _encode_parquet(self, batches) -> Iterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ("scan_id", pa.string()),
+            ("timestamp", pa.timestamp("us")),
+            ("search_type", pa.string()),
+            ("engine", pa.string()),
+            ("query", pa.string()),
+            ("result_id", pa.string()),
+            ("title", pa.string()),
+            ("link", pa.string()),
+            ("snippet", pa.string()),
+            ("image_url", pa.string()),
+            ("source_type", pa.string()),
+            ("score", pa.float64()),
+        ])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            for rows in batches:
+                columns = list(zip(*rows))
+                arrays = [
+                    pa.array(
+                        [str(v) if isinstance(v, UUID) else v for v in values],
+                        type=field.type,
+                    )
+                    for values, field in zip(columns, schema)
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
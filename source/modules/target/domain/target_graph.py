@@ -0,0 +1,347 @@
+from modules.target.schemas import (
+    TargetTextSearchSchema,
+    TargetTextSchemaResponse,
+    ContactEntityResponse,
+    GraphNodeResponse,
+    GraphEdgeResponse,
+    GraphResponse,
+)
+from modules.target.domain.target_entities import text_result_entities, face_match_entities
+from database.models.db_models import GraphNode, GraphEdge
+from database.session import get_session
+from config_logging import db_logger
+from settings import settings
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from array import array
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+from uuid import UUID
+import threading
+import time
+
+GRAPH_NODE_KINDS = ("target", "image", "url", "domain", "handle", "email", "phone", "face")
+ID_CHUNK = 500
+
+NodeRef = Tuple[str, str]  # (kind, key)
+
+_graph_indexer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="graph-indexer")
+
+
+def shutdown_graph_indexer():
+    """Wait for queued indexing jobs; called on application shutdown."""
+    _graph_indexer.shutdown(wait=True)
+
+
+def canonical_url(link: Optional[str]) -> Optional[str]:
+    """``host/path?query`` with scheme, ``www.``, fragment and trailing slash dropped."""
+    if not link:
+        return None
+    parts = urlsplit(link.strip() if "://" in link else f"http://{link.strip()}")
+    host = (parts.hostname or "").lower()
+    if not host:
+        return None
+    host = host[4:] if host.startswith("www.") else host
+    url = f"{host}{parts.path.rstrip('/')}"
+    return f"{url}?{parts.query}" if parts.query else url
+
+
+def parse_node(node: str) -> Optional[NodeRef]:
+    """Split a ``kind:key`` path parameter, e.g. ``domain:example.com``."""
+    kind, _, key = node.partition(":")
+    if kind not in GRAPH_NODE_KINDS or not key:
+        return None
+    if kind == "url":
+        return kind, canonical_url(key) or key
+    return kind, key.lower()
+
+
+def _entity_node(entity: ContactEntityResponse) -> NodeRef:
+    return entity.type, entity.value
+
+
+def _url_links(url: Optional[str]) -> List[Tuple[NodeRef, NodeRef]]:
+    if url is None:
+        return []
+    return [(("url", url), ("domain", url.split("/", 1)[0].split("?", 1)[0]))]
+
+
+class _AdjacencyCache:
+    """LRU of adjacency rows for hot nodes, each a compact ``array('q')``.
+
+    Rows are the CSR neighbor lists of the nodes, keyed by ``(scope, node)``
+    where scope is the user (or ``None`` for the admin-wide view). Entries
+    expire after ``ttl`` seconds and are evicted when this process adds
+    edges to the node; other workers see new edges once their copy expires.
+    """
+
+    def __init__(self, max_nodes: int, ttl: float):
+        self.max_nodes = max_nodes
+        self.ttl = ttl
+        self._rows: OrderedDict[tuple, Tuple[float, array]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, scope, node_ids: Iterable[int]) -> Tuple[Dict[int, array], List[int]]:
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for node_id in node_ids:
+                entry = self._rows.get((scope, node_id))
+                if entry is not None and entry[0] > now:
+                    self._rows.move_to_end((scope, node_id))
+                    found[node_id] = entry[1]
+                else:
+                    missing.append(node_id)
+        return found, missing
+
+    def put_many(self, scope, rows: Dict[int, array]):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for node_id, row in rows.items():
+                self._rows[(scope, node_id)] = (expires, row)
+                self._rows.move_to_end((scope, node_id))
+            while len(self._rows) > self.max_nodes:
+                self._rows.popitem(last=False)
+
+    def evict(self, scopes: Iterable, node_ids: Iterable[int]):
+        with self._lock:
+            for scope in scopes:
+                for node_id in node_ids:
+                    self._rows.pop((scope, node_id), None)
+
+
+_adjacency_cache = _AdjacencyCache(
+    max_nodes=settings.GRAPH_CACHE_MAX_NODES, ttl=settings.GRAPH_CACHE_TTL_SECONDS
+)
+
+
+class GraphService:
+    """Cross-scan entity graph, extended incrementally as results are stored.
+
+    Nodes are unique by ``(kind, key)``; each link is stored as two directed
+    ``GraphEdge`` rows tagged with the scan (and its user) that produced it,
+    so adjacency is a single indexed lookup on ``src_id``. Indexing runs on
+    a background thread and never delays the search request.
+    """
+
+    # --- indexing -------------------------------------------------------
+
+    def index_text_scan(
+        self,
+        scan_id: UUID,
+        user_id: UUID,
+        request: TargetTextSearchSchema,
+        results: List[TargetTextSchemaResponse],
+    ):
+        _graph_indexer.submit(self._guarded, self._index_text_scan, scan_id, user_id, request, results)
+
+    def index_image_scan(self, scan_id: UUID, user_id: UUID, id_search: str, items: List[dict]):
+        _graph_indexer.submit(self._guarded, self._index_image_scan, scan_id, user_id, id_search, items)
+
+    def index_username_scan(self, scan_id: UUID, user_id: UUID, username: str, profile_urls: List[str]):
+        _graph_indexer.submit(self._guarded, self._index_username_scan, scan_id, user_id, username, profile_urls)
+
+    def _guarded(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            db_logger.error(f"Graph indexing failed: {str(e)}", exc_info=True)
+
+    def _index_text_scan(self, scan_id, user_id, request, results):
+        target = ("target", f"{request.type.value}:{request.name.strip().lower()}")
+        urls = [canonical_url(result.link) for result in results]
+        links = []
+        for url in urls:
+            if url is not None:
+                links.append((target, ("url", url)))
+                links += _url_links(url)
+        for entity in text_result_entities(results, request.country):
+            url = urls[entity.source_index]
+            links.append((("url", url) if url else target, _entity_node(entity)))
+        self._write(scan_id, user_id, links)
+
+    def _index_image_scan(self, scan_id, user_id, id_search, items):
+        image = ("image", id_search.lower())
+        urls = [canonical_url(item.get("url")) for item in items]
+        links = []
+        for item, url in zip(items, urls):
+            face = ("face", str(item.get("guid") or "").lower())
+            if face[1]:
+                links.append((image, face))
+            if url is not None:
+                links.append((face if face[1] else image, ("url", url)))
+                links += _url_links(url)
+        for entity in face_match_entities(items):
+            url = urls[entity.source_index]
+            links.append((("url", url) if url else image, _entity_node(entity)))
+        self._write(scan_id, user_id, links)
+
+    def _index_username_scan(self, scan_id, user_id, username, profile_urls):
+        handle = ("handle", username.lower())
+        links = []
+        for url in map(canonical_url, profile_urls):
+            if url is not None:
+                links.append((handle, ("url", url)))
+                links += _url_links(url)
+        self._write(scan_id, user_id, links)
+
+    def _write(self, scan_id: UUID, user_id: UUID, links: List[Tuple[NodeRef, NodeRef]]):
+        links = [
+            ((a[0], a[1][:500]), (b[0], b[1][:500]))
+            for a, b in links
+            if a != b and a[1] and b[1]
+        ]
+        if not links:
+            return
+        refs = sorted({ref for link in links for ref in link})
+        with get_session() as session:
+            insert = self._insert(session)
+            session.execute(
+                insert(GraphNode).on_conflict_do_nothing(index_elements=["kind", "key"]),
+                [{"kind": kind, "key": key} for kind, key in refs],
+            )
+            ids: Dict[NodeRef, int] = {}
+            for start in range(0, len(refs), ID_CHUNK):
+                for node_id, kind, key in session.execute(
+                    select(GraphNode.node_id, GraphNode.kind, GraphNode.key)
+                    .where(tuple_(GraphNode.kind, GraphNode.key).in_(refs[start:start + ID_CHUNK]))
+                ):
+                    ids[(kind, key)] = node_id
+
+            edges = set()
+            for a, b in links:
+                src, dst = ids[a], ids[b]
+                edges.add((src, dst))
+                edges.add((dst, src))
+            session.execute(
+                insert(GraphEdge).on_conflict_do_nothing(
+                    index_elements=["src_id", "dst_id", "scan_id"]
+                ),
+                [
+                    {"src_id": src, "dst_id": dst, "scan_id": scan_id, "user_id": user_id}
+                    for src, dst in edges
+                ],
+            )
+        _adjacency_cache.evict((None, user_id), set(ids.values()))
+
+    @staticmethod
+    def _insert(session):
+        return sqlite.insert if session.get_bind().dialect.name == "sqlite" else postgresql.insert
+
+    # --- traversal ------------------------------------------------------
+
+    def neighborhood(
+        self,
+        node: NodeRef,
+        depth: int,
+        user_id: Optional[UUID],
+        provenance: bool = False,
+    ) -> Optional[GraphResponse]:
+        """Breadth-first expansion from ``node`` up to ``depth`` hops.
+
+        ``user_id=None`` walks every user's edges (admins); other users get
+        None for roots none of their own scans linked. Each node contributes
+        at most ``GRAPH_MAX_FANOUT`` neighbors and the result is capped at
+        ``GRAPH_MAX_NODES``; ``truncated`` reports either cut.
+        """
+        with get_session() as session:
+            root = session.execute(
+                select(GraphNode.node_id).where(GraphNode.kind == node[0], GraphNode.key == node[1])
+            ).scalar_one_or_none()
+            if root is None:
+                return None
+            if user_id is not None and session.execute(
+                select(GraphEdge.edge_id)
+                .where(GraphEdge.user_id == user_id, GraphEdge.src_id == root)
+                .limit(1)
+            ).first() is None:
+                # Someone else's entity: answer as if it did not exist.
+                return None
+
+            depths = {root: 0}
+            frontier = [root]
+            edges: Set[Tuple[int, int]] = set()
+            truncated = False
+            for level in range(1, depth + 1):
+                adjacency = self._adjacency(session, frontier, user_id)
+                next_frontier = []
+                for node_id in frontier:
+                    neighbors = adjacency.get(node_id, ())
+                    truncated |= len(neighbors) >= settings.GRAPH_MAX_FANOUT
+                    for neighbor in neighbors:
+                        if neighbor not in depths:
+                            if len(depths) >= settings.GRAPH_MAX_NODES:
+                                truncated = True
+                                continue
+                            depths[neighbor] = level
+                            next_frontier.append(neighbor)
+                        edges.add((min(node_id, neighbor), max(node_id, neighbor)))
+                frontier = next_frontier
+                if not frontier:
+                    break
+
+            nodes = self._describe(session, list(depths))
+            scans = self._provenance(session, list(depths), user_id) if provenance else {}
+            return GraphResponse(
+                root=f"{node[0]}:{node[1]}",
+                nodes=[
+                    GraphNodeResponse(
+                        id=node_id, kind=nodes[node_id][0], key=nodes[node_id][1], depth=level
+                    )
+                    for node_id, level in depths.items()
+                    if node_id in nodes
+                ],
+                edges=[
+                    GraphEdgeResponse(source=a, target=b, scans=scans.get((a, b), []))
+                    for a, b in sorted(edges)
+                ],
+                truncated=truncated,
+            )
+
+    def _adjacency(self, session, node_ids: List[int], user_id: Optional[UUID]) -> Dict[int, array]:
+        rows, missing = _adjacency_cache.get_many(user_id, node_ids)
+        fetched: Dict[int, array] = {node_id: array("q") for node_id in missing}
+        for start in range(0, len(missing), ID_CHUNK):
+            chunk = missing[start:start + ID_CHUNK]
+            pairs = select(GraphEdge.src_id, GraphEdge.dst_id).where(GraphEdge.src_id.in_(chunk))
+            if user_id is not None:
+                pairs = pairs.where(GraphEdge.user_id == user_id)
+            pairs = pairs.group_by(GraphEdge.src_id, GraphEdge.dst_id).subquery()
+            rank = func.row_number().over(partition_by=pairs.c.src_id, order_by=pairs.c.dst_id)
+            ranked = select(pairs.c.src_id, pairs.c.dst_id, rank.label("rank")).subquery()
+            for src, dst in session.execute(
+                select(ranked.c.src_id, ranked.c.dst_id)
+                .where(ranked.c.rank <= settings.GRAPH_MAX_FANOUT)
+            ):
+                fetched[src].append(dst)
+        _adjacency_cache.put_many(user_id, fetched)
+        rows.update(fetched)
+        return rows
+
+    def _describe(self, session, node_ids: List[int]) -> Dict[int, NodeRef]:
+        nodes = {}
+        for start in range(0, len(node_ids), ID_CHUNK):
+            for node_id, kind, key in session.execute(
+                select(GraphNode.node_id, GraphNode.kind, GraphNode.key)
+                .where(GraphNode.node_id.in_(node_ids[start:start + ID_CHUNK]))
+            ):
+                nodes[node_id] = (kind, key)
+        return nodes
+
+    def _provenance(self, session, node_ids: List[int], user_id: Optional[UUID]) -> Dict[Tuple[int, int], List[UUID]]:
+        """Up to 10 scan IDs per returned edge."""
+        scans: Dict[Tuple[int, int], List[UUID]] = defaultdict(list)
+        wanted = set(node_ids)
+        for start in range(0, len(node_ids), ID_CHUNK):
+            stmt = select(GraphEdge.src_id, GraphEdge.dst_id, GraphEdge.scan_id).where(
+                GraphEdge.src_id.in_(node_ids[start:start + ID_CHUNK]),
+                GraphEdge.src_id < GraphEdge.dst_id,
+            )
+            if user_id is not None:
+                stmt = stmt.where(GraphEdge.user_id == user_id)
+            for src, dst, scan_id in session.execute(stmt):
+                if dst in wanted and len(scans[(src, dst)]) < 10:
+                    scans[(src, dst)].append(scan_id)
+        return scans
@@ -0,0 +1,189 @@
+from modules.target.schemas import (
+    TargetSendImageSchemaResponse,
+    TargetImageBatchItemResponse,
+    TargetImageBatchSendResponse,
+    TargetImageBatchResponse,
+    CreateScanSchema,
+)
+from modules.target.domain.target_search import TargetImageService
+from services.facecrawler.image_preprocessing import ImageWorkersUnavailable
+from database.repository import BaseRepository
+from database.models.db_models import ScanHistory
+from database.session import get_session
+from database.partitions import within_retention
+from config_logging import api_logger
+from settings import settings
+from sqlalchemy import select
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+_image_executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_BATCH_CONCURRENCY, thread_name_prefix="image-batch"
+)
+
+
+def merge_face_matches(result_sets: Iterable[List[dict]]) -> List[dict]:
+    """Merge FaceCrawler items from several searches by URL (or guid).
+
+    The highest-scoring item is kept for every match, with ``matched_images``
+    counting how many of the searches found it. Sorted by score, best first.
+    """
+    best: Dict[str, dict] = {}
+    counts: Dict[str, int] = {}
+    for items in result_sets:
+        for item in items:
+            key = item.get("url") or item.get("guid")
+            if not key:
+                continue
+            counts[key] = counts.get(key, 0) + 1
+            current = best.get(key)
+            if current is None or (item.get("score") or 0) > (current.get("score") or 0):
+                best[key] = item
+    merged = [{**item, "matched_images": counts[key]} for key, item in best.items()]
+    merged.sort(key=lambda item: item.get("score") or 0, reverse=True)
+    return merged
+
+
+class TargetImageBatchService:
+    """Face search over several photos of one subject, tracked as a group.
+
+    Uploads run concurrently on a shared pool of ``IMAGE_BATCH_CONCURRENCY``
+    workers over the pooled FaceCrawler client, so a batch takes roughly as
+    long as its slowest image. Each upload gets its own ``image`` scan linked
+    to an ``image_batch`` group scan through ``parent_scan_id``; polling the
+    group checks the still-running searches concurrently, reads completed
+    ones from the database and merges their matches.
+    """
+
+    def __init__(self):
+        self.image_service = TargetImageService()
+
+    def send(self, images: List[Tuple[str, bytes]], user_id: UUID) -> TargetImageBatchSendResponse:
+        group_id = self._create_group(len(images), user_id)
+        futures = [
+            _image_executor.submit(self.image_service.send_image, data, user_id, group_id)
+            for _, data in images
+        ]
+
+        items = []
+        unavailable = 0
+        for index, ((filename, _), future) in enumerate(zip(images, futures)):
+            try:
+                response = future.result()
+            except ValueError:
+                response = TargetSendImageSchemaResponse(
+                    status="error", message="Invalid image file."
+                )
+            except ImageWorkersUnavailable:
+                unavailable += 1
+                response = TargetSendImageSchemaResponse(
+                    status="error", message="Image processing unavailable, retry later."
+                )
+            except Exception as e:
+                api_logger.error(f"Batch image {index} failed: {str(e)}", exc_info=True)
+                response = TargetSendImageSchemaResponse(
+                    status="error", message="Failed to send image."
+                )
+            items.append(
+                TargetImageBatchItemResponse(
+                    index=index, filename=filename, **response.model_dump()
+                )
+            )
+
+        uploaded = sum(1 for item in items if item.id_search)
+        self._finish_group(group_id, uploaded, len(images) - uploaded)
+        if unavailable == len(images):
+            raise ImageWorkersUnavailable("Image workers unavailable")
+        return TargetImageBatchSendResponse(
+            status="success" if uploaded else "error",
+            message=f"{uploaded} of {len(images)} images sent.",
+            group_id=group_id,
+            items=items,
+        )
+
+    def check(self, group_id: UUID, user_id: UUID, demo: bool = False) -> Optional[TargetImageBatchResponse]:
+        with get_session() as session:
+            group = session.execute(
+                select(ScanHistory).where(
+                    ScanHistory.scan_id == group_id, within_retention(ScanHistory.timestamp)
+                )
+            ).scalar_one_or_none()
+            if group is None or group.user_id != user_id or group.search_type != "image_batch":
+                return None
+            id_searches = session.execute(
+                select(ScanHistory.id_search).where(
+                    ScanHistory.parent_scan_id == group_id,
+                    ScanHistory.timestamp >= group.timestamp,
+                    ScanHistory.id_search.is_not(None),
+                )
+            ).scalars().all()
+
+        resolved = list(_image_executor.map(
+            lambda id_search: self.image_service.resolve_search(id_search, user_id, demo=demo),
+            id_searches,
+        ))
+        stored = self.image_service.stored_matches(
+            [scan_id for scan_id, _ in resolved if scan_id is not None]
+        )
+        result_sets = list(stored.values())
+        completed = len(stored)
+        failed = progress = 0
+        for scan_id, response in resolved:
+            if scan_id is not None:
+                progress += 100
+            elif str(response.get("message")).startswith("error"):
+                failed += 1
+                progress += 100
+            else:
+                progress += response.get("progress") or 0
+                if response.get("progress") == 100:
+                    completed += 1
+                    result_sets.append(response.get("data", []))
+        progress //= max(len(resolved), 1)
+        data = merge_face_matches(result_sets)
+
+        if completed + failed == len(resolved):
+            message = "search complete."
+        else:
+            message = "running search..."
+        return TargetImageBatchResponse(
+            message=message,
+            group_id=group_id,
+            searches=len(resolved),
+            completed=completed,
+            failed=failed,
+            progress=progress,
+            data=data,
+            total=len(data),
+        )
+
+    def _create_group(self, images: int, user_id: UUID) -> UUID:
+        with get_session() as session:
+            scan_repo = BaseRepository[ScanHistory, CreateScanSchema, None](ScanHistory)
+            scan = scan_repo.create(
+                session=session,
+                obj_in=CreateScanSchema(
+                    user_id=user_id,
+                    query=f"batch of {images} images",
+                    engine="facecrawler",
+                    search_type="image_batch",
+                    status="STARTED",
+                    image_metadata={"images": images},
+                ),
+            )
+            return scan.scan_id
+
+    def _finish_group(self, group_id: UUID, uploaded: int, failed: int):
+        with get_session() as session:
+            scan = session.execute(
+                select(ScanHistory).where(
+                    ScanHistory.scan_id == group_id, within_retention(ScanHistory.timestamp)
+                )
+            ).scalar_one()
+            scan.status = "STARTED" if uploaded else "FAILED"
+            scan.image_metadata = {
+                **(scan.image_metadata or {}),
+                "uploaded": uploaded,
+                "failed": failed,
+            }
@@ -0,0 +1,144 @@
+from database.models.db_models import ImageHash
+from database.session import get_session
+from services.facecrawler.image_preprocessing import to_unsigned64
+from settings import settings
+from sqlalchemy import func, select
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import numpy as np
+import threading
+import time
+
+# Rows committed out of hash_id order (concurrent inserts) are picked up by
+# re-reading this many ids below the highest one already loaded.
+REFRESH_OVERLAP = 1000
+
+
+class PerceptualHashIndex:
+    """In-memory copy of ``image_hash`` for Hamming-distance lookups.
+
+    Hashes are kept in one packed ``uint64`` array, next to parallel arrays
+    of row ids, user codes and scan ids; a lookup XORs the query against
+    every hash and counts bits with ``np.bitwise_count``, which scans a
+    million hashes in a few milliseconds without any tree to maintain.
+    New rows are loaded incrementally by ``hash_id`` when the index is
+    older than ``IMAGE_PHASH_REFRESH_SECONDS`` or was marked stale by a
+    local insert, so every worker converges on the table. Rows removed by
+    scan retention are dropped when the table's lowest ``hash_id`` moves
+    past the index's, and the whole index is rebuilt every
+    ``IMAGE_PHASH_REBUILD_SECONDS`` to catch any other deletes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hash_ids = np.empty(0, dtype=np.int64)
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._users = np.empty(0, dtype=np.int32)
+        self._scans = np.empty(0, dtype="V16")
+        self._user_codes: Dict[UUID, int] = {}
+        self._watermark = 0
+        self._loaded_at = 0.0
+        self._built_at = 0.0
+        self._stale = True
+
+    def __len__(self) -> int:
+        return self._size
+
+    def mark_stale(self):
+        self._stale = True
+
+    def nearest(
+        self, phash: int, user_id: Optional[UUID], max_distance: int, limit: int
+    ) -> List[Tuple[UUID, int]]:
+        """Closest ``(scan_id, distance)`` pairs within ``max_distance``, nearest first.
+
+        ``user_id`` restricts the lookup to that user's images; ``None`` searches all.
+        """
+        self.refresh()
+        with self._lock:
+            size = self._size
+            hashes, users, scans = self._hashes, self._users, self._scans
+            code = None if user_id is None else self._user_codes.get(user_id, -1)
+
+        distances = np.bitwise_count(hashes[:size] ^ np.uint64(phash))
+        mask = distances <= max_distance
+        if code is not None:
+            mask &= users[:size] == code
+        candidates = np.flatnonzero(mask)
+        order = np.argsort(distances[candidates], kind="stable")[:limit]
+        return [
+            (UUID(bytes=scans[i].tobytes()), int(distances[i]))
+            for i in candidates[order]
+        ]
+
+    def refresh(self, force: bool = False):
+        if not (force or self._stale or time.monotonic() - self._loaded_at > settings.IMAGE_PHASH_REFRESH_SECONDS):
+            return
+        with self._lock:
+            self._stale = False
+            self._loaded_at = time.monotonic()
+            if self._loaded_at - self._built_at > settings.IMAGE_PHASH_REBUILD_SECONDS:
+                self._reset()
+            floor = max(self._watermark - REFRESH_OVERLAP, 0)
+            with get_session() as session:
+                lowest = session.execute(select(func.min(ImageHash.hash_id))).scalar()
+                rows = session.execute(
+                    select(ImageHash.hash_id, ImageHash.phash, ImageHash.user_id, ImageHash.scan_id)
+                    .where(ImageHash.hash_id > floor)
+                    .order_by(ImageHash.hash_id)
+                ).all()
+            self._drop_below(lowest)
+            if self._size and rows:
+                loaded = self._hash_ids[:self._size]
+                seen = np.isin([row[0] for row in rows], loaded[loaded > floor])
+                rows = [row for row, known in zip(rows, seen) if not known]
+            if rows:
+                self._append(rows)
+
+    def _reset(self):
+        self._size = 0
+        self._hash_ids = np.empty(0, dtype=np.int64)
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._users = np.empty(0, dtype=np.int32)
+        self._scans = np.empty(0, dtype="V16")
+        self._watermark = 0
+        self._built_at = time.monotonic()
+
+    def _drop_below(self, lowest: Optional[int]):
+        """Forget rows below the table's lowest ``hash_id``; retention deletes the oldest first."""
+        if lowest is None:
+            self._reset()
+            return
+        keep = self._hash_ids[:self._size] >= lowest
+        if keep.all():
+            return
+        # New arrays rather than in-place compaction: lookups may still hold the old ones.
+        self._hash_ids = self._hash_ids[:self._size][keep]
+        self._hashes = self._hashes[:self._size][keep]
+        self._users = self._users[:self._size][keep]
+        self._scans = self._scans[:self._size][keep]
+        self._size = len(self._hash_ids)
+
+    def _append(self, rows):
+        count = len(rows)
+        needed = self._size + count
+        if needed > len(self._hashes):
+            capacity = max(needed, 2 * len(self._hashes), 1024)
+            self._hash_ids = np.resize(self._hash_ids, capacity)
+            self._hashes = np.resize(self._hashes, capacity)
+            self._users = np.resize(self._users, capacity)
+            self._scans = np.resize(self._scans, capacity)
+
+        end = self._size + count
+        self._hash_ids[self._size:end] = [row[0] for row in rows]
+        self._hashes[self._size:end] = [to_unsigned64(row[1]) for row in rows]
+        self._users[self._size:end] = [
+            self._user_codes.setdefault(row[2], len(self._user_codes)) for row in rows
+        ]
+        self._scans[self._size:end] = [row[3].bytes for row in rows]
+        self._size = end
+        self._watermark = max(self._watermark, int(self._hash_ids[end - 1]))
+
+
+phash_index = PerceptualHashIndex()
@@ -0,0 +1,69 @@
+from modules.target.schemas import SimilarImageScanResponse, ListSimilarImagesResponse
+from modules.target.domain.target_search import TargetImageService
+from modules.target.domain.target_image_index import phash_index
+from database.models.db_models import ScanHistory
+from database.session import get_session
+from database.partitions import within_retention
+from services.facecrawler.image_preprocessing import image_phash
+from monitoring.profiling import span
+from settings import settings
+from sqlalchemy import select
+from typing import Optional
+from uuid import UUID
+
+
+class ImageSimilarityService:
+    """Finds earlier image searches of (nearly) the same picture.
+
+    The upload is hashed on the preprocessing pool and looked up in the
+    in-memory perceptual-hash index; matching scans come back nearest
+    first, with the matches stored for the completed ones. Nothing is sent
+    to FaceCrawler.
+    """
+
+    def __init__(self):
+        self.image_service = TargetImageService()
+
+    def similar(
+        self,
+        image: bytes,
+        user_id: Optional[UUID],
+        max_distance: int,
+        with_results: bool = True,
+    ) -> ListSimilarImagesResponse:
+        """``user_id`` limits the lookup to that user's scans; raises ``ValueError`` for bad images."""
+        with span("image_hash"):
+            phash = image_phash(image)
+        with span("phash_lookup"):
+            nearest = phash_index.nearest(
+                phash, user_id, max_distance, settings.IMAGE_PHASH_MAX_MATCHES
+            )
+
+        with get_session() as session:
+            scans = {
+                scan.scan_id: scan
+                for scan in session.execute(
+                    select(ScanHistory).where(
+                        ScanHistory.scan_id.in_([scan_id for scan_id, _ in nearest]),
+                        within_retention(ScanHistory.timestamp),
+                    )
+                ).scalars()
+            }
+            session.expunge_all()
+
+        completed = [scan_id for scan_id, scan in scans.items() if scan.status == "COMPLETED"]
+        matches = self.image_service.stored_matches(completed) if with_results else {}
+        data = [
+            SimilarImageScanResponse(
+                scan_id=scan_id,
+                id_search=scans[scan_id].id_search,
+                distance=distance,
+                status=scans[scan_id].status,
+                timestamp=scans[scan_id].timestamp,
+                data=matches.get(scan_id, []),
+                total=len(matches.get(scan_id, [])),
+            )
+            for scan_id, distance in nearest
+            if scan_id in scans
+        ]
+        return ListSimilarImagesResponse(phash=f"{phash:016x}", data=data, total=len(data))
@@ -0,0 +1,97 @@
+from modules.target.schemas import TargetTextSchemaResponse, ReplayScanResponse
+from modules.target.domain.target_entities import text_result_entities, face_match_entities
+from services.archive.zstd_codec import ZstdCodec
+from enums.country_type import ContryEnum
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import json
+
+# Scan types whose archived response is a FaceCrawler search; the rest are SerpAPI pages.
+IMAGE_SCAN_TYPES = ("image",)
+
+
+def serp_results(organic_results: Optional[List[dict]]) -> List[TargetTextSchemaResponse]:
+    """Text-search results from SerpAPI ``organic_results``."""
+    return [
+        TargetTextSchemaResponse(
+            title=item.get("title", ""),
+            link=item.get("link", ""),
+            snippet=item.get("snippet", ""),
+            source=item.get("source", "SerpAPI"),
+        )
+        for item in organic_results or []
+    ]
+
+
+def face_matches(items: List[dict]) -> List[dict]:
+    """FaceCrawler items as served from storage: best score first, without thumbnails."""
+    matches = [
+        {
+            "guid": item.get("guid"),
+            "score": item.get("score"),
+            "url": item.get("url"),
+            "snippet": item.get("snippet"),
+        }
+        for item in items
+    ]
+    matches.sort(key=lambda match: -(match["score"] or 0))
+    return matches
+
+
+class ReplayJob(NamedTuple):
+    scan_id: str
+    search_type: str
+    query: Optional[str]
+    country: Optional[str]
+    # The scan's archived frames in fetch order; several for multi-page searches.
+    frames: Tuple[bytes, ...]
+    complete: bool = True
+
+
+def replay(job: ReplayJob, codec: ZstdCodec, include_data: bool) -> ReplayScanResponse:
+    """Run the current post-processing over a scan's archived responses.
+
+    SerpAPI pages are merged by link, as the search merged them.
+    """
+    response = ReplayScanResponse(
+        scan_id=job.scan_id, search_type=job.search_type, query=job.query, complete=job.complete
+    )
+    try:
+        bodies = [json.loads(codec.decompress(frame)) for frame in job.frames]
+        if job.search_type in IMAGE_SCAN_TYPES:
+            data = face_matches((bodies[0].get("output") or {}).get("items") or [])
+            entities = face_match_entities(data)
+        else:
+            data, links = [], set()
+            for body in bodies:
+                for result in serp_results(body.get("organic_results")):
+                    if result.link not in links:
+                        links.add(result.link)
+                        data.append(result)
+            country = ContryEnum(job.country) if job.country in ContryEnum._value2member_map_ else None
+            entities = text_result_entities(data, country)
+    except Exception as e:
+        response.error = f"{type(e).__name__}: {str(e)}"[:200]
+        return response
+    response.total = len(data)
+    response.data = data if include_data else []
+    response.entities = entities
+    return response
+
+
+def replay_chunk(
+    jobs: List[ReplayJob], dictionaries: Dict[int, bytes], include_data: bool
+) -> Tuple[str, int]:
+    """Replay a chunk in a worker process.
+
+    Returns the chunk as NDJSON, so the result pickles cheaply, and how many
+    scans failed.
+    """
+    codec = ZstdCodec()
+    for data in dictionaries.values():
+        codec.add_dictionary(data)
+    lines, failed = [], 0
+    for job in jobs:
+        response = replay(job, codec, include_data)
+        failed += response.error is not None
+        lines.append(response.model_dump_json() + "\n")
+    return "".join(lines), failed
@@ -0,0 +1,219 @@
+from modules.target.schemas import TargetTextSchemaResponse, SubQueryResponse, QueryPlanResponse
+from modules.target.domain.target_postprocess import serp_results
+from database.models.db_models import ScanHistory
+from database.session import get_session
+from config_logging import api_logger
+from settings import settings
+from sqlalchemy import select
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import heapq
+import itertools
+import math
+import threading
+import time
+
+_planner_executor = ThreadPoolExecutor(
+    max_workers=settings.PLANNER_WORKERS, thread_name_prefix="serp-planner"
+)
+
+
+class SubQuery(NamedTuple):
+    category: str
+    engine: str
+    page: int
+    dork: str
+
+
+class PlannedSearch(NamedTuple):
+    results: List[TargetTextSchemaResponse]
+    dorks: List[str]
+    # Archive keys of every page fetched, in completion order.
+    archive_keys: List[str]
+    plan: QueryPlanResponse
+
+
+class YieldStats:
+    """Results per call of each (category, engine, page), from earlier planned scans.
+
+    Read from the ``plan`` that planned searches record in
+    ``scan_history.image_metadata`` (last ``PLANNER_HISTORY_DAYS``, at most
+    ``PLANNER_HISTORY_SCANS``), refreshed every ``PLANNER_STATS_TTL_SECONDS``.
+    Estimates are smoothed towards ``PLANNER_PRIOR_RESULTS``, decayed by
+    ``PLANNER_PAGE_DECAY`` per page, so unseen combinations still get tried.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str, int], Tuple[int, int]] = {}
+        self._loaded_at: Optional[float] = None
+
+    def expected(self, category: str, engine: str, page: int) -> float:
+        self._refresh()
+        results, calls = self._totals.get((category, engine, page), (0, 0))
+        prior = settings.PLANNER_PRIOR_RESULTS * settings.PLANNER_PAGE_DECAY ** page
+        weight = settings.PLANNER_PRIOR_WEIGHT
+        return (results + prior * weight) / (calls + weight)
+
+    def record(self, subqueries: List[SubQueryResponse]):
+        """Count a finished plan right away, ahead of the next refresh."""
+        with self._lock:
+            for sub in subqueries:
+                key = (sub.category, sub.engine, sub.page)
+                results, calls = self._totals.get(key, (0, 0))
+                self._totals[key] = (results + sub.results, calls + 1)
+
+    def _refresh(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < settings.PLANNER_STATS_TTL_SECONDS:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < settings.PLANNER_STATS_TTL_SECONDS:
+                return
+            totals: Dict[Tuple[str, str, int], Tuple[int, int]] = {}
+            try:
+                since = datetime.utcnow() - timedelta(days=settings.PLANNER_HISTORY_DAYS)
+                with get_session() as session:
+                    rows = session.execute(
+                        select(ScanHistory.image_metadata)
+                        .where(ScanHistory.search_type == "person", ScanHistory.timestamp >= since)
+                        .order_by(ScanHistory.timestamp.desc())
+                        .limit(settings.PLANNER_HISTORY_SCANS)
+                    ).scalars().all()
+                for metadata in rows:
+                    for category, engine, page, results in (metadata or {}).get("plan") or ():
+                        key = (category, engine, page)
+                        total, calls = totals.get(key, (0, 0))
+                        totals[key] = (total + results, calls + 1)
+            except Exception as e:
+                api_logger.error(f"Loading query planner statistics failed: {str(e)}", exc_info=True)
+            self._totals = totals
+            self._loaded_at = time.monotonic()
+
+
+yield_stats = YieldStats()
+
+
+class QueryPlanner:
+    """Runs a text search's sub-queries best-first within a result target and a credit budget.
+
+    Each (category x engine x page) sub-query costs its engine's
+    ``PLANNER_ENGINE_CREDITS``, or nothing when the SERP cache already has
+    it, and is ranked by expected results per credit. Page ``n + 1`` only
+    becomes a candidate once page ``n`` came back full. Up to
+    ``PLANNER_CONCURRENCY`` run at once, but no more are started than the
+    results still missing are expected to need. Once ``max_results`` is
+    reached queued sub-queries are cancelled and running ones abandoned
+    (their pages still land in the SERP cache); a sub-query that would
+    exceed ``budget`` is never started.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[SubQuery], Optional[Tuple[List[dict], Optional[str]]]],
+        is_cached: Callable[[SubQuery], bool],
+        stats: YieldStats = yield_stats,
+    ):
+        self.fetch = fetch
+        self.is_cached = is_cached
+        self.stats = stats
+
+    def cost(self, sub: SubQuery) -> float:
+        return 0.0 if self.is_cached(sub) else settings.PLANNER_ENGINE_CREDITS.get(sub.engine, 1.0)
+
+    def run(
+        self, first_pages: List[SubQuery], max_results: Optional[int], budget: Optional[float]
+    ) -> PlannedSearch:
+        target = max_results or math.inf
+        budget_left = budget if budget is not None else math.inf
+        order = itertools.count()
+        candidates: list = []
+
+        def consider(sub: SubQuery):
+            cost = self.cost(sub)
+            expected = self.stats.expected(sub.category, sub.engine, sub.page)
+            # Free (cached) pages first, then expected results per credit.
+            score = math.inf if cost == 0 else expected / cost
+            heapq.heappush(candidates, (-score, next(order), sub, cost, expected))
+
+        for sub in first_pages:
+            consider(sub)
+        planned = len(first_pages)
+
+        results: List[TargetTextSchemaResponse] = []
+        links = set()
+        issued: List[SubQueryResponse] = []
+        dorks: List[str] = []
+        archive_keys: List[str] = []
+        inflight: Dict = {}
+        credits = 0.0
+        stopped = "exhausted"
+
+        while True:
+            while candidates and len(inflight) < settings.PLANNER_CONCURRENCY and len(results) < target:
+                if inflight and len(results) + sum(s.expected for _, s in inflight.values()) >= target:
+                    break
+                _, _, sub, cost, expected = heapq.heappop(candidates)
+                if cost > budget_left:
+                    stopped = "budget"
+                    continue
+                budget_left -= cost
+                credits += cost
+                response = SubQueryResponse(
+                    category=sub.category, engine=sub.engine, page=sub.page, cost=cost, expected=round(expected, 2)
+                )
+                inflight[_planner_executor.submit(self.fetch, sub)] = (sub, response)
+            if not inflight:
+                break
+
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in done:
+                sub, response = inflight.pop(future)
+                issued.append(response)
+                if sub.dork not in dorks:
+                    dorks.append(sub.dork)
+                try:
+                    serp = future.result()
+                except Exception as e:
+                    api_logger.error(f"Planned sub-query failed: {str(e)}")
+                    continue
+                organic_results, key = serp or (None, None)
+                page_results = serp_results(organic_results)
+                if key and key not in archive_keys:
+                    archive_keys.append(key)
+                response.results = len(page_results)
+                for result in page_results:
+                    if result.link not in links:
+                        links.add(result.link)
+                        results.append(result)
+                        response.new += 1
+                if response.results >= settings.PLANNER_FULL_PAGE and sub.page + 1 < settings.PLANNER_MAX_PAGES:
+                    consider(sub._replace(page=sub.page + 1))
+                    planned += 1
+
+            if len(results) >= target:
+                stopped = "max_results"
+                break
+
+        cancelled = 0
+        for future, (_, response) in inflight.items():
+            # Queued ones never reach SerpAPI; running ones finish into the cache.
+            if future.cancel():
+                credits -= response.cost
+            cancelled += 1
+
+        self.stats.record(issued)
+        return PlannedSearch(
+            results=results[:max_results] if max_results else results,
+            dorks=dorks,
+            archive_keys=archive_keys,
+            plan=QueryPlanResponse(
+                max_results=max_results,
+                budget=budget,
+                credits=round(credits, 4),
+                stopped=stopped,
+                planned=planned,
+                cancelled=cancelled,
+                subqueries=issued,
+            ),
+        )
@@ -0,0 +1,227 @@
+from modules.target.schemas import TargetReplaySchema, ReplayScanResponse, ReplaySummaryResponse
+from modules.target.domain.target_archive import response_archive
+from modules.target.domain.target_postprocess import ReplayJob, replay_chunk
+from database.models.db_models import ScanHistory, ScanResponse, ResponseBlob
+from database.session import get_session
+from config_logging import api_logger
+from services.archive.zstd_codec import frame_dictionary
+from settings import settings
+from sqlalchemy import select
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+import multiprocessing
+import threading
+import time
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned like the image pool: workers only import the
+            # post-processing code, never this process's DB connections.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.ARCHIVE_REPLAY_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next chunk spawns fresh workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_replay_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+class TargetReplayService:
+    """Re-runs the current post-processing over archived upstream responses.
+
+    Scans are read newest first, their compressed bodies are loaded
+    ``ARCHIVE_REPLAY_CHUNK`` at a time and each chunk is decompressed,
+    parsed and post-processed in a worker process, with at most two chunks
+    per worker in flight. Results stream back as NDJSON chunk by chunk,
+    followed by a summary line. Nothing is fetched from upstream and
+    nothing is written.
+    """
+
+    def stream(self, request: TargetReplaySchema, user_id: Optional[UUID]) -> Iterator[bytes]:
+        started = time.perf_counter()
+        scans = self._scans(request, user_id)
+        chunks = [
+            scans[i:i + settings.ARCHIVE_REPLAY_CHUNK]
+            for i in range(0, len(scans), settings.ARCHIVE_REPLAY_CHUNK)
+        ]
+        failed = 0
+        for lines, errors, missing in self._replayed(chunks, request.include_data):
+            failed += errors + len(missing)
+            yield (lines + "".join(missing)).encode("utf-8")
+
+        yield (ReplaySummaryResponse(
+            scans=len(scans),
+            replayed=len(scans) - failed,
+            failed=failed,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        ).model_dump_json() + "\n").encode("utf-8")
+
+    def _replayed(self, chunks: List[List], include_data: bool) -> Iterator[tuple]:
+        """``(ndjson, errors, missing_lines)`` per chunk, in order."""
+        dictionaries: Dict[int, bytes] = {}
+        if len(chunks) <= 1 or settings.ARCHIVE_REPLAY_WORKERS < 1:
+            # Not worth a trip to the pool.
+            for chunk in chunks:
+                jobs, missing = self._load(chunk, dictionaries)
+                try:
+                    replayed = replay_chunk(jobs, self._needed(jobs, dictionaries), include_data)
+                except Exception as e:
+                    api_logger.error(f"Replay chunk failed: {str(e)}", exc_info=True)
+                    replayed = self._failed(jobs, "replay failed")
+                yield (*replayed, missing)
+            return
+
+        pending = deque()
+        for chunk in chunks:
+            jobs, missing = self._load(chunk, dictionaries)
+            submitted = self._submit(jobs, self._needed(jobs, dictionaries), include_data)
+            pending.append((submitted, jobs, missing))
+            if len(pending) >= settings.ARCHIVE_REPLAY_WORKERS * 2:
+                yield self._collect(*pending.popleft())
+        while pending:
+            yield self._collect(*pending.popleft())
+
+    @staticmethod
+    def _submit(jobs: List[ReplayJob], dictionaries: Dict[int, bytes], include_data: bool):
+        """``(pool, future)``, or ``None`` when even a fresh pool cannot take the chunk."""
+        for _ in range(2):
+            pool = _get_pool()
+            try:
+                return pool, pool.submit(replay_chunk, jobs, dictionaries, include_data)
+            except BrokenProcessPool:
+                _discard_pool(pool)
+        return None
+
+    def _collect(
+        self,
+        submitted: Optional[Tuple[ProcessPoolExecutor, Future]],
+        jobs: List[ReplayJob],
+        missing: List[str],
+    ) -> tuple:
+        if submitted is None:
+            return (*self._failed(jobs, "replay workers unavailable"), missing)
+        pool, future = submitted
+        try:
+            return (*future.result(), missing)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on this chunk); later chunks get a new pool.
+            api_logger.warning(f"Replay worker pool broke; {len(jobs)} scans not replayed")
+            _discard_pool(pool)
+            return (*self._failed(jobs, "replay worker crashed"), missing)
+        except Exception as e:
+            api_logger.error(f"Replay chunk failed: {str(e)}", exc_info=True)
+            return (*self._failed(jobs, "replay failed"), missing)
+
+    @staticmethod
+    def _failed(jobs: List[ReplayJob], error: str) -> Tuple[str, int]:
+        """Error lines for a chunk that produced nothing, shaped like ``replay_chunk``'s output."""
+        return "".join(
+            ReplayScanResponse(
+                scan_id=job.scan_id, search_type=job.search_type, query=job.query, error=error
+            ).model_dump_json() + "\n"
+            for job in jobs
+        ), len(jobs)
+
+    def _scans(self, request: TargetReplaySchema, user_id: Optional[UUID]) -> List:
+        stmt = (
+            select(
+                ScanHistory.scan_id,
+                ScanHistory.search_type,
+                ScanHistory.query,
+                ScanHistory.image_metadata,
+                ScanHistory.raw_response_key,
+            )
+            .where(ScanHistory.raw_response_key.is_not(None))
+            .order_by(ScanHistory.timestamp.desc())
+            .limit(min(request.limit, settings.ARCHIVE_REPLAY_MAX_SCANS))
+        )
+        if user_id is not None:
+            stmt = stmt.where(ScanHistory.user_id == user_id)
+        if request.scan_ids:
+            stmt = stmt.where(ScanHistory.scan_id.in_(request.scan_ids))
+        if request.since is not None:
+            stmt = stmt.where(ScanHistory.timestamp >= request.since)
+        if request.until is not None:
+            stmt = stmt.where(ScanHistory.timestamp < request.until)
+        if request.search_types:
+            stmt = stmt.where(ScanHistory.search_type.in_(request.search_types))
+        with get_session() as session:
+            return session.execute(stmt).all()
+
+    def _load(self, chunk: List, dictionaries: Dict[int, bytes]):
+        """Jobs for a chunk of scans, and error lines for scans whose blobs are all gone.
+
+        Multi-page scans list their blobs in ``scan_response``; the rest
+        have only ``raw_response_key``.
+        """
+        keys: Dict[UUID, List[str]] = {scan.scan_id: [scan.raw_response_key] for scan in chunk}
+        with get_session() as session:
+            linked: Dict[UUID, List[str]] = {}
+            for scan_id, key in session.execute(
+                select(ScanResponse.scan_id, ScanResponse.blob_key)
+                .where(ScanResponse.scan_id.in_(keys))
+                .order_by(ScanResponse.scan_id, ScanResponse.position)
+            ):
+                linked.setdefault(scan_id, []).append(key)
+            keys.update(linked)
+            blobs = {
+                key: (dict_id, data)
+                for key, dict_id, data in session.execute(
+                    select(ResponseBlob.blob_key, ResponseBlob.dict_id, ResponseBlob.data)
+                    .where(ResponseBlob.blob_key.in_({key for scan_keys in keys.values() for key in scan_keys}))
+                )
+            }
+        unknown = {dict_id for dict_id, _ in blobs.values() if dict_id and dict_id not in dictionaries}
+        if unknown:
+            dictionaries.update(response_archive.dictionaries(unknown))
+
+        jobs, missing = [], []
+        for scan in chunk:
+            frames = tuple(blobs[key][1] for key in keys[scan.scan_id] if key in blobs)
+            if not frames:
+                missing.append(ReplayScanResponse(
+                    scan_id=str(scan.scan_id),
+                    search_type=scan.search_type,
+                    query=scan.query,
+                    error="archived response not found",
+                ).model_dump_json() + "\n")
+                continue
+            jobs.append(ReplayJob(
+                scan_id=str(scan.scan_id),
+                search_type=scan.search_type,
+                query=scan.query,
+                country=(scan.image_metadata or {}).get("country"),
+                frames=frames,
+                complete=len(frames) == len(keys[scan.scan_id]),
+            ))
+        return jobs, missing
+
+    @staticmethod
+    def _needed(jobs: List[ReplayJob], dictionaries: Dict[int, bytes]) -> Dict[int, bytes]:
+        """Only the dictionaries this chunk's frames use, to keep the pickled job small."""
+        used = {frame_dictionary(frame) for job in jobs for frame in job.frames}
+        return {dict_id: dictionaries[dict_id] for dict_id in used if dict_id in dictionaries}
@@ -0,0 +1,115 @@
+from modules.target.schemas import TargetResultSearchItem
+from database.models.db_models import (
+    ScanHistory,
+    TargetResult,
+    RESULTS_FTS_TABLE,
+    result_search_document,
+)
+from database.session import get_session
+from settings import settings
+from sqlalchemy import select, func, literal_column, cast, String, table, column
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+
+def _fts5_query(query: str) -> str:
+    """Quote every term so user input (emails, URLs) is never parsed as FTS5 syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+# Joined on both keys so Postgres can match partitions month by month.
+_same_scan = (ScanHistory.scan_id == TargetResult.scan_id) & (
+    ScanHistory.timestamp == TargetResult.scan_timestamp
+)
+
+
+class ResultSearchService:
+    """Full-text search over stored ``TargetResult`` rows.
+
+    Postgres uses the GIN expression index declared in ``db_models``; SQLite
+    (local runs and tests) uses the FTS5 table maintained by triggers. Both
+    indexes are updated as rows are inserted, so there is no rebuild step.
+    """
+
+    def search(
+        self,
+        query: str,
+        user_id: Optional[UUID],
+        scan_id: Optional[UUID] = None,
+        category: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Tuple[List[TargetResultSearchItem], int]:
+        """One page of matches, best first, and how many results match in all."""
+        with get_session() as session:
+            if session.get_bind().dialect.name == "sqlite":
+                stmt = self._sqlite_statement(query)
+            else:
+                stmt = self._postgres_statement(query)
+            stmt = self._apply_filters(stmt, user_id, scan_id, category)
+            rows = session.execute(stmt.limit(limit).offset(offset)).all()
+            if len(rows) < limit and (rows or not offset):
+                # The last page: no need to count.
+                total = offset + len(rows)
+            else:
+                # Same filter, without the ranking and highlighting.
+                matches = stmt.with_only_columns(TargetResult.result_id).order_by(None).subquery()
+                total = session.execute(select(func.count()).select_from(matches)).scalar_one()
+            return [
+                TargetResultSearchItem(
+                    result_id=result.result_id,
+                    scan_id=result.scan_id,
+                    title=result.title,
+                    link=result.link,
+                    snippet=result.snippet,
+                    highlight=highlight,
+                    rank=rank,
+                    timestamp=timestamp,
+                )
+                for result, timestamp, rank, highlight in rows
+            ], total
+
+    def _postgres_statement(self, query: str):
+        language = literal_column(f"'{settings.FTS_LANGUAGE}'::regconfig")
+        tsquery = func.websearch_to_tsquery(language, query)
+        document = result_search_document(TargetResult.title, TargetResult.snippet)
+        rank = func.ts_rank_cd(document, tsquery)
+        highlight = func.ts_headline(
+            language,
+            func.coalesce(TargetResult.snippet, ""),
+            tsquery,
+            f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2",
+        )
+        return (
+            select(TargetResult, ScanHistory.timestamp, rank.label("rank"), highlight)
+            .join(ScanHistory, _same_scan)
+            .where(document.op("@@")(tsquery))
+            .order_by(rank.desc())
+        )
+
+    def _sqlite_statement(self, query: str):
+        fts = table(RESULTS_FTS_TABLE, column("result_id"))
+        fts_name = literal_column(RESULTS_FTS_TABLE)
+        bm25 = func.bm25(fts_name)
+        highlight = func.highlight(fts_name, 2, HIGHLIGHT_START, HIGHLIGHT_STOP)
+        return (
+            select(TargetResult, ScanHistory.timestamp, (-bm25).label("rank"), highlight)
+            .select_from(fts)
+            .join(TargetResult, TargetResult.result_id == fts.c.result_id)
+            .join(ScanHistory, _same_scan)
+            .where(fts_name.op("MATCH")(_fts5_query(query)))
+            .order_by(bm25)
+        )
+
+    def _apply_filters(self, stmt, user_id, scan_id, category):
+        if user_id is not None:
+            stmt = stmt.where(ScanHistory.user_id == user_id)
+        if scan_id is not None:
+            stmt = stmt.where(TargetResult.scan_id == scan_id)
+        if category is not None:
+            categories = cast(ScanHistory.image_metadata["categories"], String)
+            stmt = stmt.where(categories.like(f'%"{category}"%'))
+        return stmt
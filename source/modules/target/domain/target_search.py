@@ -5,74 +5,263 @@ from modules.target.schemas import (
     TargetSendImageSchemaResponse,
     CreateScanSchema,
     TargetTextSchemaResponse,
+    QueryPlanResponse,
 )
 from services.serpapi.serp_config import SerpAPIController
-from services.dorkgen.dork_generator import build_combined_dork
+from services.serpapi.serp_cache import SearchResultCache
+from services.dorkgen.dork_generator import build_combined_dork, build_variant_dorks
+from services.dorkgen.name_variants import name_variants
 from database.repository import BaseRepository
-from database.models.db_models import ScanHistory
+from database.models.db_models import ScanHistory, TargetResult, ImageHash, ScanResponse
 from database.session import get_session
+from database.partitions import within_retention
+from database.write_behind import scan_writer
+from modules.target.domain.target_graph import GraphService
 from services.facecrawler.facecrawler_service import (
     get_facecrawler_service,
 )
+from services.facecrawler.image_preprocessing import prepare_image, to_signed64
+from modules.target.domain.target_image_index import phash_index
+from modules.target.domain.target_archive import response_archive, scan_responses
+from modules.target.domain.target_postprocess import serp_results
+from modules.target.domain.target_query_planner import QueryPlanner, SubQuery
+from monitoring.profiling import span
+from settings import settings
+from sqlalchemy import select, func
+from concurrent.futures import ThreadPoolExecutor
 import os
-from typing import List
-from uuid import UUID
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID, uuid4
+
+
+_serp_cache = SearchResultCache(
+    "serpapi",
+    ttl=settings.SERP_CACHE_TTL_SECONDS,
+    max_entries=settings.SERP_CACHE_MAX_ENTRIES,
+)
+
+# Runs the dorks of a name-variant search concurrently.
+_variant_executor = ThreadPoolExecutor(
+    max_workers=settings.NAME_VARIANTS_WORKERS, thread_name_prefix="serp-variants"
+)
+
+
+class SerpFetch(NamedTuple):
+    query: str
+    results: List[TargetTextSchemaResponse]
+    # Every archived SerpAPI body the results came from, in fetch order.
+    archive_keys: Tuple[str, ...]
+    plan: Optional[QueryPlanResponse] = None
 
 
 class TargetSearchService:
     def text_search(
-        self, request: TargetTextSearchSchema, user_id: UUID
-    ) -> List[TargetTextSchemaResponse]:
-        dork_query = build_combined_dork(
-            target_name=request.name, categories=request.categories
-        )
+        self,
+        request: TargetTextSearchSchema,
+        user_id: UUID,
+        parent_scan_id: Optional[UUID] = None,
+    ) -> Tuple[List[TargetTextSchemaResponse], Optional[QueryPlanResponse]]:
+        """Run the search and store it; returns the results and, for planned
+        searches, how the credits were spent.
+
+        Searches without results are not stored, except planned ones that
+        spent calls: their plan is what teaches the planner's yield
+        statistics which combinations come back empty.
+        """
+        fetched = self.fetch_results(request)
+        results = fetched.results
+        if not results and not (fetched.plan and fetched.plan.subqueries):
+            return [], fetched.plan
 
-        serp_api = SerpAPIController(api_key=os.getenv("SERPAPI_KEY"))
-        response, status_code = serp_api.search(
-            query=dork_query,
-            location=request.country.value,
+        image_metadata = {
+            "country": request.country.value,
+            "categories": request.categories,
+        }
+        if fetched.plan is not None:
+            # Read back by the planner's yield statistics.
+            image_metadata["plan"] = [
+                [sub.category, sub.engine, sub.page, sub.results] for sub in fetched.plan.subqueries
+            ]
+
+        # Queued on the write-behind buffer (flushed in batches off the request
+        # path) when WRITE_BEHIND_ENABLED; written immediately otherwise.
+        scan_id = uuid4()
+        scan = CreateScanSchema(
+            user_id=user_id,
+            query=fetched.query,
             engine=request.search_engine.value,
+            search_type="person",
+            status="STARTED",
+            image_metadata=image_metadata,
+            parent_scan_id=parent_scan_id,
+            raw_response_key=fetched.archive_keys[0] if fetched.archive_keys else None,
+        )
+        scan_writer.add(
+            [(ScanHistory, {"scan_id": scan_id, **scan.model_dump()})]
+            + [
+                (TargetResult, {
+                    "result_id": uuid4(),
+                    "scan_id": scan_id,
+                    "scan_timestamp": scan.timestamp,
+                    "title": result.title,
+                    "link": result.link,
+                    "snippet": result.snippet,
+                    "source_type": result.source,
+                })
+                for result in results
+            ]
+            + [(ScanResponse, row) for row in scan_responses(scan_id, fetched.archive_keys)]
         )
+        if results:
+            GraphService().index_text_scan(scan_id, user_id, request, results)
 
-        if status_code != 200 or not response.json().get("organic_results"):
-            return []
+        return results, fetched.plan
 
-        with get_session() as session:
-            scan_repo = BaseRepository[ScanHistory, CreateScanSchema, None](ScanHistory)
-            scan_repo.create(
-                session=session,
-                obj_in=CreateScanSchema(
-                    user_id=user_id,
-                    query=dork_query,
-                    engine=request.search_engine.value,
-                    search_type="person",
-                    status="STARTED",
-                    image_metadata={
-                        "country": request.country.value,
-                        "categories": request.categories,
-                    },
-                ),
-            )
+    def fetch_results(self, request: TargetTextSearchSchema) -> SerpFetch:
+        """Build the dork for ``request`` and return it with the parsed results
+        and the archive keys of the raw SerpAPI responses.
+
+        With ``name_variants`` the name's variants are packed into at most
+        ``NAME_VARIANTS_MAX_QUERIES`` dorks, fetched concurrently; the
+        returned query joins them with newlines, results are merged by link
+        and every dork's key is returned, in dork order. With ``max_results`` or ``budget``
+        the search is run by the query planner instead.
+        """
+        if request.max_results is not None or request.budget is not None:
+            return self.planned_search(request)
 
-        results = [
-            TargetTextSchemaResponse(
-                title=item.get("title", ""),
-                link=item.get("link", ""),
-                snippet=item.get("snippet", ""),
-                source=item.get("source", "SerpAPI"),
+        if not request.name_variants:
+            dork_query = build_combined_dork(
+                target_name=request.name, categories=request.categories
             )
-            for item in response.json().get("organic_results", [])
+            organic_results, archive_key = self.fetch_serp(dork_query, request) or (None, None)
+            return SerpFetch(dork_query, serp_results(organic_results), tuple(filter(None, [archive_key])))
+
+        dorks = self._dorks(request, request.categories, request.search_engine.value)
+        if not dorks:
+            # Nothing searchable left of the name (e.g. only quotes).
+            return SerpFetch("", [], ())
+        if len(dorks) == 1:
+            serps = [self.fetch_serp(dorks[0], request)]
+        else:
+            serps = list(_variant_executor.map(lambda dork: self.fetch_serp(dork, request), dorks))
+
+        results: List[TargetTextSchemaResponse] = []
+        links = set()
+        for organic_results, _ in filter(None, serps):
+            for result in serp_results(organic_results):
+                if result.link not in links:
+                    links.add(result.link)
+                    results.append(result)
+        archive_keys = tuple(dict.fromkeys(key for _, key in filter(None, serps) if key))
+        return SerpFetch("\n".join(dorks), results, archive_keys)
+
+    def planned_search(self, request: TargetTextSearchSchema) -> SerpFetch:
+        """Split the search into one sub-query per category, engine and page
+        and let the ``QueryPlanner`` run them within the request's
+        ``max_results`` and ``budget``."""
+        engines = [engine.value for engine in request.engines or [request.search_engine]]
+        first_pages = [
+            SubQuery(category, engine, 0, dork)
+            for category in request.categories
+            for engine in dict.fromkeys(engines)
+            for dork in self._dorks(request, [category], engine)
         ]
+        planner = QueryPlanner(
+            fetch=lambda sub: self.fetch_serp(sub.dork, request, sub.engine, sub.page),
+            is_cached=lambda sub: _serp_cache.contains(self._serp_key(sub.dork, request, sub.engine, sub.page)),
+        )
+        planned = planner.run(first_pages, request.max_results, request.budget)
+        return SerpFetch("\n".join(planned.dorks), planned.results, tuple(planned.archive_keys), planned.plan)
+
+    def _dorks(self, request: TargetTextSearchSchema, categories: List[str], engine: str) -> Tuple[str, ...]:
+        if not request.name_variants:
+            return (build_combined_dork(target_name=request.name, categories=categories),)
+        return build_variant_dorks(
+            name_variants(request.name, request.country.value),
+            tuple(categories),
+            engine,
+            settings.NAME_VARIANTS_MAX_QUERIES,
+        )
+
+    def fetch_organic_results(
+        self, dork_query: str, request: TargetTextSearchSchema
+    ) -> Optional[List[dict]]:
+        """Return SerpAPI organic results, shared through the search cache."""
+        serp = self.fetch_serp(dork_query, request)
+        return serp[0] if serp else None
 
-        return results
+    def fetch_serp(
+        self,
+        dork_query: str,
+        request: TargetTextSearchSchema,
+        engine: Optional[str] = None,
+        page: int = 0,
+    ) -> Optional[Tuple[List[dict], Optional[str]]]:
+        """Return ``(organic_results, archive_key)``, shared through the search cache.
+
+        The raw body is archived when it is fetched, so scans answered from
+        the cache still reference it. ``engine`` defaults to the request's.
+        """
+        engine = engine or request.search_engine.value
+
+        def fetch() -> Optional[Tuple[List[dict], Optional[str]]]:
+            serp_api = SerpAPIController(api_key=os.getenv("SERPAPI_KEY"))
+            response, status_code = serp_api.search(
+                query=dork_query,
+                location=request.country.value,
+                engine=engine,
+                page=page,
+            )
+            if status_code != 200:
+                return None
+            organic_results = response.json().get("organic_results")
+            if not organic_results:
+                return None
+            return organic_results, response_archive.put("serpapi", response.content)
+
+        return _serp_cache.get_or_fetch(self._serp_key(dork_query, request, engine, page), fetch)
+
+    @staticmethod
+    def _serp_key(dork_query: str, request: TargetTextSearchSchema, engine: str, page: int) -> tuple:
+        key = (dork_query, request.country.value, engine)
+        return key + (page,) if page else key
 
 
 class TargetImageService:
     def __init__(self):
         self.client = get_facecrawler_service()
 
-    def send_image(self, target_image: str, user_id: UUID) -> TargetSendImageSchemaResponse:
-        response = self.client.handler.send_image(target_image)
+    def send_image(
+        self,
+        target_image: bytes,
+        user_id: UUID,
+        parent_scan_id: Optional[UUID] = None,
+        reuse_similar: bool = False,
+    ) -> TargetSendImageSchemaResponse:
+        """Preprocess and upload a picture; raises ``ValueError`` if it cannot be decoded.
+
+        With ``reuse_similar``, a completed search of the user's own for a
+        near-identical picture (``IMAGE_PHASH_MAX_DISTANCE``) is returned
+        instead of starting a new FaceCrawler run.
+        """
+        with span("image_preprocess"):
+            image, image_metadata = prepare_image(target_image)
+        phash = int(image_metadata["phash"], 16)
+
+        if reuse_similar:
+            reused = self.find_reusable_search(phash, user_id)
+            if reused is not None:
+                scan, distance = reused
+                return TargetSendImageSchemaResponse(
+                    status="success",
+                    message=f"reused search of a similar image (distance {distance}).",
+                    id_search=scan.id_search,
+                    reused_scan_id=scan.scan_id,
+                    distance=distance,
+                )
+
+        response = self.client.handler.send_image(image)
 
         if response.status_code != 200:
             return TargetSendImageSchemaResponse(
@@ -87,24 +276,224 @@ class TargetImageService:
                 status="error", message=result["message"]
             )
 
+        with get_session() as session:
+            scan_repo = BaseRepository[ScanHistory, CreateScanSchema, None](ScanHistory)
+            scan = scan_repo.create(
+                session=session,
+                obj_in=CreateScanSchema(
+                    user_id=user_id,
+                    query=str(result["id_search"]),
+                    engine="facecrawler",
+                    search_type="image",
+                    status="STARTED",
+                    image_metadata=image_metadata,
+                    id_search=result["id_search"],
+                    parent_scan_id=parent_scan_id,
+                ),
+            )
+            session.add(ImageHash(scan_id=scan.scan_id, user_id=user_id, phash=to_signed64(phash)))
+        phash_index.mark_stale()
+
         return TargetSendImageSchemaResponse(
             status="success", message=result["message"], id_search=result["id_search"]
         )
 
+    def find_reusable_search(self, phash: int, user_id: UUID) -> Optional[Tuple[ScanHistory, int]]:
+        """The user's nearest completed image scan within ``IMAGE_PHASH_MAX_DISTANCE``."""
+        nearest = phash_index.nearest(
+            phash, user_id, settings.IMAGE_PHASH_MAX_DISTANCE, settings.IMAGE_PHASH_MAX_MATCHES
+        )
+        if not nearest:
+            return None
+        with get_session() as session:
+            completed = {
+                scan.scan_id: scan
+                for scan in session.execute(
+                    select(ScanHistory).where(
+                        ScanHistory.scan_id.in_([scan_id for scan_id, _ in nearest]),
+                        within_retention(ScanHistory.timestamp),
+                        ScanHistory.status == "COMPLETED",
+                        ScanHistory.id_search.is_not(None),
+                    )
+                ).scalars()
+            }
+            session.expunge_all()
+        for scan_id, distance in nearest:
+            if scan_id in completed:
+                return completed[scan_id], distance
+        return None
+
     def check_image_search(
         self, request: TargetImageSearchSchema, user_id: UUID
     ) -> ListTargetsImageResponse:
-        response = self.client.check_progress(request.id_search, demo=request.demo)
+        scan_id, response = self.resolve_search(request.id_search, user_id, demo=request.demo)
+
+        if scan_id is not None:
+            return self._stored_page(scan_id, request.limit, request.offset)
 
         if response.get("message").startswith("error"):
             return ListTargetsImageResponse(
                 status="error", message=response.get("message"), data=[]
             )
 
+        data = response.get("data", [])
         return ListTargetsImageResponse(
             status="success",
             message=response.get("message"),
-            data=response.get("data", []),
+            data=data[request.offset:request.offset + request.limit],
             progress=response.get("progress", 0),
-            total=len(response.get("data", [])),
+            total=len(data),
         )
+
+    def stored_fingerprint(
+        self, request: TargetImageSearchSchema, user_id: UUID
+    ) -> Optional[tuple]:
+        """What determines the page of a completed search, without loading its matches.
+
+        ``None`` while the search is still running. Stored matches never
+        change once the scan is complete, so the scan, its match count and
+        the page bounds identify the response.
+        """
+        with get_session() as session:
+            scan = self._find_scan(session, request.id_search, user_id, for_update=False)
+            if scan is None or scan.status != "COMPLETED":
+                return None
+            total = session.execute(
+                select(func.count()).where(
+                    TargetResult.scan_id == scan.scan_id,
+                    within_retention(TargetResult.scan_timestamp),
+                )
+            ).scalar_one()
+            return scan.scan_id, scan.status, total, request.limit, request.offset
+
+    def resolve_search(
+        self, id_search: str, user_id: UUID, demo: bool = False
+    ) -> Tuple[Optional[UUID], Optional[dict]]:
+        """Return ``(scan_id, None)`` once the search results are stored.
+
+        FaceCrawler is only polled while the search is still running; the
+        poll that sees it complete stores the matches, and every later call
+        is answered from the database. While running (or on error, or in demo
+        mode, which is never stored) returns ``(None, upstream_response)``.
+        """
+        with get_session() as session:
+            scan = self._find_scan(session, id_search, user_id, for_update=False)
+            if scan is not None and scan.status == "COMPLETED":
+                return scan.scan_id, None
+
+        response = self.client.check_progress(id_search, demo=demo)
+        raw = response.pop("raw", None)
+        if demo or response.get("progress") != 100 or response.get("message").startswith("error"):
+            return None, response
+        return self._store_results(
+            id_search, user_id, response.get("data", []), raw
+        ), None
+
+    def stored_matches(self, scan_ids: List[UUID]) -> Dict[UUID, List[dict]]:
+        """Stored matches of several completed image scans, keyed by scan."""
+        matches: Dict[UUID, List[dict]] = {scan_id: [] for scan_id in scan_ids}
+        if not scan_ids:
+            return matches
+        with get_session() as session:
+            rows = session.execute(
+                select(TargetResult).where(
+                    TargetResult.scan_id.in_(scan_ids), within_retention(TargetResult.scan_timestamp)
+                )
+            ).scalars().all()
+            for row in rows:
+                matches[row.scan_id].append(self._match(row))
+        return matches
+
+    def _find_scan(
+        self, session, id_search: str, user_id: UUID, for_update: bool = True
+    ) -> Optional[ScanHistory]:
+        stmt = (
+            select(ScanHistory)
+            .where(
+                ScanHistory.id_search == id_search,
+                ScanHistory.user_id == user_id,
+                ScanHistory.search_type == "image",
+                within_retention(ScanHistory.timestamp),
+            )
+            .order_by(ScanHistory.timestamp.desc())
+            .limit(1)
+        )
+        if for_update:
+            stmt = stmt.with_for_update()
+        return session.execute(stmt).scalar_one_or_none()
+
+    def _store_results(
+        self, id_search: str, user_id: UUID, items: List[dict], raw: Optional[bytes] = None
+    ) -> UUID:
+        archive_key = response_archive.put("facecrawler", raw) if raw else None
+        with get_session() as session:
+            scan = self._find_scan(session, id_search, user_id)
+            if scan is None:
+                # Searches started before uploads were recorded get their scan now.
+                scan_repo = BaseRepository[ScanHistory, CreateScanSchema, None](ScanHistory)
+                scan = scan_repo.create(
+                    session=session,
+                    obj_in=CreateScanSchema(
+                        user_id=user_id,
+                        query=id_search,
+                        engine="facecrawler",
+                        search_type="image",
+                        status="STARTED",
+                        image_metadata={},
+                        id_search=id_search,
+                    ),
+                )
+            if scan.status == "COMPLETED":
+                # A concurrent poll already stored this search.
+                return scan.scan_id
+
+            session.add_all([
+                TargetResult(
+                    scan_id=scan.scan_id,
+                    scan_timestamp=scan.timestamp,
+                    title=item.get("guid"),
+                    link=item.get("url"),
+                    image_url=item.get("url"),
+                    snippet=item.get("snippet"),
+                    source_type="FaceCrawler",
+                    score=item.get("score"),
+                )
+                for item in items
+            ])
+            scan.status = "COMPLETED"
+            scan.raw_response_key = archive_key
+            scan.image_metadata = {**(scan.image_metadata or {}), "matches": len(items)}
+            scan_id = scan.scan_id
+
+        GraphService().index_image_scan(scan_id, user_id, id_search, items)
+        return scan_id
+
+    def _stored_page(self, scan_id: UUID, limit: int, offset: int) -> ListTargetsImageResponse:
+        in_scan = (TargetResult.scan_id == scan_id, within_retention(TargetResult.scan_timestamp))
+        with get_session() as session:
+            total = session.execute(
+                select(func.count()).where(*in_scan)
+            ).scalar_one()
+            rows = session.execute(
+                select(TargetResult)
+                .where(*in_scan)
+                .order_by(TargetResult.score.desc().nulls_last(), TargetResult.result_id)
+                .limit(limit)
+                .offset(offset)
+            ).scalars().all()
+            return ListTargetsImageResponse(
+                status="success",
+                message="search complete.",
+                data=[self._match(row) for row in rows],
+                progress=100,
+                total=total,
+            )
+
+    @staticmethod
+    def _match(row: TargetResult) -> dict:
+        return {
+            "guid": row.title,
+            "score": row.score,
+            "url": row.image_url,
+            "snippet": row.snippet,
+        }
@@ -0,0 +1,122 @@
+from modules.target.schemas import (
+    TargetUsernameSearchSchema,
+    UsernameSiteResponse,
+    UsernameSearchSummaryResponse,
+    CreateScanSchema,
+)
+from modules.target.domain.target_graph import GraphService
+from services.usernames.username_checker import (
+    SiteTemplate,
+    UsernameCheck,
+    load_sites,
+    username_checker,
+)
+from database.models.db_models import ScanHistory, TargetResult
+from database.write_behind import scan_writer
+from settings import settings
+from collections import Counter
+from typing import AsyncIterator, List, Tuple
+from uuid import UUID, uuid4
+import asyncio
+import time
+
+
+class TargetUsernameService:
+    """Looks a handle up on every site template and streams the outcomes.
+
+    One NDJSON line is yielded per site as its check finishes (only hits
+    unless ``include_missing``), followed by a summary line. Once the sweep
+    completes, the sites holding the account are stored as a ``username``
+    scan and linked to the handle in the entity graph.
+    """
+
+    def select_sites(self, request: TargetUsernameSearchSchema) -> Tuple[SiteTemplate, ...]:
+        """Sites matching the request filters; raises ``ValueError`` for unknown names."""
+        sites = load_sites(settings.USERNAME_SITES_FILE)
+        if request.sites:
+            by_name = {site.name.lower(): site for site in sites}
+            unknown = [name for name in request.sites if name.lower() not in by_name]
+            if unknown:
+                raise ValueError(f"Unknown sites: {', '.join(unknown[:20])}")
+            sites = tuple(by_name[name.lower()] for name in dict.fromkeys(request.sites))
+        if request.categories:
+            categories = {category.lower() for category in request.categories}
+            sites = tuple(site for site in sites if site.category in categories)
+        if not sites:
+            raise ValueError("No sites match the request")
+        return sites
+
+    async def run(
+        self,
+        request: TargetUsernameSearchSchema,
+        sites: Tuple[SiteTemplate, ...],
+        user_id: UUID,
+    ) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        counts: Counter = Counter()
+        found: List[UsernameCheck] = []
+        async for check in username_checker.sweep(request.username, sites):
+            counts[check.status] += 1
+            if check.status == "found":
+                found.append(check)
+            elif not request.include_missing:
+                continue
+            yield UsernameSiteResponse(**check._asdict()).model_dump_json() + "\n"
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        scan_id = await asyncio.to_thread(
+            self._store, request.username, found, counts, len(sites), elapsed_ms, user_id
+        )
+        yield UsernameSearchSummaryResponse(
+            scan_id=str(scan_id),
+            username=request.username,
+            sites=len(sites),
+            found=counts["found"],
+            not_found=counts["not_found"],
+            invalid=counts["invalid"],
+            errors=counts["error"],
+            elapsed_ms=elapsed_ms,
+        ).model_dump_json() + "\n"
+
+    def _store(
+        self,
+        username: str,
+        found: List[UsernameCheck],
+        counts: Counter,
+        sites: int,
+        elapsed_ms: float,
+        user_id: UUID,
+    ) -> UUID:
+        scan_id = uuid4()
+        scan = CreateScanSchema(
+            user_id=user_id,
+            query=username,
+            engine="usernames",
+            search_type="username",
+            status="COMPLETED",
+            image_metadata={
+                "sites": sites,
+                "found": counts["found"],
+                "errors": counts["error"],
+                "elapsed_ms": elapsed_ms,
+            },
+        )
+        scan_writer.add(
+            [(ScanHistory, {"scan_id": scan_id, **scan.model_dump()})]
+            + [
+                (TargetResult, {
+                    "result_id": uuid4(),
+                    "scan_id": scan_id,
+                    "scan_timestamp": scan.timestamp,
+                    "title": check.site,
+                    "link": check.url,
+                    "snippet": check.category,
+                    "source_type": "Username",
+                })
+                for check in found
+            ]
+        )
+        GraphService().index_username_scan(
+            scan_id, user_id, username, [check.url for check in found]
+        )
+        return scan_id
@@ -0,0 +1,286 @@
+from modules.target.schemas import (
+    TargetTextSearchSchema,
+    TargetTextSchemaResponse,
+    CreateWatchlistSchema,
+    WatchlistRunResponse,
+)
+from modules.target.domain.target_search import TargetSearchService
+from modules.target.domain.target_graph import GraphService
+from modules.target.domain.target_archive import scan_responses
+from database.models.db_models import ScanHistory, ScanResponse, TargetResult, Watchlist
+from database.session import get_session
+from services.webhooks.url_guard import UnsafeURLError, check_public_url
+from config_logging import api_logger
+from settings import settings
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from datetime import datetime, timedelta
+from typing import List, Optional
+from urllib.parse import urlsplit
+from uuid import UUID
+import asyncio
+import hashlib
+import random
+import requests
+
+
+def fingerprint(link: str) -> str:
+    """Stable 64-bit fingerprint of a result link, ignoring case, fragment and trailing slash."""
+    parts = urlsplit(link.strip())
+    normalized = f"{parts.netloc.lower()}{parts.path.rstrip('/')}?{parts.query}"
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _next_run(previous: datetime, interval: timedelta, now: datetime) -> datetime:
+    """Advance on the entry's own grid so runs stay spread across the window.
+
+    A small jitter keeps entries created together from converging; entries
+    that fell behind (e.g. after downtime) are re-spread over one interval
+    instead of all firing at once.
+    """
+    jitter = interval.total_seconds() * settings.WATCHLIST_JITTER_RATIO
+    next_run = previous + interval + timedelta(seconds=random.uniform(-jitter, jitter))
+    if next_run <= now:
+        next_run = now + timedelta(seconds=random.uniform(0, interval.total_seconds()))
+    return next_run
+
+
+class WatchlistService:
+    """Scheduled re-scans that persist only what changed since the last run.
+
+    Each entry keeps the fingerprint set of its last result list. A run
+    fetches the current results through ``TargetSearchService``, stores a
+    ``ScanHistory`` row with the new/removed counts and ``TargetResult`` rows
+    only for results that were not seen before.
+    """
+
+    def __init__(self):
+        self.search_service = TargetSearchService()
+
+    def create(self, request: CreateWatchlistSchema, user_id: UUID) -> Watchlist:
+        """Store a new entry; raises ``UnsafeURLError`` if ``notify_url`` resolves to a non-public host."""
+        if request.notify_url:
+            check_public_url(str(request.notify_url))
+        interval = timedelta(hours=request.interval_hours)
+        first_run = datetime.utcnow() + timedelta(
+            seconds=random.uniform(0, interval.total_seconds())
+        )
+        with get_session() as session:
+            entry = Watchlist(
+                user_id=user_id,
+                target=request.target.model_dump(mode="json"),
+                interval_hours=request.interval_hours,
+                notify_url=str(request.notify_url) if request.notify_url else None,
+                next_run_at=first_run,
+            )
+            session.add(entry)
+            session.flush()
+            session.refresh(entry)
+            session.expunge(entry)
+            return entry
+
+    def list(self, user_id: UUID) -> List[Watchlist]:
+        with get_session() as session:
+            entries = session.execute(
+                select(Watchlist)
+                .where(Watchlist.user_id == user_id, Watchlist.is_active.is_(True))
+                .order_by(Watchlist.created_at)
+            ).scalars().all()
+            session.expunge_all()
+            return entries
+
+    def delete(self, watch_id: UUID, user_id: UUID) -> bool:
+        with get_session() as session:
+            entry = session.get(Watchlist, watch_id)
+            if entry is None or entry.user_id != user_id or not entry.is_active:
+                return False
+            entry.is_active = False
+            return True
+
+    def changes(self, watch_id: UUID, user_id: UUID, limit: int) -> Optional[List[WatchlistRunResponse]]:
+        with get_session() as session:
+            entry = session.get(Watchlist, watch_id)
+            if entry is None or entry.user_id != user_id:
+                return None
+            scans = session.execute(
+                select(ScanHistory)
+                .where(ScanHistory.watch_id == watch_id)
+                .options(selectinload(ScanHistory.results))
+                .order_by(ScanHistory.timestamp.desc())
+                .limit(limit)
+            ).scalars().all()
+            return [
+                WatchlistRunResponse(
+                    scan_id=scan.scan_id,
+                    timestamp=scan.timestamp,
+                    new=scan.image_metadata.get("new", 0),
+                    removed=scan.image_metadata.get("removed", 0),
+                    total=scan.image_metadata.get("total", 0),
+                    data=[
+                        TargetTextSchemaResponse(
+                            title=r.title or "",
+                            link=r.link or "",
+                            snippet=r.snippet or "",
+                            source=r.source_type or "",
+                        )
+                        for r in scan.results
+                    ],
+                )
+                for scan in scans
+            ]
+
+    def claim_due(self, limit: int) -> List[UUID]:
+        """Reserve due entries by moving their next run forward.
+
+        ``SKIP LOCKED`` lets several workers poll concurrently without
+        running the same entry twice.
+        """
+        now = datetime.utcnow()
+        with get_session() as session:
+            entries = session.execute(
+                select(Watchlist)
+                .where(Watchlist.is_active.is_(True), Watchlist.next_run_at <= now)
+                .order_by(Watchlist.next_run_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            for entry in entries:
+                entry.next_run_at = _next_run(
+                    entry.next_run_at, timedelta(hours=entry.interval_hours), now
+                )
+            return [entry.watch_id for entry in entries]
+
+    def run_entry(self, watch_id: UUID) -> Optional[WatchlistRunResponse]:
+        with get_session() as session:
+            entry = session.get(Watchlist, watch_id)
+            if entry is None or not entry.is_active:
+                return None
+            request = TargetTextSearchSchema(**entry.target)
+            previous = set(entry.fingerprints or [])
+            user_id = entry.user_id
+            notify_url = entry.notify_url
+
+        dork_query, results, archive_keys, _ = self.search_service.fetch_results(request)
+        if not results and previous:
+            api_logger.warning(f"Watchlist {watch_id}: empty result set, keeping previous fingerprints")
+            return None
+
+        current = {}
+        for result in results:
+            if result.link:
+                current.setdefault(fingerprint(result.link), result)
+        new_fingerprints = [fp for fp in current if fp not in previous]
+        removed = len(previous - current.keys())
+
+        with get_session() as session:
+            scan = ScanHistory(
+                timestamp=datetime.utcnow(),
+                user_id=user_id,
+                watch_id=watch_id,
+                query=dork_query,
+                engine=request.search_engine.value,
+                search_type="watchlist",
+                status="COMPLETED",
+                raw_response_key=archive_keys[0] if archive_keys else None,
+                image_metadata={
+                    "new": len(new_fingerprints),
+                    "removed": removed,
+                    "total": len(current),
+                },
+            )
+            session.add(scan)
+            session.flush()
+            session.add_all([
+                TargetResult(
+                    scan_id=scan.scan_id,
+                    scan_timestamp=scan.timestamp,
+                    title=current[fp].title,
+                    link=current[fp].link,
+                    snippet=current[fp].snippet,
+                    source_type=current[fp].source,
+                )
+                for fp in new_fingerprints
+            ])
+            session.add_all([ScanResponse(**row) for row in scan_responses(scan.scan_id, archive_keys)])
+            entry = session.get(Watchlist, watch_id)
+            entry.fingerprints = sorted(current)
+            entry.last_scan_id = scan.scan_id
+            entry.last_run_at = datetime.utcnow()
+            run = WatchlistRunResponse(
+                scan_id=scan.scan_id,
+                timestamp=scan.timestamp,
+                new=len(new_fingerprints),
+                removed=removed,
+                total=len(current),
+                data=[current[fp] for fp in new_fingerprints],
+            )
+
+        if run.new:
+            GraphService().index_text_scan(run.scan_id, user_id, request, run.data)
+        if run.new or run.removed:
+            self._notify(watch_id, notify_url, run)
+        return run
+
+    def _notify(self, watch_id: UUID, notify_url: Optional[str], run: WatchlistRunResponse):
+        api_logger.info(
+            f"Watchlist {watch_id}: {run.new} new, {run.removed} removed results",
+            extra={"watch_id": str(watch_id), "scan_id": str(run.scan_id)},
+        )
+        if not notify_url:
+            return
+        try:
+            # Re-checked on every send: the host's DNS may have changed since creation.
+            check_public_url(notify_url)
+            requests.post(
+                notify_url,
+                data=run.model_dump_json(),
+                headers={"Content-Type": "application/json"},
+                timeout=10,
+                allow_redirects=False,
+            )
+        except UnsafeURLError as e:
+            api_logger.warning(f"Watchlist {watch_id}: notification refused: {str(e)}")
+        except requests.RequestException as e:
+            api_logger.error(f"Watchlist {watch_id}: notification failed: {str(e)}")
+
+
+class WatchlistScheduler:
+    """In-process poller that runs due watchlist entries off the event loop."""
+
+    def __init__(self, service: Optional[WatchlistService] = None):
+        self.service = service or WatchlistService()
+        self._task: Optional[asyncio.Task] = None
+        self._runs = asyncio.Semaphore(settings.WATCHLIST_MAX_CONCURRENT_RUNS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                due = await asyncio.to_thread(
+                    self.service.claim_due, settings.WATCHLIST_CLAIM_LIMIT
+                )
+                await asyncio.gather(*(self._run(watch_id) for watch_id in due))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                api_logger.error(f"Watchlist scheduler error: {str(e)}", exc_info=True)
+            await asyncio.sleep(settings.WATCHLIST_POLL_SECONDS)
+
+    async def _run(self, watch_id: UUID):
+        async with self._runs:
+            try:
+                await asyncio.to_thread(self.service.run_entry, watch_id)
+            except Exception as e:
+                api_logger.error(f"Watchlist {watch_id} run failed: {str(e)}", exc_info=True)
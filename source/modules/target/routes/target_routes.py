@@ -1,20 +1,56 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from modules.target.controllers import (
     get_target_text_data,
+    get_target_text_batch,
+    search_target_username,
+    create_watchlist_entry,
+    list_watchlist_entries,
+    delete_watchlist_entry,
+    get_watchlist_changes,
+    search_target_results,
+    export_scan_results,
+    replay_archived_scans,
     send_target_image,
+    find_similar_images,
     get_target_image_data,
+    get_target_image_fingerprint,
+    send_target_image_batch,
+    get_target_image_batch_data,
+    get_graph_neighborhood,
 )
 from modules.target.schemas import (
     TargetTextSearchSchema,
+    TargetTextBatchSearchSchema,
+    TargetUsernameSearchSchema,
+    TargetReplaySchema,
+    CreateWatchlistSchema,
+    WatchlistResponse,
+    ListWatchlistResponse,
+    ListWatchlistChangesResponse,
+    ListTargetResultSearchResponse,
+    GraphResponse,
     TargetImageSearchSchema,
+    TargetImageBatchSearchSchema,
+    TargetImageBatchSendResponse,
+    TargetImageBatchResponse,
     ListTargetsResponse,
     TargetSendImageSchemaResponse,
+    ListSimilarImagesResponse,
     ListTargetsImageResponse,
 )
-from auth.config import get_current_active_user
+from auth.config import get_current_active_user, get_request_profiler
 from database.models.db_models import User
-import tempfile
-import os
+from monitoring.profiling import RequestProfiler, run_profiled
+from middleware.conditional import conditional_json, not_modified
+from modules.target.domain.target_batch import parse_targets_csv
+from modules.target.domain.target_export import EXPORT_MEDIA_TYPES
+from services.facecrawler.image_preprocessing import ImageWorkersUnavailable
+from services.webhooks.url_guard import UnsafeURLError
+from datetime import datetime
+from settings import settings
+from typing import List, Optional
+from uuid import UUID
 
 router = APIRouter(prefix="/target", tags=["targets"])
 
@@ -22,33 +58,286 @@ router = APIRouter(prefix="/target", tags=["targets"])
 @router.post("/text-search", response_model=ListTargetsResponse)
 def search_text_target(
     request: TargetTextSearchSchema,
+    current_user: User = Depends(get_current_active_user),
+    profiler: Optional[RequestProfiler] = Depends(get_request_profiler),
+):
+    return run_profiled(
+        profiler, ListTargetsResponse, get_target_text_data, request, current_user.user_id
+    )
+
+
+def _stream_batch(targets, current_user: User) -> StreamingResponse:
+    if len(targets) > settings.BATCH_MAX_TARGETS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_TARGETS} targets"
+        )
+    return StreamingResponse(
+        get_target_text_batch(targets, current_user.user_id),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/text-search/batch")
+def search_text_target_batch(
+    request: TargetTextBatchSearchSchema,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream one NDJSON line per target as it completes, then a summary line."""
+    return _stream_batch(request.targets, current_user)
+
+
+@router.post("/text-search/batch/csv")
+def search_text_target_batch_csv(
+    targets_file: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Same as /text-search/batch, reading targets from an uploaded CSV."""
+    try:
+        targets = parse_targets_csv(targets_file.file.read())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return _stream_batch(targets, current_user)
+
+
+@router.post("/username-search")
+def search_username_target(
+    request: TargetUsernameSearchSchema,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream one NDJSON line per site holding the handle as it is found, then a summary line."""
+    try:
+        results = search_target_username(request, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return StreamingResponse(results, media_type="application/x-ndjson")
+
+
+@router.post("/watchlist", response_model=WatchlistResponse, status_code=status.HTTP_201_CREATED)
+def create_watchlist(
+    request: CreateWatchlistSchema,
+    current_user: User = Depends(get_current_active_user)
+):
+    try:
+        return create_watchlist_entry(request, current_user.user_id)
+    except UnsafeURLError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"notify_url: {str(e)}"
+        )
+
+
+@router.get("/watchlist", response_model=ListWatchlistResponse)
+def list_watchlist(current_user: User = Depends(get_current_active_user)):
+    return list_watchlist_entries(current_user.user_id)
+
+
+@router.delete("/watchlist/{watch_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_watchlist(
+    watch_id: UUID,
+    current_user: User = Depends(get_current_active_user)
+):
+    if not delete_watchlist_entry(watch_id, current_user.user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Watchlist entry not found")
+
+
+@router.get("/watchlist/{watch_id}/changes", response_model=ListWatchlistChangesResponse)
+def get_watchlist_entry_changes(
+    watch_id: UUID,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Return the latest re-scans of a watchlist entry with only their new results."""
+    changes = get_watchlist_changes(watch_id, current_user.user_id, limit)
+    if changes is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Watchlist entry not found")
+    return changes
+
+
+@router.get("/results/search", response_model=ListTargetResultSearchResponse)
+def search_results(
+    q: str = Query(..., min_length=2, max_length=200),
+    scan_id: Optional[UUID] = None,
+    category: Optional[str] = Query(None, pattern="^(social|files|logs)$"),
+    user_id: Optional[UUID] = Query(None, description="Admins only: search another user's results"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_active_user)
 ):
-    return get_target_text_data(request, current_user.user_id)
+    """Full-text search over stored result titles and snippets, ranked and highlighted."""
+    if user_id is not None and user_id != current_user.user_id and not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    if user_id is None and not current_user.is_admin:
+        user_id = current_user.user_id
+    return search_target_results(q, user_id, scan_id, category, limit, offset)
+
+
+@router.get("/graph/{node:path}", response_model=GraphResponse)
+def get_graph(
+    node: str,
+    depth: int = Query(2, ge=1, le=settings.GRAPH_MAX_DEPTH),
+    provenance: bool = Query(False, description="Include up to 10 scan IDs per edge"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Pivot from an entity (``domain:example.com``, ``handle:jdoe``, ``url:...``) across scans.
+
+    Non-admins only see edges produced by their own scans.
+    """
+    try:
+        response = get_graph_neighborhood(
+            node, depth, None if current_user.is_admin else current_user.user_id, provenance
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if response is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Node not found")
+    return response
+
+
+@router.get("/scans/export")
+def export_scans(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    scan_id: Optional[UUID] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    user_id: Optional[UUID] = Query(None, description="Admins only: export another user's scans"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream every stored result (joined with its scan) as CSV, NDJSON or Parquet."""
+    if user_id is not None and user_id != current_user.user_id and not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    if user_id is None and not current_user.is_admin:
+        user_id = current_user.user_id
+    filename = f"scans-{datetime.utcnow():%Y%m%dT%H%M%S}.{format}"
+    return StreamingResponse(
+        export_scan_results(format, user_id, scan_id, since, until),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/replay")
+def replay_scans(
+    request: TargetReplaySchema,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Re-process archived upstream responses with the current pipeline, streamed as NDJSON.
+
+    No upstream calls are made; admins replay every user's scans.
+    """
+    return StreamingResponse(
+        replay_archived_scans(request, None if current_user.is_admin else current_user.user_id),
+        media_type="application/x-ndjson",
+    )
+
+
+def raise_image_workers_unavailable():
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Image processing unavailable, retry later.",
+        headers={"Retry-After": str(settings.BULKHEAD_RETRY_AFTER_SECONDS)},
+    )
 
 
 @router.post("/image-search/send", response_model=TargetSendImageSchemaResponse)
 def search_image_target(
     image_file: UploadFile = File(...),
+    reuse_similar: bool = Query(False),
     current_user: User = Depends(get_current_active_user)
 ):
-    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False, dir=".") as tmp:
-        tmp.write(image_file.file.read())
-        tmp.flush()
-        temp_path = tmp.name
-
     try:
-        response = send_target_image(temp_path)
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        return send_target_image(image_file.file.read(), current_user.user_id, reuse_similar)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file."
+        )
+    except ImageWorkersUnavailable:
+        raise_image_workers_unavailable()
 
-    return response
+
+@router.post("/image-search/similar", response_model=ListSimilarImagesResponse)
+def search_similar_images(
+    image_file: UploadFile = File(...),
+    max_distance: int = Query(settings.IMAGE_PHASH_MAX_DISTANCE, ge=0, le=32),
+    with_results: bool = Query(True),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Earlier image searches of the same picture, by perceptual-hash distance; admins see every user's."""
+    try:
+        return find_similar_images(
+            image_file.file.read(),
+            None if current_user.is_admin else current_user.user_id,
+            max_distance,
+            with_results,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file."
+        )
+    except ImageWorkersUnavailable:
+        raise_image_workers_unavailable()
 
 
 @router.post("/image-search/receive", response_model=ListTargetsImageResponse)
 def get_image_target(
     request: TargetImageSearchSchema,
+    http_request: Request,
+    current_user: User = Depends(get_current_active_user),
+    profiler: Optional[RequestProfiler] = Depends(get_request_profiler),
+):
+    """Poll a face search; send the last ``ETag`` as ``If-None-Match`` to get 304 when unchanged."""
+    # A completed search is answered from its fingerprint before any match is loaded.
+    fingerprint = get_target_image_fingerprint(request, current_user.user_id)
+    if fingerprint is not None:
+        unchanged = not_modified(http_request, *fingerprint)
+        if unchanged is not None:
+            return unchanged
+    response = run_profiled(
+        profiler, ListTargetsImageResponse, get_target_image_data, request, current_user.user_id
+    )
+    if isinstance(response, Response):
+        return response
+    if fingerprint is None:
+        fingerprint = (response.message, response.progress, response.total, response.data)
+    return conditional_json(http_request, response, *fingerprint)
+
+
+@router.post("/image-search/batch/send", response_model=TargetImageBatchSendResponse)
+def search_image_target_batch(
+    image_files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Upload several photos of one subject as a single face-search group."""
+    if len(image_files) > settings.IMAGE_BATCH_MAX_IMAGES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {settings.IMAGE_BATCH_MAX_IMAGES} images"
+        )
+    images = [(image.filename, image.file.read()) for image in image_files]
+    try:
+        return send_target_image_batch(images, current_user.user_id)
+    except ImageWorkersUnavailable:
+        raise_image_workers_unavailable()
+
+
+@router.post("/image-search/batch/receive", response_model=TargetImageBatchResponse)
+def get_image_target_batch(
+    request: TargetImageBatchSearchSchema,
+    http_request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
-    return get_target_image_data(request, current_user.user_id)
+    """Poll every search of a group and return their merged matches so far (ETag-aware)."""
+    response = get_target_image_batch_data(request, current_user.user_id)
+    if response is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image batch not found")
+    return conditional_json(
+        http_request, response,
+        response.group_id, response.message, response.searches, response.progress,
+        response.completed, response.failed, response.data,
+    )
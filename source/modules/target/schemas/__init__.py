@@ -1,13 +1,43 @@
 from .request_select_target import (
     TargetTextSearchSchema,
+    TargetTextBatchSearchSchema,
+    CreateWatchlistSchema,
+    TargetUsernameSearchSchema,
+    TargetReplaySchema,
     TargetImageSearchSchema,
+    TargetImageBatchSearchSchema,
     TargetImageSendSchema,
     CreateScanSchema,
 )
 from .response_select_target import (
     TargetTextSchemaResponse,
+    ContactEntityResponse,
+    SubdomainResponse,
+    DomainReconResponse,
+    TargetBatchItemResponse,
+    TargetBatchSummaryResponse,
+    WatchlistResponse,
+    ListWatchlistResponse,
+    WatchlistRunResponse,
+    ListWatchlistChangesResponse,
+    TargetResultSearchItem,
+    ListTargetResultSearchResponse,
+    GraphNodeResponse,
+    GraphEdgeResponse,
+    GraphResponse,
+    ReplayScanResponse,
+    ReplaySummaryResponse,
+    UsernameSiteResponse,
+    UsernameSearchSummaryResponse,
     TargetImageSchemaResponse,
     TargetSendImageSchemaResponse,
+    SimilarImageScanResponse,
+    ListSimilarImagesResponse,
+    TargetImageBatchItemResponse,
+    TargetImageBatchSendResponse,
+    TargetImageBatchResponse,
     ListTargetsImageResponse,
+    SubQueryResponse,
+    QueryPlanResponse,
     ListTargetsResponse,
 )
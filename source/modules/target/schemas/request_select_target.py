@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, HttpUrl
+import re
 from typing import Optional, List
 
 from enums.target_type import TargetType
@@ -6,6 +7,7 @@ from enums.search_type import SearchEnum
 from enums.country_type import ContryEnum
 from uuid import UUID
 from enums.engine_type import EngineEnum
+from services.webhooks.url_guard import check_url_syntax
 
 from pydantic import BaseModel, validator
 from datetime import datetime
@@ -13,13 +15,28 @@ from typing import List
 
 
 class TargetTextSearchSchema(BaseModel):
-    name: str
+    name: str = Field(..., min_length=1)
     type: TargetType
     categories: List[str] = Field(default_factory=list)
     domain: Optional[dict] = Field(default=None)
     country: ContryEnum = Field(default=ContryEnum.BRAZIL)
     search_type: SearchEnum = Field(default=SearchEnum.GOOGLE_SEARCH)
     search_engine: EngineEnum = Field(default=EngineEnum.GOOGLE)
+    name_variants: bool = Field(
+        default=False,
+        description="Also search accent-free, short, initial, nickname and alternate spellings of the name",
+    )
+    max_results: Optional[int] = Field(
+        default=None, ge=1, le=1000, description="Stop once this many distinct results are found"
+    )
+    budget: Optional[float] = Field(default=None, gt=0, description="SerpAPI credits to spend at most")
+    engines: Optional[List[EngineEnum]] = Field(
+        default=None, description="With max_results or budget: engines to plan over (default: search_engine)"
+    )
+
+    @validator("name", pre=True)
+    def strip_name(cls, v):
+        return v.strip() if isinstance(v, str) else v
 
     @validator("categories", each_item=True)
     def check_categories(cls, v):
@@ -34,10 +51,67 @@ class TargetTextSearchSchema(BaseModel):
             raise ValueError("categories list must not be empty")
         return v
 
+    @validator("domain")
+    def check_domain(cls, v):
+        if v is None:
+            return v
+        name = str(v.get("name") or "").strip().lower().rstrip(".")
+        if name.startswith("www."):
+            name = name[4:]
+        if not re.fullmatch(r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}", name):
+            raise ValueError("domain.name must be a domain such as example.com")
+        return {**v, "name": name}
+
+
+class TargetTextBatchSearchSchema(BaseModel):
+    targets: List[TargetTextSearchSchema] = Field(..., min_length=1)
+
+
+class CreateWatchlistSchema(BaseModel):
+    target: TargetTextSearchSchema
+    interval_hours: int = Field(default=168, ge=1, le=24 * 90)
+    notify_url: Optional[HttpUrl] = Field(default=None)
+
+    @validator("notify_url")
+    def check_notify_url(cls, v):
+        if v is None:
+            return v
+        if len(str(v)) > 500:
+            raise ValueError("notify_url must be at most 500 characters")
+        # Resolving the host blocks, and validation runs on the event loop;
+        # WatchlistService.create does the DNS check.
+        check_url_syntax(str(v))
+        return v
+
+
+class TargetUsernameSearchSchema(BaseModel):
+    username: str = Field(..., min_length=1, max_length=64, pattern=r"^[A-Za-z0-9._-]+$")
+    sites: Optional[List[str]] = Field(default=None, description="Site names; all sites when omitted")
+    categories: Optional[List[str]] = Field(default=None)
+    include_missing: bool = Field(default=False, description="Also stream sites without the account")
+
+
+class TargetReplaySchema(BaseModel):
+    """Archived scans to re-process: explicit ``scan_ids``, or the newest ones in a time range."""
+
+    scan_ids: Optional[List[UUID]] = Field(default=None, max_length=10000)
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    search_types: Optional[List[str]] = Field(default=None, description="e.g. person, watchlist, image")
+    limit: int = Field(default=1000, ge=1)
+    include_data: bool = Field(default=True, description="Stream the re-processed results, not only entities")
+
 
 class TargetImageSearchSchema(BaseModel):
     id_search: str
     demo: bool = False
+    limit: int = Field(default=100, ge=1, le=500)
+    offset: int = Field(default=0, ge=0)
+
+
+class TargetImageBatchSearchSchema(BaseModel):
+    group_id: UUID
+    demo: bool = False
 
 
 class TargetImageSendSchema(BaseModel):
@@ -52,3 +126,6 @@ class CreateScanSchema(BaseModel):
     search_type: str
     status: str
     image_metadata: dict
+    id_search: Optional[str] = None
+    parent_scan_id: Optional[UUID] = None
+    raw_response_key: Optional[str] = None
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Any, Dict
+from datetime import datetime
+from uuid import UUID
 
 
 class TargetTextSchemaResponse(BaseModel):
@@ -11,12 +13,224 @@ class TargetTextSchemaResponse(BaseModel):
     source: str
 
 
+class ContactEntityResponse(BaseModel):
+    """Contact entity extracted from a result, with a reference back to it."""
+
+    type: str
+    value: str
+    platform: Optional[str] = None
+    source_index: int
+    source_link: Optional[str] = None
+
+
+class SubdomainResponse(BaseModel):
+    name: str
+    sources: List[str] = Field(default_factory=list)
+    addresses: List[str] = Field(default_factory=list)
+
+
+class DomainReconResponse(BaseModel):
+    """DNS records and discovered subdomains of a company's domain."""
+
+    domain: str
+    records: Dict[str, List[str]] = Field(default_factory=dict)
+    subdomains: List[SubdomainResponse] = Field(default_factory=list)
+    errors: Dict[str, str] = Field(default_factory=dict)
+    complete: bool = Field(default=True)
+    elapsed_ms: float = 0.0
+
+
+class SubQueryResponse(BaseModel):
+    """One sub-query a planned text search issued."""
+
+    category: str
+    engine: str
+    page: int
+    cost: float
+    expected: float
+    results: int = 0
+    new: int = 0
+
+
+class QueryPlanResponse(BaseModel):
+    """How a text search with ``max_results``/``budget`` spent its credits."""
+
+    max_results: Optional[int] = None
+    budget: Optional[float] = None
+    credits: float = 0.0
+    stopped: str = Field(description="max_results, budget or exhausted")
+    planned: int = 0
+    cancelled: int = 0
+    subqueries: List[SubQueryResponse] = Field(default_factory=list)
+
+
 class ListTargetsResponse(BaseModel):
     """Schema for the list of target text search results."""
 
     message: str = Field(default="Success")
     data: List[Any] = Field(default_factory=list)
     total: int = Field(default=0)
+    entities: List[ContactEntityResponse] = Field(default_factory=list)
+    domain_recon: Optional[DomainReconResponse] = None
+    plan: Optional[QueryPlanResponse] = None
+
+
+class TargetBatchItemResponse(BaseModel):
+    """One streamed line of a batch text search."""
+
+    type: str = Field(default="result")
+    index: int
+    name: str
+    status: str
+    message: str = Field(default="Success")
+    data: List[TargetTextSchemaResponse] = Field(default_factory=list)
+    total: int = Field(default=0)
+    entities: List[ContactEntityResponse] = Field(default_factory=list)
+
+
+class TargetBatchSummaryResponse(BaseModel):
+    """Final streamed line of a batch text search."""
+
+    type: str = Field(default="summary")
+    scan_id: str
+    status: str
+    targets: int
+    completed: int
+    failed: int
+    results: int
+
+
+class WatchlistResponse(BaseModel):
+    """Schema for a registered watchlist target."""
+
+    watch_id: UUID
+    target: Dict[str, Any]
+    interval_hours: int
+    notify_url: Optional[str] = None
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+class ListWatchlistResponse(BaseModel):
+    message: str = Field(default="Success")
+    data: List[WatchlistResponse] = Field(default_factory=list)
+    total: int = Field(default=0)
+
+
+class WatchlistRunResponse(BaseModel):
+    """Delta produced by one watchlist re-scan."""
+
+    scan_id: UUID
+    timestamp: datetime
+    new: int
+    removed: int
+    total: int
+    data: List[TargetTextSchemaResponse] = Field(default_factory=list)
+
+
+class ListWatchlistChangesResponse(BaseModel):
+    message: str = Field(default="Success")
+    data: List[WatchlistRunResponse] = Field(default_factory=list)
+    total: int = Field(default=0)
+
+
+class TargetResultSearchItem(BaseModel):
+    """A stored result matching a full-text query."""
+
+    result_id: UUID
+    scan_id: UUID
+    title: Optional[str] = None
+    link: Optional[str] = None
+    snippet: Optional[str] = None
+    highlight: Optional[str] = None
+    rank: float
+    timestamp: datetime
+
+
+class ListTargetResultSearchResponse(BaseModel):
+    message: str = Field(default="Success")
+    query: str
+    data: List[TargetResultSearchItem] = Field(default_factory=list)
+    total: int = Field(default=0)
+
+
+class GraphNodeResponse(BaseModel):
+    id: int
+    kind: str
+    key: str
+    depth: int
+
+
+class GraphEdgeResponse(BaseModel):
+    source: int
+    target: int
+    scans: List[UUID] = Field(default_factory=list)
+
+
+class GraphResponse(BaseModel):
+    """Neighborhood of an entity-graph node."""
+
+    root: str
+    nodes: List[GraphNodeResponse] = Field(default_factory=list)
+    edges: List[GraphEdgeResponse] = Field(default_factory=list)
+    truncated: bool = Field(default=False)
+
+
+class ReplayScanResponse(BaseModel):
+    """One streamed line of a replay: a scan re-processed from its archived response."""
+
+    type: str = Field(default="result")
+    scan_id: str
+    search_type: str
+    query: Optional[str] = None
+    total: int = 0
+    data: List[Any] = Field(default_factory=list)
+    entities: List[ContactEntityResponse] = Field(default_factory=list)
+    # False when some of the scan's archived pages are gone.
+    complete: bool = Field(default=True)
+    error: Optional[str] = None
+
+
+class ReplaySummaryResponse(BaseModel):
+    """Last streamed line of a replay."""
+
+    type: str = Field(default="summary")
+    scans: int
+    replayed: int
+    failed: int
+    elapsed_ms: float
+
+
+class UsernameSiteResponse(BaseModel):
+    """One streamed line of a username search: the outcome on one site."""
+
+    type: str = Field(default="result")
+    site: str
+    category: str
+    url: str
+    status: str
+    http_status: Optional[int] = None
+    elapsed_ms: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class UsernameSearchSummaryResponse(BaseModel):
+    """Last streamed line of a username search."""
+
+    type: str = Field(default="summary")
+    scan_id: str
+    username: str
+    sites: int
+    found: int
+    not_found: int
+    invalid: int
+    errors: int
+    elapsed_ms: float
 
 
 class TargetImageSchemaResponse(BaseModel):
@@ -36,6 +250,7 @@ class ListTargetsImageResponse(BaseModel):
     data: List[Dict[str, Any]] = Field(default_factory=list)
     total: int = Field(default=0)
     progress: Optional[int] = Field(default=None)
+    entities: List[ContactEntityResponse] = Field(default_factory=list)
 
 
 class TargetSendImageSchemaResponse(BaseModel):
@@ -44,3 +259,54 @@ class TargetSendImageSchemaResponse(BaseModel):
     status: str
     message: str
     id_search: Optional[str] = None
+    reused_scan_id: Optional[UUID] = None
+    distance: Optional[int] = None
+
+
+class SimilarImageScanResponse(BaseModel):
+    """A previous image search whose picture is perceptually close to the upload."""
+
+    scan_id: UUID
+    id_search: Optional[str] = None
+    distance: int
+    status: str
+    timestamp: datetime
+    data: List[Dict[str, Any]] = Field(default_factory=list)
+    total: int = Field(default=0)
+
+
+class ListSimilarImagesResponse(BaseModel):
+    message: str = Field(default="Success")
+    phash: str
+    data: List[SimilarImageScanResponse] = Field(default_factory=list)
+    total: int = Field(default=0)
+
+
+class TargetImageBatchItemResponse(TargetSendImageSchemaResponse):
+    """Upload outcome of one image in a batch face search."""
+
+    index: int
+    filename: Optional[str] = None
+
+
+class TargetImageBatchSendResponse(BaseModel):
+    """Schema for a batch face search upload."""
+
+    status: str
+    message: str
+    group_id: UUID
+    items: List[TargetImageBatchItemResponse] = Field(default_factory=list)
+
+
+class TargetImageBatchResponse(BaseModel):
+    """Merged matches of every search in a batch face search."""
+
+    message: str = Field(default="Success")
+    group_id: UUID
+    searches: int = Field(default=0)
+    completed: int = Field(default=0)
+    failed: int = Field(default=0)
+    progress: int = Field(default=0)
+    data: List[Dict[str, Any]] = Field(default_factory=list)
+    total: int = Field(default=0)
+    entities: List[ContactEntityResponse] = Field(default_factory=list)
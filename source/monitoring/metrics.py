@@ -0,0 +1,147 @@
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from monitoring.profiling import span
+from monitoring.usage import usage_recorder
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served, by route group.",
+    ["method", "route_group"],
+    multiprocess_mode="livesum",
+)
+
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to external APIs.",
+    ["upstream", "operation"],
+    buckets=UPSTREAM_BUCKETS,
+)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total",
+    "Calls to external APIs by response status.",
+    ["upstream", "operation", "status"],
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors_total",
+    "External API calls that raised before returning a response.",
+    ["upstream", "operation", "error"],
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool size (excluding overflow).",
+    multiprocess_mode="livesum",
+)
+
+BULKHEAD_QUEUE_DEPTH = Gauge(
+    "bulkhead_queue_depth",
+    "Requests waiting for a bulkhead slot, by route group.",
+    ["route_group"],
+    multiprocess_mode="livesum",
+)
+BULKHEAD_REJECTED = Counter(
+    "bulkhead_rejected_total",
+    "Requests shed with 503 because the bulkhead queue was full.",
+    ["route_group"],
+)
+
+BCRYPT_DURATION = Histogram(
+    "auth_bcrypt_duration_seconds",
+    "Time spent hashing or verifying passwords.",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2),
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    ["cache", "result"],
+)
+
+
+class UpstreamCall:
+    """Holder that lets the instrumented block report the response status."""
+
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status = None
+
+
+@contextmanager
+def track_upstream(upstream: str, operation: str):
+    """Time an external API call and count it by status or error type."""
+    call = UpstreamCall()
+    start = time.perf_counter()
+    status = None
+    try:
+        with span(f"{upstream}.{operation}"):
+            yield call
+    except Exception as e:
+        UPSTREAM_ERRORS.labels(upstream, operation, type(e).__name__).inc()
+        raise
+    else:
+        UPSTREAM_REQUESTS.labels(upstream, operation, str(call.status)).inc()
+        status = call.status
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_REQUEST_DURATION.labels(upstream, operation).observe(elapsed)
+        usage_recorder.upstream(upstream, operation, status, elapsed)
+
+
+@contextmanager
+def track_bcrypt(operation: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        BCRYPT_DURATION.labels(operation).observe(time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+    usage_recorder.cache(cache, hit)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Serialize metrics, aggregating across workers in multiprocess mode."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,164 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config_logging import request_id_var
+from settings import settings
+
+PROFILE_DIR = Path(settings.PROFILE_DIR)
+
+_active_profiler: ContextVar[Optional["RequestProfiler"]] = ContextVar(
+    "active_profiler", default=None
+)
+
+
+class RequestProfiler:
+    """Sampling profiler bound to the thread that runs a single request.
+
+    A daemon thread reads the worker thread's frame every ``interval``
+    seconds and folds it into collapsed stacks (``a;b;c <count>``), the input
+    format of flamegraph.pl and speedscope. Named spans recorded through
+    :func:`span` are stored alongside the samples.
+    """
+
+    def __init__(self, label: str, interval: float = settings.PROFILE_SAMPLE_INTERVAL_MS / 1000):
+        self.profile_id = uuid.uuid4().hex
+        self.label = label
+        self.interval = interval
+        self.request_id = request_id_var.get()
+        self.stacks: Counter = Counter()
+        self.spans: list[dict] = []
+        self.duration = 0.0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        self._token = _active_profiler.set(self)
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._started
+        _active_profiler.reset(self._token)
+        self.save()
+        return False
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def add_span(self, name: str, start: float, end: float):
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self._started) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+        })
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.items())
+
+    def save(self):
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        data = {
+            "profile_id": self.profile_id,
+            "request_id": self.request_id,
+            "label": self.label,
+            "duration_ms": round(self.duration * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": sum(self.stacks.values()),
+            "spans": self.spans,
+            "folded": self.folded(),
+        }
+        (PROFILE_DIR / f"{self.profile_id}.json").write_text(json.dumps(data))
+        prune_profiles()
+
+
+def prune_profiles():
+    """Keep the newest ``PROFILE_MAX_FILES`` profiles, none older than ``PROFILE_MAX_AGE_HOURS``."""
+    oldest = time.time() - settings.PROFILE_MAX_AGE_HOURS * 3600
+    profiles = []
+    for path in PROFILE_DIR.glob("*.json"):
+        try:
+            profiles.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    profiles.sort(reverse=True)
+    for index, (mtime, path) in enumerate(profiles):
+        if index >= settings.PROFILE_MAX_FILES or mtime < oldest:
+            path.unlink(missing_ok=True)
+
+
+@contextmanager
+def span(name: str):
+    """Record a named span when the current request is being profiled."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.add_span(name, start, time.perf_counter())
+
+
+def run_profiled(profiler: Optional[RequestProfiler], response_model, fn, *args):
+    """Call ``fn(*args)``; under a profiler, also serialize inside the profile.
+
+    Profiled calls return a ready ``Response`` so serialization is captured
+    as a span and the profile ID can be sent back in ``X-Profile-ID``.
+    """
+    if profiler is None:
+        return fn(*args)
+
+    with profiler:
+        result = fn(*args)
+        with span("serialize"):
+            body = response_model.model_validate(result).model_dump_json()
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Profile-ID": profiler.profile_id},
+    )
+
+
+def load_profile(profile_id: str) -> Optional[dict]:
+    path = PROFILE_DIR / f"{profile_id}.json"
+    if not profile_id.isalnum() or not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):
+    if _active_profiler.get() is not None:
+        session.info["_profile_flush_start"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _after_flush(session, flush_context):
+    profiler = _active_profiler.get()
+    start = session.info.pop("_profile_flush_start", None)
+    if profiler is not None and start is not None:
+        profiler.add_span("db.flush", start, time.perf_counter())
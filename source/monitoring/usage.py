@@ -0,0 +1,96 @@
+import math
+import threading
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, NamedTuple, Tuple
+
+from settings import settings
+
+
+def latency_bucket(seconds: float) -> int:
+    """Histogram bucket of a duration: ``ceil(3 * log2(ms))``, 0 for a millisecond or less."""
+    ms = seconds * 1000
+    return math.ceil(3 * math.log2(ms)) if ms > 1 else 0
+
+
+def bucket_upper_ms(bucket: int) -> float:
+    return 2 ** (bucket / 3)
+
+
+class UsageDeltas(NamedTuple):
+    # (day, upstream, operation) -> [calls, errors, cost]
+    upstream: Dict[Tuple[date, str, str], list]
+    # (day, cache) -> [hits, misses]
+    cache: Dict[Tuple[date, str], list]
+    # (day, kind, name, bucket) -> count
+    latency: Counter
+
+
+class UsageRecorder:
+    """Per-process usage counters, drained into the daily rollup tables.
+
+    Upstream calls, cache lookups and request latencies are only seen in
+    memory, so instead of logging every event they are summed here per
+    day and flushed as increments by the rollup task.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = self._empty()
+
+    @staticmethod
+    def _empty() -> UsageDeltas:
+        return UsageDeltas({}, {}, Counter())
+
+    def upstream(self, upstream: str, operation: str, status, seconds: float):
+        """``status`` is ``None`` when the call raised.
+
+        Exceptions, 5xx and 429 count as errors (a 404 is an answer for some
+        upstreams); only responses below 400 are charged, at
+        ``UPSTREAM_COST_PER_CALL["<upstream>.<operation>"]`` or ``["<upstream>"]``.
+        """
+        day = datetime.utcnow().date()
+        code = status if isinstance(status, int) else 200
+        failed = status is None or code >= 500 or code == 429
+        costs = settings.UPSTREAM_COST_PER_CALL
+        cost = 0.0
+        if status is not None and code < 400:
+            cost = costs.get(f"{upstream}.{operation}", costs.get(upstream, 0.0))
+        with self._lock:
+            totals = self._deltas.upstream.setdefault((day, upstream, operation), [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += failed
+            totals[2] += cost
+            self._deltas.latency[(day, "upstream", f"{upstream}.{operation}", latency_bucket(seconds))] += 1
+
+    def cache(self, cache: str, hit: bool):
+        day = datetime.utcnow().date()
+        with self._lock:
+            totals = self._deltas.cache.setdefault((day, cache), [0, 0])
+            totals[0 if hit else 1] += 1
+
+    def latency(self, kind: str, name: str, seconds: float):
+        day = datetime.utcnow().date()
+        with self._lock:
+            self._deltas.latency[(day, kind, name, latency_bucket(seconds))] += 1
+
+    def drain(self) -> UsageDeltas:
+        with self._lock:
+            deltas, self._deltas = self._deltas, self._empty()
+        return deltas
+
+    def restore(self, deltas: UsageDeltas):
+        """Put back deltas whose flush failed, so the next flush retries them."""
+        with self._lock:
+            for key, totals in deltas.upstream.items():
+                current = self._deltas.upstream.setdefault(key, [0, 0, 0.0])
+                for i, value in enumerate(totals):
+                    current[i] += value
+            for key, totals in deltas.cache.items():
+                current = self._deltas.cache.setdefault(key, [0, 0])
+                for i, value in enumerate(totals):
+                    current[i] += value
+            self._deltas.latency.update(deltas.latency)
+
+
+usage_recorder = UsageRecorder()
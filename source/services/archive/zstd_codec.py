@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import zstandard
+
+
+class MissingDictionary(KeyError):
+    """A frame was compressed against a dictionary that is not loaded."""
+
+
+def content_key(raw: bytes) -> str:
+    """Content address of a raw body (hex SHA-256)."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def frame_dictionary(data: bytes) -> int:
+    """Dictionary ID recorded in a zstd frame header, 0 when none was used."""
+    return zstandard.get_frame_parameters(data).dict_id
+
+
+def train_dictionary(samples: List[bytes], size: int) -> bytes:
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+class ZstdCodec:
+    """zstd compression, optionally against trained dictionaries.
+
+    Frames record the ID of the dictionary they were compressed with, so
+    any frame can be decompressed once that dictionary is added; old
+    dictionaries must be kept for as long as their frames are. Compressor
+    and decompressor objects are not thread-safe and costly to prepare
+    with a dictionary, so each thread keeps its own.
+    """
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        self._dictionaries: Dict[int, zstandard.ZstdCompressionDict] = {}
+        self._local = threading.local()
+
+    def add_dictionary(self, data: bytes) -> int:
+        dictionary = zstandard.ZstdCompressionDict(data)
+        dict_id = dictionary.dict_id()
+        self._dictionaries.setdefault(dict_id, dictionary)
+        return dict_id
+
+    def has_dictionary(self, dict_id: int) -> bool:
+        return dict_id in self._dictionaries
+
+    def compress(self, raw: bytes, dict_id: Optional[int] = None) -> bytes:
+        return self._compressor(dict_id or 0).compress(raw)
+
+    def decompress(self, data: bytes) -> bytes:
+        dict_id = frame_dictionary(data)
+        if dict_id and dict_id not in self._dictionaries:
+            raise MissingDictionary(dict_id)
+        return self._decompressor(dict_id).decompress(data)
+
+    def _compressor(self, dict_id: int) -> zstandard.ZstdCompressor:
+        compressors = self._local.__dict__.setdefault("compressors", {})
+        compressor = compressors.get(dict_id)
+        if compressor is None:
+            dictionary = self._dictionaries[dict_id] if dict_id else None
+            compressor = compressors[dict_id] = zstandard.ZstdCompressor(
+                level=self.level, dict_data=dictionary, write_content_size=True
+            )
+        return compressor
+
+    def _decompressor(self, dict_id: int) -> zstandard.ZstdDecompressor:
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary = self._dictionaries[dict_id] if dict_id else None
+            decompressor = decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return decompressor
@@ -0,0 +1,101 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+import httpx
+
+from monitoring.metrics import record_cache, track_upstream
+from settings import settings
+
+
+def subdomains_of(domain: str, names) -> Set[str]:
+    """Normalize certificate names and keep the strict subdomains of ``domain``."""
+    suffix = f".{domain}"
+    found = set()
+    for name in names:
+        name = name.strip().lower().rstrip(".")
+        if name.startswith("*."):
+            name = name[2:]
+        if name.endswith(suffix) and " " not in name:
+            found.add(name)
+    return found
+
+
+class CertificateTransparencySource(ABC):
+    """Looks up names seen in certificates issued for a domain."""
+
+    name = "ct"
+
+    @abstractmethod
+    async def subdomains(self, domain: str) -> Set[str]:
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class CrtShSource(CertificateTransparencySource):
+    """crt.sh JSON search (``?q=%.<domain>&output=json``), cached per domain.
+
+    Certificate logs change slowly and crt.sh is slow, so answers are kept
+    for ``DOMAIN_CT_CACHE_TTL_SECONDS``. ``base_url`` can point at a local
+    stand-in.
+    """
+
+    name = "crt.sh"
+
+    def __init__(self, base_url: str, timeout: float, ttl: float, max_entries: int = 1024):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._client = httpx.AsyncClient(timeout=timeout)
+        self._entries: OrderedDict[str, Tuple[float, Set[str]]] = OrderedDict()
+
+    async def subdomains(self, domain: str) -> Set[str]:
+        entry = self._entries.get(domain)
+        record_cache("ct", entry is not None and entry[0] > time.monotonic())
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        with track_upstream("crtsh", "search") as call:
+            response = await self._client.get(
+                self.base_url, params={"q": f"%.{domain}", "output": "json"}
+            )
+            call.status = response.status_code
+        response.raise_for_status()
+        names = (
+            line
+            for cert in response.json()
+            for field in ("name_value", "common_name")
+            for line in (cert.get(field) or "").splitlines()
+        )
+        found = subdomains_of(domain, names)
+
+        self._entries[domain] = (time.monotonic() + self.ttl, found)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return found
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+CT_SOURCES = {
+    "crtsh": lambda: CrtShSource(
+        base_url=settings.DOMAIN_CT_BASE_URL,
+        timeout=settings.DOMAIN_CT_TIMEOUT_SECONDS,
+        ttl=settings.DOMAIN_CT_CACHE_TTL_SECONDS,
+    ),
+}
+
+
+def get_ct_source(name: str) -> Optional[CertificateTransparencySource]:
+    """The configured CT source, or ``None`` when CT lookups are disabled (``none``)."""
+    if name == "none":
+        return None
+    factory = CT_SOURCES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown certificate transparency source: {name}")
+    return factory()
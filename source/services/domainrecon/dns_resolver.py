@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from monitoring.metrics import record_cache, track_upstream
+
+
+class DnsAnswer(NamedTuple):
+    name: str
+    rdtype: str
+    status: str  # ok | nxdomain | error
+    records: Tuple[str, ...] = ()
+    ttl: int = 0
+
+
+def _rdata_text(rdtype: str, rdata) -> str:
+    if rdtype == "TXT":
+        return b"".join(rdata.strings).decode("utf-8", errors="replace")
+    if rdtype in ("MX", "NS", "CNAME"):
+        return rdata.to_text().rstrip(".")
+    return rdata.to_text()
+
+
+class CachingResolver:
+    """Async DNS lookups cached per ``(name, type)`` for the record's own TTL.
+
+    Answers are kept for the TTL the authoritative server gave them (the
+    SOA minimum for empty answers), clamped to ``[min_ttl, max_ttl]``;
+    NXDOMAIN is kept for ``negative_ttl`` and failures are not cached.
+    Concurrent lookups of the same record share one query. ``nameservers``
+    and ``port`` point the resolver somewhere other than the system
+    configuration, e.g. a local stand-in.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        nameservers: Sequence[str] = (),
+        port: int = 53,
+        timeout: float = 3.0,
+        min_ttl: int = 30,
+        max_ttl: int = 3600,
+        negative_ttl: int = 300,
+        max_entries: int = 50000,
+    ):
+        self.resolver = dns.asyncresolver.Resolver(configure=not nameservers)
+        if nameservers:
+            self.resolver.nameservers = list(nameservers)
+        self.resolver.port = port
+        self.resolver.lifetime = timeout
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, DnsAnswer]] = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def resolve(self, name: str, rdtype: str) -> DnsAnswer:
+        key = (name.lower().rstrip("."), rdtype)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            record_cache("dns", True)
+            return entry[1]
+
+        inflight = self._inflight.get(key)
+        record_cache("dns", inflight is not None)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            answer = await self._query(*key)
+            future.set_result(answer)
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; keep the loop from logging an unretrieved exception.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        return answer
+
+    async def resolve_many(self, name: str, rdtypes: Sequence[str]) -> Dict[str, List[str]]:
+        """Records of every type that resolved, keyed by type."""
+        answers = await asyncio.gather(*(self.resolve(name, rdtype) for rdtype in rdtypes))
+        return {answer.rdtype: list(answer.records) for answer in answers if answer.records}
+
+    async def _query(self, name: str, rdtype: str) -> DnsAnswer:
+        try:
+            with track_upstream("dns", rdtype) as call:
+                answer = await self.resolver.resolve(name, rdtype, raise_on_no_answer=False)
+                call.status = "ok"
+        except dns.resolver.NXDOMAIN:
+            result = DnsAnswer(name, rdtype, "nxdomain", ttl=self.negative_ttl)
+            self._store((name, rdtype), result, self.negative_ttl)
+            return result
+        except (dns.exception.DNSException, OSError):
+            return DnsAnswer(name, rdtype, "error")
+
+        records = tuple(sorted(_rdata_text(rdtype, rdata) for rdata in answer.rrset or ()))
+        ttl = int(answer.expiration - time.time())
+        ttl = max(self.min_ttl, min(ttl, self.max_ttl))
+        result = DnsAnswer(name, rdtype, "ok", records, ttl)
+        self._store((name, rdtype), result, ttl)
+        return result
+
+    def _store(self, key: Tuple[str, str], answer: DnsAnswer, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
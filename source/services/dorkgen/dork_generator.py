@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Sequence, Tuple
 
+from settings import settings
 
 
 class DorkingStrategy(ABC):
@@ -7,6 +10,11 @@ class DorkingStrategy(ABC):
     def get_dork(self, target_name: str) -> str:
         pass
 
+    @abstractmethod
+    def get_filter(self) -> str:
+        """The strategy's operators without the name, for name groups."""
+        pass
+
 
 class SocialDorking(DorkingStrategy):
     def get_dork(self, target_name: str) -> str:
@@ -16,6 +24,9 @@ class SocialDorking(DorkingStrategy):
         ]
         return " OR ".join(parts)
 
+    def get_filter(self) -> str:
+        return "(site:facebook.com OR site:twitter.com)"
+
 
 class FilesDorking(DorkingStrategy):
     def get_dork(self, target_name: str) -> str:
@@ -25,6 +36,9 @@ class FilesDorking(DorkingStrategy):
         ]
         return " OR ".join(parts)
 
+    def get_filter(self) -> str:
+        return "(filetype:pdf OR filetype:xls)"
+
 
 class DorkingFactory:
     strategies = {
@@ -46,3 +60,56 @@ def build_combined_dork(target_name: str, categories: list[str]) -> str:
         strat = DorkingFactory.get_strategy(cat)
         blocks.append(strat.get_dork(target_name))
     return " AND ".join(blocks)
+
+
+def build_subdomain_dork(domain: str) -> str:
+    """Pages on any subdomain of ``domain`` other than the main site."""
+    return f"site:*.{domain} -site:www.{domain}"
+
+
+def _name_group(names: Sequence[str]) -> str:
+    quoted = [f'"{name}"' for name in names]
+    return quoted[0] if len(quoted) == 1 else f"({' OR '.join(quoted)})"
+
+
+@lru_cache(maxsize=settings.NAME_VARIANTS_CACHE_SIZE)
+def build_variant_dorks(
+    variants: Tuple[str, ...], categories: Tuple[str, ...], engine: str, max_queries: int
+) -> Tuple[str, ...]:
+    """Pack name variants into as few dorks as the engine's limits allow.
+
+    Each dork is ``("v1" OR "v2" ...)`` followed by every category's
+    operators, which matches the same pages as ``build_combined_dork`` for
+    each variant while spelling the name only once. Variants are placed in
+    order (the first is always kept) into at most ``max_queries`` dorks of
+    ``DORK_MAX_WORDS``/``DORK_MAX_CHARS``; ones that fit nowhere are
+    dropped. A first-fit-decreasing repack is used when it needs fewer dorks.
+    """
+    filters = " ".join(DorkingFactory.get_strategy(cat).get_filter() for cat in categories)
+    max_words = settings.DORK_MAX_WORDS.get(engine, 32)
+    max_chars = settings.DORK_MAX_CHARS.get(engine, 2048)
+
+    def dork(names: Sequence[str]) -> str:
+        return f"{_name_group(names)} {filters}".strip()
+
+    def fits(names: Sequence[str]) -> bool:
+        query = dork(names)
+        return len(query.split()) <= max_words and len(query) <= max_chars
+
+    def pack(names: Sequence[str]) -> List[List[str]]:
+        groups: List[List[str]] = []
+        for name in names:
+            group = next((g for g in groups if fits(g + [name])), None)
+            if group is not None:
+                group.append(name)
+            elif not groups or (len(groups) < max_queries and fits([name])):
+                groups.append([name])
+        return groups
+
+    groups = pack(variants)
+    kept = [name for group in groups for name in group]
+    repacked = pack(sorted(kept, key=lambda name: -len(name.split())))
+    if len(repacked) < len(groups) and sum(map(len, repacked)) == len(kept):
+        rank = {name: i for i, name in enumerate(variants)}
+        groups = sorted((sorted(g, key=rank.get) for g in repacked), key=lambda g: rank[g[0]])
+    return tuple(dork(group) for group in groups)
@@ -0,0 +1,159 @@
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from settings import settings
+
+# Connectives inside Portuguese/Spanish (and a few European) full names.
+PARTICLES = {
+    "da", "das", "de", "del", "della", "di", "do", "dos", "du", "e",
+    "la", "las", "le", "los", "van", "von", "der", "y",
+}
+
+COUNTRY_LANGUAGES = {
+    "Brazil": "pt",
+    "Argentina": "es",
+    "Chile": "es",
+    "Colombia": "es",
+    "Mexico": "es",
+    "Spain": "es",
+}
+
+# Common forms of given names, keyed by the folded, lower-case name.
+NICKNAMES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "pt": {
+        "antonio": ("Tonho", "Toninho"),
+        "eduardo": ("Edu", "Dudu"),
+        "fernando": ("Nando",),
+        "francisco": ("Chico",),
+        "gabriel": ("Biel",),
+        "guilherme": ("Gui",),
+        "jose": ("Zé",),
+        "manuel": ("Manel",),
+        "maria": ("Mari",),
+        "rafael": ("Rafa",),
+        "ricardo": ("Rico",),
+        "roberto": ("Beto",),
+        "alberto": ("Beto",),
+        "rodrigo": ("Digo",),
+        "sebastiao": ("Tião",),
+        "vinicius": ("Vini",),
+    },
+    "es": {
+        "alejandro": ("Alex",),
+        "concepcion": ("Concha",),
+        "dolores": ("Lola",),
+        "enrique": ("Quique",),
+        "francisco": ("Paco", "Pancho"),
+        "guadalupe": ("Lupe",),
+        "ignacio": ("Nacho",),
+        "jesus": ("Chucho",),
+        "jose": ("Pepe",),
+        "manuel": ("Manolo",),
+        "rosario": ("Charo",),
+        "santiago": ("Santi",),
+    },
+}
+
+# Interchangeable spellings of whole (folded, lower-case) words, both ways.
+_SPELLING_PAIRS = [
+    ("luis", "luiz"), ("sousa", "souza"), ("thiago", "tiago"), ("matheus", "mateus"),
+    ("raphael", "rafael"), ("felipe", "filipe"), ("vasquez", "vazquez"), ("jimenez", "gimenez"),
+] + [
+    # Portuguese patronymics and their Spanish spelling (Rodrigues / Rodríguez).
+    (portuguese, portuguese[:-1] + "z")
+    for portuguese in (
+        "alvares", "dias", "fernandes", "gomes", "henriques", "lopes",
+        "marques", "mendes", "nunes", "peres", "rodrigues", "sanches",
+    )
+]
+SPELLINGS = {**dict(_SPELLING_PAIRS), **{b: a for a, b in _SPELLING_PAIRS}}
+
+CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "iu",
+    "я": "ia",
+}
+
+
+def fold(text: str) -> str:
+    """Strip diacritics: ``José Gonçalves`` -> ``Jose Goncalves``."""
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)
+    )
+
+
+def transliterate(text: str) -> str:
+    """Cyrillic to Latin (ICAO 9303), leaving other characters as they are."""
+    out = []
+    for c in text:
+        latin = CYRILLIC.get(c.lower())
+        if latin is None:
+            out.append(c)
+        else:
+            out.append(latin.capitalize() if c.isupper() else latin)
+    return "".join(out)
+
+
+def _respell(word: str) -> Optional[str]:
+    alternate = SPELLINGS.get(fold(word).lower())
+    if alternate is None:
+        return None
+    return alternate.capitalize() if word[:1].isupper() else alternate
+
+
+@lru_cache(maxsize=settings.NAME_VARIANTS_CACHE_SIZE)
+def name_variants(name: str, country: Optional[str] = None) -> Tuple[str, ...]:
+    """Ways ``name`` is likely written, most specific first, starting with ``name`` itself.
+
+    Covers accent folding, particles, first-and-last-surname and
+    surname-first forms, initials, nicknames (Brazil and Spanish-speaking
+    countries) and Cyrillic transliteration. Case-insensitive duplicates
+    are dropped and at most ``NAME_VARIANTS_MAX`` are returned.
+    """
+    name = " ".join(name.replace('"', " ").split())
+    language = COUNTRY_LANGUAGES.get(country)
+    candidates: List[str] = [name]
+
+    if any(c.lower() in CYRILLIC for c in name):
+        name = transliterate(name)
+        candidates.append(name)
+    candidates.append(fold(name))
+
+    words = name.split()
+    core = [w for w in words if w.lower() not in PARTICLES]
+    if len(core) >= 2:
+        first, last = core[0], core[-1]
+        surnames = core[1:]
+        candidates.append(" ".join(core))
+        candidates.append(f"{first} {last}")
+        if len(surnames) >= 2:
+            # Compound surnames: either one may be the one in use.
+            index = words.index(surnames[-2], 1)
+            particle = words[index - 1] if words[index - 1].lower() in PARTICLES else None
+            candidates.append(f"{first} {surnames[-2]}")
+            if particle:
+                candidates.append(f"{first} {particle} {surnames[-2]}")
+            candidates.append(f"{first} {surnames[0]} {last}")
+        candidates.append(f"{last}, {' '.join(words[:-1] if words[-1] == last else core[:-1])}")
+        candidates.append(f"{first[0]}. {last}")
+        if len(surnames) >= 2:
+            candidates.append(f"{first} {' '.join(w[0] + '.' for w in surnames[:-1])} {last}")
+        for nickname in NICKNAMES.get(language, {}).get(fold(first).lower(), ()):
+            candidates.append(f"{nickname} {last}")
+
+    respelled = [_respell(w) or w for w in words]
+    if respelled != words:
+        candidates.append(" ".join(respelled))
+        candidates.append(fold(" ".join(respelled)))
+
+    variants: List[str] = []
+    seen = set()
+    for candidate in candidates:
+        key = candidate.casefold()
+        if candidate and key not in seen:
+            seen.add(key)
+            variants.append(candidate)
+    return tuple(variants[:settings.NAME_VARIANTS_MAX])
@@ -0,0 +1,135 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from enums.country_type import ContryEnum
+
+
+class ContactEntity(NamedTuple):
+    type: str  # email | phone | handle
+    value: str  # normalized value (lowercase email/handle, E.164 phone)
+    platform: Optional[str]  # site for handles taken from a profile URL
+    source: int  # index of the text the entity was found in
+
+
+# Calling code, national trunk prefix and valid national-number lengths.
+COUNTRY_PHONE_RULES: Dict[ContryEnum, Tuple[str, str, Tuple[int, ...]]] = {
+    ContryEnum.ARGENTINA: ("54", "0", (10,)),
+    ContryEnum.BRAZIL: ("55", "0", (10, 11)),
+    ContryEnum.CANADA: ("1", "1", (10,)),
+    ContryEnum.CHILE: ("56", "", (9,)),
+    ContryEnum.COLOMBIA: ("57", "", (10,)),
+    ContryEnum.FRANCE: ("33", "0", (9,)),
+    ContryEnum.GERMANY: ("49", "0", (10, 11)),
+    ContryEnum.INDIA: ("91", "0", (10,)),
+    ContryEnum.ITALY: ("39", "", (9, 10)),
+    ContryEnum.JAPAN: ("81", "0", (9, 10)),
+    ContryEnum.MEXICO: ("52", "", (10,)),
+    ContryEnum.NETHERLANDS: ("31", "0", (9,)),
+    ContryEnum.RUSSIA: ("7", "8", (10,)),
+    ContryEnum.SPAIN: ("34", "", (9,)),
+    ContryEnum.UNITED_KINGDOM: ("44", "0", (10,)),
+    ContryEnum.UNITED_STATES: ("1", "1", (10,)),
+}
+
+# Profile URL prefix -> platform. Compiled into a single alternation, so
+# every text is scanned once for all sites.
+SITE_HANDLE_PREFIXES: Dict[str, str] = {
+    "instagram.com/": "instagram",
+    "twitter.com/": "twitter",
+    "x.com/": "twitter",
+    "facebook.com/": "facebook",
+    "fb.com/": "facebook",
+    "tiktok.com/@": "tiktok",
+    "youtube.com/@": "youtube",
+    "linkedin.com/in/": "linkedin",
+    "github.com/": "github",
+    "gitlab.com/": "gitlab",
+    "t.me/": "telegram",
+    "reddit.com/user/": "reddit",
+    "reddit.com/u/": "reddit",
+    "medium.com/@": "medium",
+    "threads.net/@": "threads",
+    "pinterest.com/": "pinterest",
+    "twitch.tv/": "twitch",
+    "soundcloud.com/": "soundcloud",
+    "vk.com/": "vk",
+}
+
+# Path segments that follow a site prefix but are not user handles.
+RESERVED_PATHS = frozenset({
+    "about", "explore", "events", "groups", "hashtag", "help", "home", "i",
+    "intent", "login", "p", "pages", "people", "photo.php", "pub", "reel",
+    "reels", "search", "settings", "share", "sharer", "sharer.php",
+    "signup", "stories", "topics", "watch",
+})
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(?<![\w/=.@-])(?:\+|00)?\d[\d \t().-]{6,18}\d(?![\w/@])")
+DATE_RE = re.compile(r"\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{4}")
+MENTION_RE = re.compile(r"(?<![\w.@/])@([A-Za-z0-9_](?:[A-Za-z0-9_.]{0,28}[A-Za-z0-9_])?)")
+SITE_RE = re.compile(
+    r"(?<![\w.-])(?:www\.|m\.|mobile\.)?("
+    + "|".join(re.escape(prefix) for prefix in sorted(SITE_HANDLE_PREFIXES, key=len, reverse=True))
+    + r")([A-Za-z0-9_][A-Za-z0-9_.-]{0,63})",
+    re.IGNORECASE,
+)
+NON_DIGITS_RE = re.compile(r"\D")
+
+
+def normalize_phone(raw: str, country: Optional[ContryEnum]) -> Optional[str]:
+    """E.164 form of ``raw``; national numbers need ``country`` to be resolved."""
+    if DATE_RE.fullmatch(raw.strip()):
+        return None
+    digits = NON_DIGITS_RE.sub("", raw)
+    if raw.startswith("+") or raw.startswith("00"):
+        digits = digits[2:] if raw.startswith("00") else digits
+        return f"+{digits}" if 8 <= len(digits) <= 15 else None
+    rule = COUNTRY_PHONE_RULES.get(country)
+    if rule is None:
+        return None
+    code, trunk, lengths = rule
+    if trunk and digits.startswith(trunk) and len(digits) - len(trunk) in lengths:
+        digits = digits[len(trunk):]
+    elif digits.startswith(code) and len(digits) - len(code) in lengths:
+        digits = digits[len(code):]
+    return f"+{code}{digits}" if len(digits) in lengths else None
+
+
+def extract_contacts(
+    texts: Iterable[str], country: Optional[ContryEnum] = None
+) -> List[ContactEntity]:
+    """Emails, phone numbers and handles found in each text, deduplicated per text.
+
+    Cheap substring checks skip the email/mention patterns for texts without
+    ``@``, and the phone pattern for texts without enough digits, which is
+    most of a typical result list.
+    """
+    entities: List[ContactEntity] = []
+    for source, text in enumerate(texts):
+        if not text:
+            continue
+        seen = set()
+
+        def add(kind: str, value: str, platform: Optional[str] = None):
+            key = (kind, value, platform)
+            if key not in seen:
+                seen.add(key)
+                entities.append(ContactEntity(kind, value, platform, source))
+
+        has_at = "@" in text
+        if has_at:
+            for match in EMAIL_RE.finditer(text):
+                add("email", match.group().lower())
+            for match in MENTION_RE.finditer(text):
+                add("handle", match.group(1).lower())
+
+        for match in SITE_RE.finditer(text):
+            handle = match.group(2).rstrip(".-").lower()
+            if handle and handle not in RESERVED_PATHS:
+                add("handle", handle, SITE_HANDLE_PREFIXES[match.group(1).lower()])
+
+        if sum(map(str.isdigit, text)) >= 8:
+            for match in PHONE_RE.finditer(text):
+                phone = normalize_phone(match.group(), country)
+                if phone:
+                    add("phone", phone)
+    return entities
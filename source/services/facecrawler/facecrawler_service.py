@@ -1,13 +1,27 @@
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import urllib.request
 from typing import Optional, Dict, Tuple
 import os
 import dotenv
 import json
+from monitoring.metrics import track_upstream
+from settings import settings
 
 dotenv.load_dotenv()
 
+# Shared keep-alive pool, so concurrent uploads and polls reuse connections.
+_http = requests.Session()
+_http.mount(
+    "https://",
+    HTTPAdapter(pool_connections=1, pool_maxsize=settings.FACECRAWLER_POOL_SIZE),
+)
+_http.mount(
+    "http://",
+    HTTPAdapter(pool_connections=1, pool_maxsize=settings.FACECRAWLER_POOL_SIZE),
+)
+
 
 class FaceCrawlerHandler:
     """Handles the communication with the FaceCrawler API."""
@@ -20,27 +34,35 @@ class FaceCrawlerHandler:
             "Authorization": self.api_key,
         }
 
-    def send_image(self, image_filepath: str) -> requests.Response:
-        with open(image_filepath, "rb") as img_file:
-            files = {"images": img_file, "id_search": None}
-            response = requests.post(
+    def send_image(self, image: bytes, filename: str = "image.jpg") -> requests.Response:
+        files = {"images": (filename, image, "image/jpeg"), "id_search": None}
+        with track_upstream("facecrawler", "upload_pic") as call:
+            response = _http.post(
                 f"{self.site}/api/upload_pic", headers=self.headers, files=files
             )
+            call.status = response.status_code
         return response
 
     def search(
         self, id_search: str, with_progress=True, status_only=False, demo=False
     ) -> dict:
+        return self.search_response(id_search, with_progress, status_only, demo).json()
+
+    def search_response(
+        self, id_search: str, with_progress=True, status_only=False, demo=False
+    ) -> requests.Response:
         payload = {
             "id_search": id_search,
             "with_progress": with_progress,
             "status_only": status_only,
             "demo": demo,
         }
-        response = requests.post(
-            f"{self.site}/api/search", headers=self.headers, json=payload
-        )
-        return response.json()
+        with track_upstream("facecrawler", "search") as call:
+            response = _http.post(
+                f"{self.site}/api/search", headers=self.headers, json=payload
+            )
+            call.status = response.status_code
+        return response
 
 
 class FaceCrawlerService:
@@ -65,7 +87,8 @@ class FaceCrawlerService:
     def check_progress(
         self, id_search: str, demo=False
     ) -> Tuple[Optional[str], Optional[list]]:
-        response = self.handler.search(id_search, demo=demo)
+        raw = self.handler.search_response(id_search, demo=demo)
+        response = raw.json()
         if response.get("error"):
             return {
                 "message": f"error: {response.get('error')}",
@@ -83,6 +106,8 @@ class FaceCrawlerService:
                 "status": response.get("code"),
                 "progress": 100,
                 "data": response["output"]["items"],
+                # Untouched body, for the response archive.
+                "raw": raw.content,
             }
         else:
             return {
@@ -0,0 +1,176 @@
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, Tuple
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+from config_logging import api_logger
+from settings import settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+
+class ImageWorkersUnavailable(RuntimeError):
+    """The preprocessing pool broke again right after being replaced."""
+
+
+HASH_SIZE = 8
+_DCT_SIZE = 32
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    matrix = np.sqrt(2 / n) * np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(_DCT_SIZE)
+_BIT_WEIGHTS = np.uint64(1) << np.arange(HASH_SIZE * HASH_SIZE, dtype=np.uint64)[::-1]
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """64-bit pHash: signs of the low 8x8 DCT frequencies against their median.
+
+    Stable under re-encoding, rescaling and mild edits, so near-duplicates
+    differ in only a few bits (compare with Hamming distance).
+    """
+    gray = image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.Resampling.LANCZOS)
+    coefficients = _DCT @ np.asarray(gray, dtype=np.float64) @ _DCT.T
+    low = coefficients[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])
+    return int(np.bitwise_or.reduce(_BIT_WEIGHTS[bits], initial=np.uint64(0)))
+
+
+def to_signed64(value: int) -> int:
+    """Reinterpret an unsigned 64-bit hash for a signed BIGINT column."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned64(value: int) -> int:
+    return value & ((1 << 64) - 1)
+
+
+def _normalize(image: Image.Image, max_dimension: int) -> Image.Image:
+    """Upright RGB copy fitted inside ``max_dimension``, transparency flattened onto white."""
+    # JPEG only: decode at the smallest DCT scale still >= the target size.
+    image.draft("RGB", (max_dimension, max_dimension))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    return image
+
+
+def preprocess_image(data: bytes, max_dimension: int, quality: int) -> Tuple[bytes, dict]:
+    """Normalize an uploaded picture into a small, metadata-free JPEG.
+
+    Applies the EXIF orientation, flattens transparency onto white, fits the
+    image inside ``max_dimension`` and re-encodes it. EXIF, ICC and other
+    metadata are not carried over. Returns the JPEG bytes and a description
+    of the original and processed images; raises ``ValueError`` when the
+    upload is not a decodable image.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            original = {
+                "format": image.format,
+                "width": image.width,
+                "height": image.height,
+                "bytes": len(data),
+            }
+            image = _normalize(image, max_dimension)
+            phash = perceptual_hash(image)
+
+            output = io.BytesIO()
+            image.save(output, "JPEG", quality=quality, optimize=True)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError(f"Invalid image: {str(e)}") from e
+
+    processed = output.getvalue()
+    return processed, {
+        "phash": f"{phash:016x}",
+        "original": original,
+        "processed": {
+            "width": image.width,
+            "height": image.height,
+            "bytes": len(processed),
+            "quality": quality,
+        },
+    }
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Workers are spawned, not forked, so they never inherit the
+            # logging and scheduler threads of the API process.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PREPROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def hash_image(data: bytes, max_dimension: int) -> int:
+    """Perceptual hash of an upload, computed like ``preprocess_image`` does."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return perceptual_hash(_normalize(image, max_dimension))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError(f"Invalid image: {str(e)}") from e
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next call spawns fresh workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_in_pool(fn: Callable, *args):
+    # A worker that dies (e.g. OOM-killed on a huge upload) breaks the whole
+    # pool; replace it and retry once rather than failing every later call.
+    for attempt in range(2):
+        pool = _get_pool()
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            api_logger.warning(f"Image worker pool broke (attempt {attempt + 1}); replacing it")
+            _discard_pool(pool)
+    raise ImageWorkersUnavailable("Image workers unavailable")
+
+
+def image_phash(data: bytes) -> int:
+    """Run ``hash_image`` on the shared process pool and wait for it."""
+    return _run_in_pool(hash_image, data, settings.IMAGE_MAX_DIMENSION)
+
+
+def prepare_image(data: bytes) -> Tuple[bytes, dict]:
+    """Run ``preprocess_image`` on the shared process pool and wait for it."""
+    return _run_in_pool(
+        preprocess_image,
+        data,
+        settings.IMAGE_MAX_DIMENSION,
+        settings.IMAGE_JPEG_QUALITY,
+    )
+
+
+def shutdown_image_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
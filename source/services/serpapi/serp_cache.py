@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
+from monitoring.metrics import record_cache
+
+
+class SearchResultCache:
+    """Thread-safe TTL/LRU cache with in-flight request coalescing.
+
+    Concurrent callers asking for the same key while it is being fetched wait
+    on the first caller's result instead of issuing their own upstream call.
+    A fetch returning ``None`` is shared with the waiting callers but not
+    cached, so failed searches are retried on the next request.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Optional[Any]]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                record_cache(self.name, True)
+                return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        record_cache(self.name, not owner)
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            if value is not None:
+                self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def contains(self, key: Hashable) -> bool:
+        """Whether ``key`` would be answered without a fetch (fresh or in flight)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return (entry is not None and entry[0] > time.monotonic()) or key in self._inflight
+
+    def _store(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
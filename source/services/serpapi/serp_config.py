@@ -1,23 +1,37 @@
 from enums.search_type import SearchEnum
+from monitoring.metrics import track_upstream
+from settings import settings
 import requests as rq
 import os
 
+# Result-offset parameter per engine, and the offset of the first result.
+PAGE_PARAMS = {"bing": ("first", 1)}
+DEFAULT_PAGE_PARAM = ("start", 0)
+PAGE_SIZE = 10
+
 
 class SerpAPIController:
     def __init__(
-        self, api_key: str, search_type: SearchEnum = SearchEnum.GOOGLE_SEARCH
+        self,
+        api_key: str,
+        search_type: SearchEnum = SearchEnum.GOOGLE_SEARCH,
+        base_url: str | None = None,
     ):
         self.api_key = api_key
         self.search_type = search_type
+        self.base_url = base_url or settings.SERPAPI_BASE_URL
 
-    def search(self, query: str, location: str = "Brazil", engine: str = "google"):
-        response = rq.get(
-            f"https://serpapi.com/{self.search_type.value}",
-            params={
-                "q": query,
-                "location": location,
-                "api_key": self.api_key,
-                "engine": engine,
-            },
-        )
+    def search(self, query: str, location: str = "Brazil", engine: str = "google", page: int = 0):
+        params = {
+            "q": query,
+            "location": location,
+            "api_key": self.api_key,
+            "engine": engine,
+        }
+        if page:
+            name, first = PAGE_PARAMS.get(engine, DEFAULT_PAGE_PARAM)
+            params[name] = first + page * PAGE_SIZE
+        with track_upstream("serpapi", "search") as call:
+            response = rq.get(f"{self.base_url}/{self.search_type.value}", params=params)
+            call.status = response.status_code
         return response, response.status_code
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import re
+import ssl
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from monitoring.metrics import record_cache, track_upstream
+from settings import settings
+
+DEFAULT_SITES_FILE = Path(__file__).with_name("sites.json")
+CHECK_TYPES = ("status_code", "message", "redirect")
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0"
+
+
+@dataclass(frozen=True)
+class SiteTemplate:
+    """One entry of the site-template file.
+
+    ``url`` is the public profile link and ``probe_url`` (defaults to
+    ``url``) the address actually requested; both contain ``{username}``.
+    ``check`` selects how presence is decided:
+
+    - ``status_code``: a 2xx response means the account exists, 404/410 that it does not;
+    - ``message``: a 2xx response without any of the ``absent`` strings in its body;
+    - ``redirect``: a 2xx response; a redirect means the site sent us away from a missing profile.
+    """
+
+    name: str
+    url: str
+    category: str = "other"
+    check: str = "status_code"
+    probe_url: Optional[str] = None
+    absent: Tuple[str, ...] = ()
+    username_pattern: Optional[str] = None
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.probe_url or self.url).netloc.lower()
+
+    def accepts(self, username: str) -> bool:
+        return self.username_pattern is None or re.fullmatch(self.username_pattern, username) is not None
+
+    def profile_url(self, username: str) -> str:
+        return self.url.format(username=quote(username, safe=""))
+
+    def request_url(self, username: str) -> str:
+        return (self.probe_url or self.url).format(username=quote(username, safe=""))
+
+
+class UsernameCheck(NamedTuple):
+    site: str
+    category: str
+    url: str
+    status: str  # found | not_found | invalid | error
+    http_status: Optional[int] = None
+    elapsed_ms: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+
+
+@lru_cache(maxsize=4)
+def load_sites(path: Optional[str] = None) -> Tuple[SiteTemplate, ...]:
+    """Parse and validate a site-template file (the bundled one by default)."""
+    with open(path or DEFAULT_SITES_FILE, encoding="utf-8") as f:
+        entries = json.load(f)["sites"]
+    sites = []
+    for entry in entries:
+        site = SiteTemplate(**{**entry, "absent": tuple(entry.get("absent", ()))})
+        if site.check not in CHECK_TYPES:
+            raise ValueError(f"{site.name}: unknown check {site.check!r}")
+        if "{username}" not in site.url:
+            raise ValueError(f"{site.name}: url has no {{username}} placeholder")
+        if site.check == "message" and not site.absent:
+            raise ValueError(f"{site.name}: message check needs 'absent' strings")
+        sites.append(site)
+    return tuple(sites)
+
+
+class _ResultCache:
+    """TTL/LRU of finished checks with separate lifetimes for hits and misses."""
+
+    def __init__(self, positive_ttl: float, negative_ttl: float, max_entries: int):
+        self.ttl = {"found": positive_ttl, "not_found": negative_ttl}
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Tuple[float, UsernameCheck]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[UsernameCheck]:
+        entry = self._entries.get(key)
+        hit = entry is not None and entry[0] > time.monotonic()
+        record_cache("usernames", hit)
+        if not hit:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]._replace(cached=True, elapsed_ms=0.0)
+
+    def put(self, key: Hashable, check: UsernameCheck):
+        ttl = self.ttl.get(check.status)
+        if not ttl:
+            return
+        self._entries[key] = (time.monotonic() + ttl, check)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class UsernameChecker:
+    """Checks one handle against many site templates concurrently.
+
+    Each host allows ``USERNAME_PER_HOST_CONCURRENCY`` requests in flight and
+    all hosts together ``USERNAME_MAX_CONNECTIONS``. Every host gets its own
+    small keep-alive ``httpx.AsyncClient`` (sharing one SSL context): httpcore
+    rescans its whole pool on every state change, which gets expensive with
+    one pool holding hundreds of connections and queued requests. Sweeping
+    hundreds of sites is bounded by the slowest host rather than their sum.
+    Confirmed hits and misses are cached; errors are not.
+
+    Clients and semaphores belong to the event loop that first used them;
+    ``aclose`` releases them on shutdown.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self.cache = _ResultCache(
+            positive_ttl=settings.USERNAME_CACHE_POSITIVE_TTL_SECONDS,
+            negative_ttl=settings.USERNAME_CACHE_NEGATIVE_TTL_SECONDS,
+            max_entries=settings.USERNAME_CACHE_MAX_ENTRIES,
+        )
+
+    def _client_for(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is None:
+            if self._ssl_context is None:
+                self._ssl_context = httpx.create_ssl_context()
+            client = self._clients[host] = httpx.AsyncClient(
+                verify=self._ssl_context,
+                headers={"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.8"},
+                timeout=httpx.Timeout(
+                    settings.USERNAME_TIMEOUT_SECONDS,
+                    connect=settings.USERNAME_CONNECT_TIMEOUT_SECONDS,
+                    pool=None,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.USERNAME_PER_HOST_CONCURRENCY,
+                    max_keepalive_connections=settings.USERNAME_PER_HOST_CONCURRENCY,
+                ),
+            )
+        return client
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        self._host_slots.clear()
+        self._slots = None
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    async def sweep(self, username: str, sites: Iterable[SiteTemplate]) -> AsyncIterator[UsernameCheck]:
+        """Yield one ``UsernameCheck`` per site, in completion order."""
+        tasks = [asyncio.create_task(self.check(username, site)) for site in sites]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def check(self, username: str, site: SiteTemplate) -> UsernameCheck:
+        url = site.profile_url(username)
+        if not site.accepts(username):
+            return UsernameCheck(site.name, site.category, url, "invalid")
+
+        key = (site.name, username.lower())
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.USERNAME_MAX_CONNECTIONS)
+        host_slots = self._host_slots.setdefault(
+            site.host, asyncio.Semaphore(settings.USERNAME_PER_HOST_CONCURRENCY)
+        )
+        start = time.perf_counter()
+        # Host first: a request waiting on a busy host must not hold a global slot.
+        async with host_slots, self._slots:
+            try:
+                result = await self._probe(username, site, url)
+            except httpx.HTTPError as e:
+                result = UsernameCheck(
+                    site.name, site.category, url, "error", error=type(e).__name__
+                )
+        result = result._replace(elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+        self.cache.put(key, result)
+        return result
+
+    async def _probe(self, username: str, site: SiteTemplate, url: str) -> UsernameCheck:
+        with track_upstream("usernames", site.check) as call:
+            async with self._client_for(site.host).stream(
+                "GET",
+                site.request_url(username),
+                follow_redirects=site.check != "redirect",
+            ) as response:
+                call.status = response.status_code
+                body = ""
+                if site.check == "message" and response.is_success:
+                    body = await self._read_prefix(response)
+
+        status = response.status_code
+        if response.is_success and not any(marker in body for marker in site.absent):
+            verdict = "found"
+        elif status in (404, 410) or (response.is_success and body):
+            verdict = "not_found"
+        elif site.check == "redirect" and response.is_redirect:
+            verdict = "not_found"
+        else:
+            verdict = "error"
+        return UsernameCheck(
+            site.name, site.category, url, verdict, http_status=status,
+            error=f"HTTP {status}" if verdict == "error" else None,
+        )
+
+    async def _read_prefix(self, response: httpx.Response) -> str:
+        """Read at most ``USERNAME_MAX_BODY_BYTES``; markers live near the top of the page."""
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= settings.USERNAME_MAX_BODY_BYTES:
+                break
+        return b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+
+
+username_checker = UsernameChecker()
@@ -0,0 +1,59 @@
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from settings import settings
+
+
+class UnsafeURLError(ValueError):
+    """The URL may not be requested by the server."""
+
+
+def _is_public(ip: ipaddress._BaseAddress) -> bool:
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_url_syntax(url: str) -> str:
+    """Checks that need no network: scheme, host, allowlist and IP-literal hosts.
+
+    Safe to call while validating a request on the event loop; returns the
+    normalized host. ``check_public_url`` adds the DNS check.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise UnsafeURLError("only http and https URLs are allowed")
+    host = (parts.hostname or "").rstrip(".").lower()
+    if not host:
+        raise UnsafeURLError("URL has no host")
+    if settings.WEBHOOK_ALLOWED_HOSTS and host not in settings.WEBHOOK_ALLOWED_HOSTS:
+        raise UnsafeURLError(f"host {host} is not allowed")
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return host
+    if not _is_public(ip):
+        raise UnsafeURLError(f"host {host} is not a public address")
+    return host
+
+
+def check_public_url(url: str):
+    """Raise ``UnsafeURLError`` unless ``url`` is http(s) and every address of its host is public.
+
+    The host is resolved here, so names pointing at loopback, private,
+    link-local (cloud metadata) or otherwise reserved addresses are refused
+    too. With ``WEBHOOK_ALLOWED_HOSTS`` set, only those hosts are accepted.
+    Resolving blocks: call it from worker threads, never the event loop, and
+    again right before each request, since DNS answers can change.
+    """
+    host = check_url_syntax(url)
+    parts = urlsplit(url)
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError) as e:
+        raise UnsafeURLError(f"cannot resolve {host}: {e}")
+    for address in addresses:
+        if not _is_public(ipaddress.ip_address(address.split("%", 1)[0])):
+            raise UnsafeURLError(f"host {host} resolves to a non-public address")
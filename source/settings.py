@@ -1,5 +1,5 @@
 from uuid import uuid4
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 
 from pydantic import Field
@@ -22,11 +22,160 @@ class Settings(BaseSettings):
     DB_SCAN_HISTORY: str
     DB_USER: str
     DB_REFRESH_TOKEN: str
+    DB_WATCHLIST: str = "watchlist"
+    DB_GRAPH_NODE: str = "graph_node"
+    DB_GRAPH_EDGE: str = "graph_edge"
+    DB_IMAGE_HASH: str = "image_hash"
+    DB_USAGE_SCANS: str = "usage_scans_daily"
+    DB_USAGE_UPSTREAM: str = "usage_upstream_daily"
+    DB_USAGE_CACHE: str = "usage_cache_daily"
+    DB_USAGE_LATENCY: str = "usage_latency_daily"
+    DB_ROLLUP_STATE: str = "rollup_state"
+    DB_RESPONSE_BLOB: str = "response_blob"
+    DB_SCAN_RESPONSE: str = "scan_response"
+    DB_COMPRESSION_DICT: str = "compression_dict"
     SECRET_AUTH_KEY: str
+    JWT_SIGNING_KEY_FILE: Optional[str] = None
+    JWT_VERIFY_KEY_FILES: List[str] = []
+    JWT_ACCEPT_HS256: bool = True
+    JWT_JWKS_URL: Optional[str] = None
+    JWT_JWKS_MIN_REFRESH_SECONDS: int = 60
+    JWT_JWKS_MAX_AGE_SECONDS: int = 300
+    JWT_VERIFIED_CACHE_SIZE: int = 10000
 
     SERPAPI_KEY: str
     FACECRAWLER_KEY: str
     SITE_URL: str
+    SERPAPI_BASE_URL: str = "https://serpapi.com"
+    SERP_CACHE_TTL_SECONDS: int = 900
+    SERP_CACHE_MAX_ENTRIES: int = 2048
+
+    BATCH_MAX_TARGETS: int = 1000
+    BATCH_MAX_WORKERS: int = 16
+    BATCH_PER_USER_CONCURRENCY: int = 4
+
+    WATCHLIST_SCHEDULER_ENABLED: bool = True
+    WATCHLIST_POLL_SECONDS: int = 60
+    WATCHLIST_CLAIM_LIMIT: int = 20
+    WATCHLIST_MAX_CONCURRENT_RUNS: int = 2
+    WATCHLIST_JITTER_RATIO: float = 0.05
+    # Webhook hosts the server may post to; empty allows any public host.
+    WEBHOOK_ALLOWED_HOSTS: List[str] = []
+
+    FTS_LANGUAGE: str = "simple"
+
+    EXPORT_BATCH_SIZE: int = 5000
+
+    IMAGE_MAX_DIMENSION: int = 1024
+    IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_PREPROCESS_WORKERS: int = 2
+    IMAGE_BATCH_MAX_IMAGES: int = 10
+    IMAGE_BATCH_CONCURRENCY: int = 4
+    FACECRAWLER_POOL_SIZE: int = 10
+    IMAGE_PHASH_MAX_DISTANCE: int = 10
+    IMAGE_PHASH_MAX_MATCHES: int = 20
+    IMAGE_PHASH_REFRESH_SECONDS: int = 30
+    IMAGE_PHASH_REBUILD_SECONDS: int = 6 * 3600
+
+    DOMAIN_RECORD_TYPES: List[str] = ["A", "AAAA", "MX", "TXT", "NS"]
+    DOMAIN_DNS_NAMESERVERS: List[str] = []
+    DOMAIN_DNS_PORT: int = 53
+    DOMAIN_DNS_TIMEOUT_SECONDS: float = 3.0
+    DOMAIN_DNS_CONCURRENCY: int = 50
+    DOMAIN_DNS_MIN_TTL_SECONDS: int = 30
+    DOMAIN_DNS_MAX_TTL_SECONDS: int = 3600
+    DOMAIN_DNS_NEGATIVE_TTL_SECONDS: int = 300
+    DOMAIN_CT_SOURCE: str = "crtsh"
+    DOMAIN_CT_BASE_URL: str = "https://crt.sh"
+    DOMAIN_CT_TIMEOUT_SECONDS: float = 8.0
+    DOMAIN_CT_CACHE_TTL_SECONDS: int = 3600
+    DOMAIN_MAX_SUBDOMAINS: int = 200
+    DOMAIN_RECON_TIMEOUT_SECONDS: float = 10.0
+
+    USERNAME_SITES_FILE: Optional[str] = None
+    USERNAME_MAX_CONNECTIONS: int = 200
+    USERNAME_PER_HOST_CONCURRENCY: int = 4
+    USERNAME_TIMEOUT_SECONDS: float = 8.0
+    USERNAME_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    USERNAME_MAX_BODY_BYTES: int = 262144
+    USERNAME_CACHE_POSITIVE_TTL_SECONDS: int = 86400
+    USERNAME_CACHE_NEGATIVE_TTL_SECONDS: int = 3600
+    USERNAME_CACHE_MAX_ENTRIES: int = 100000
+
+    NAME_VARIANTS_MAX: int = 12
+    NAME_VARIANTS_MAX_QUERIES: int = 2
+    NAME_VARIANTS_CACHE_SIZE: int = 4096
+    NAME_VARIANTS_WORKERS: int = 16
+    DORK_MAX_WORDS: Dict[str, int] = {"google": 32, "bing": 32, "duck": 32}
+    DORK_MAX_CHARS: Dict[str, int] = {"google": 2048, "bing": 1500, "duck": 500}
+
+    PLANNER_CONCURRENCY: int = 3
+    PLANNER_WORKERS: int = 32
+    PLANNER_MAX_PAGES: int = 3
+    PLANNER_FULL_PAGE: int = 8
+    PLANNER_ENGINE_CREDITS: Dict[str, float] = {"google": 1.0, "bing": 1.0, "duck": 1.0}
+    PLANNER_PRIOR_RESULTS: float = 8.0
+    PLANNER_PRIOR_WEIGHT: float = 3.0
+    PLANNER_PAGE_DECAY: float = 0.6
+    PLANNER_HISTORY_DAYS: int = 30
+    PLANNER_HISTORY_SCANS: int = 5000
+    PLANNER_STATS_TTL_SECONDS: int = 300
+
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_ZSTD_LEVEL: int = 6
+    ARCHIVE_DICT_KINDS: List[str] = ["serpapi"]
+    ARCHIVE_DICT_SIZE: int = 112640
+    ARCHIVE_DICT_MIN_SAMPLES: int = 200
+    ARCHIVE_DICT_RECHECK_SECONDS: int = 60
+    ARCHIVE_REPLAY_WORKERS: int = 2
+    ARCHIVE_REPLAY_CHUNK: int = 200
+    ARCHIVE_REPLAY_MAX_SCANS: int = 100000
+
+    THREADPOOL_SIZE: int = 64
+    BULKHEAD_LIMITS: Dict[str, int] = {"/target": 32, "/admin": 4}
+    BULKHEAD_QUEUE_LIMITS: Dict[str, int] = {"/target": 64, "/admin": 8}
+    BULKHEAD_RETRY_AFTER_SECONDS: int = 5
+    READINESS_QUEUE_RATIO: float = 0.8
+
+    USAGE_ROLLUP_ENABLED: bool = True
+    USAGE_ROLLUP_INTERVAL_SECONDS: int = 30
+    USAGE_ROLLUP_SETTLE_SECONDS: int = 60
+    USAGE_ROLLUP_MAX_WINDOW_HOURS: int = 6
+    UPSTREAM_COST_PER_CALL: Dict[str, float] = {"serpapi.search": 0.015}
+
+    GRAPH_MAX_DEPTH: int = 3
+    GRAPH_MAX_NODES: int = 5000
+    GRAPH_MAX_FANOUT: int = 500
+    GRAPH_CACHE_MAX_NODES: int = 200000
+    GRAPH_CACHE_TTL_SECONDS: int = 60
+
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_MAX_PENDING: int = 10000
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_FLUSH_MS: int = 200
+    WRITE_BEHIND_PUT_TIMEOUT_MS: int = 50
+
+    SCAN_PARTITION_MAINTENANCE_ENABLED: bool = True
+    SCAN_PARTITION_INTERVAL_SECONDS: int = 6 * 3600
+    SCAN_PARTITION_PREMAKE_MONTHS: int = 3
+    # 0 keeps scans forever; "detach" leaves expired months as plain tables, "drop" deletes them.
+    SCAN_RETENTION_MONTHS: int = 0
+    SCAN_RETENTION_MODE: str = "detach"
+    SCAN_RETENTION_DELETE_BATCH: int = 5000
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1
+    LOG_SQL_ECHO: bool = False
+
+    PROFILE_DIR: str = "logs/profiles"
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_FILES: int = 200
+    PROFILE_MAX_AGE_HOURS: int = 24
 
 
 settings = Settings()
@@ -0,0 +1,52 @@
+"""Test defaults: the required settings, and a throwaway SQLite database.
+
+Run from ``source/`` with ``python -m pytest``; values already in the
+environment win.
+"""
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+SOURCE_DIR = Path(__file__).resolve().parent.parent
+if str(SOURCE_DIR) not in sys.path:
+    sys.path.insert(0, str(SOURCE_DIR))
+
+for name, value in {
+    "DB_TARGET_RESULT": "target_results",
+    "DB_SCAN_HISTORY": "scan_history",
+    "DB_USER": "users",
+    "DB_REFRESH_TOKEN": "refresh_tokens",
+    "SECRET_AUTH_KEY": "test-secret",
+    "SERPAPI_KEY": "test",
+    "FACECRAWLER_KEY": "test",
+    "SITE_URL": "http://127.0.0.1:9",
+    "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}",
+    "LOG_LEVEL": "ERROR",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+
+@pytest.fixture
+def db_user() -> uuid.UUID:
+    """Fresh tables in the test database and one user; yields the user's ID."""
+    from sqlalchemy import text
+
+    from database.base import engine
+    from database.models.base_model import Base
+    from database.models.db_models import RESULTS_FTS_TABLE, User
+    from database.session import get_session
+
+    Base.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {RESULTS_FTS_TABLE}"))
+    Base.metadata.create_all(engine)
+    with get_session() as session:
+        user = User(first_name="Test", last_name="User", email="test@example.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        return user.user_id
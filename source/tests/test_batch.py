@@ -0,0 +1,60 @@
+import threading
+import time
+
+from enums.target_type import TargetType
+from modules.target.domain import target_batch
+from modules.target.domain.target_batch import TargetBatchService
+from modules.target.schemas import TargetTextSearchSchema
+from settings import settings
+
+
+class SlowSearch:
+    """Stands in for the search service and records how many items ran at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = self.max_running = 0
+
+    def text_search(self, target, user_id, parent_scan_id=None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        return [], None
+
+
+def targets(count: int):
+    return [TargetTextSearchSchema(name=f"Target {i}", type=TargetType.PERSON) for i in range(count)]
+
+
+def slots_dropped() -> bool:
+    # The last item's done callback may still be running.
+    deadline = time.monotonic() + 1
+    while target_batch._user_slots and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return target_batch._user_slots == {}
+
+
+def test_user_slots_are_capped_and_dropped_after_the_batch(db_user, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_PER_USER_CONCURRENCY", 2)
+    service = TargetBatchService()
+    service.search_service = SlowSearch()
+
+    lines = list(service.run(targets(6), db_user))
+
+    assert len(lines) == 7 and '"completed":6' in lines[-1]
+    assert service.search_service.max_running == 2
+    assert slots_dropped()
+
+
+def test_an_abandoned_batch_lets_go_once_its_items_finish(db_user):
+    service = TargetBatchService()
+    service.search_service = SlowSearch()
+
+    stream = service.run(targets(4), db_user)
+    next(stream)
+    stream.close()
+
+    assert slots_dropped()
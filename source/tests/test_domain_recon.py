@@ -0,0 +1,240 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from benchmarks.stubs import CrtShStubHandler, DnsStubServer, StubConfig, StubServer
+from enums.target_type import TargetType
+from modules.target.domain.target_domain_recon import DomainReconService
+from modules.target.schemas import TargetTextSearchSchema
+from services.domainrecon.ct_sources import CrtShSource
+from services.domainrecon.dns_resolver import CachingResolver
+from settings import settings
+
+ZONE = "example.test"
+
+
+class CountingCrtShHandler(CrtShStubHandler):
+    stats: dict
+
+    def do_GET(self):
+        with self.stats["lock"]:
+            self.stats["hits"] += 1
+        super().do_GET()
+
+
+class SerpLinks:
+    """Stands in for the search service: fixed organic results for the ``site:`` dork."""
+
+    def __init__(self, *links: str):
+        self.links = links
+
+    def fetch_organic_results(self, dork_query, request):
+        return [{"link": link} for link in self.links]
+
+
+def crtsh_server(**config) -> StubServer:
+    server = StubServer(
+        CountingCrtShHandler,
+        StubConfig(**{"latency_ms": 0, "jitter_ms": 0, "results": 4, **config}),
+    )
+    server.httpd.RequestHandlerClass.stats = {"lock": threading.Lock(), "hits": 0}
+    return server.start()
+
+
+def crtsh_hits(server: StubServer) -> int:
+    return server.httpd.RequestHandlerClass.stats["hits"]
+
+
+@pytest.fixture
+def dns_stub():
+    server = DnsStubServer(ZONE, ttl=300).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def crtsh():
+    server = crtsh_server()
+    yield server
+    server.stop()
+
+
+def resolver_for(server: DnsStubServer, **options) -> CachingResolver:
+    host, port = server.address
+    return CachingResolver(nameservers=[host], port=port, **options)
+
+
+def company(domain: str = ZONE) -> TargetTextSearchSchema:
+    return TargetTextSearchSchema(
+        name="Example", type=TargetType.COMPANY, categories=["social"], domain={"name": domain}
+    )
+
+
+def run_recon(resolver_factory, ct_factory, serp: SerpLinks, request: TargetTextSearchSchema):
+    async def main():
+        # Built inside the loop the service runs on, like the shared recon loop does.
+        ct_source = ct_factory()
+        try:
+            service = DomainReconService(
+                resolver=resolver_factory(), ct_source=ct_source, search_service=serp
+            )
+            return await service.run(request)
+        finally:
+            await ct_source.aclose()
+
+    return asyncio.run(main())
+
+
+def test_recon_merges_sources_and_resolves_every_subdomain(dns_stub, crtsh):
+    response = run_recon(
+        lambda: resolver_for(dns_stub),
+        lambda: CrtShSource(crtsh.url, timeout=5, ttl=60),
+        SerpLinks(f"https://blog.{ZONE}/post", f"https://host1.{ZONE}/", "https://elsewhere.test/"),
+        company(),
+    )
+
+    assert response.complete
+    assert response.errors == {}
+    assert response.records["MX"] == [f"10 mail.{ZONE}"]
+    assert response.records["NS"] == [f"ns1.{ZONE}", f"ns2.{ZONE}"]
+    assert response.records["TXT"] == ["v=spf1 -all"]
+    by_name = {subdomain.name: subdomain for subdomain in response.subdomains}
+    expected_ct = {f"host{i}.{ZONE}" for i in range(4)} | {f"api{i}.{ZONE}" for i in range(3)}
+    assert set(by_name) == expected_ct | {f"blog.{ZONE}"}
+    assert sorted(by_name[f"host1.{ZONE}"].sources) == ["crt.sh", "serp"]
+    assert by_name[f"blog.{ZONE}"].sources == ["serp"]
+    assert all(len(subdomain.addresses) == 1 for subdomain in response.subdomains)
+
+
+def test_answers_are_cached_until_their_ttl_expires():
+    server = DnsStubServer(ZONE, ttl=1).start()
+    try:
+        async def main():
+            resolver = resolver_for(server, min_ttl=1)
+            first = await resolver.resolve(f"www.{ZONE}", "A")
+            again = await resolver.resolve(f"WWW.{ZONE}.", "A")
+            queries = server.queries
+            await asyncio.sleep(1.2)
+            expired = await resolver.resolve(f"www.{ZONE}", "A")
+            return first, again, queries, expired
+
+        first, again, queries, expired = asyncio.run(main())
+    finally:
+        server.stop()
+
+    assert first.status == "ok" and first.ttl == 1
+    assert again == first
+    assert queries == 1
+    assert expired.records == first.records
+    assert server.queries == 2
+
+
+def test_ttl_is_clamped_to_the_configured_bounds(dns_stub):
+    async def main():
+        resolver = resolver_for(dns_stub, min_ttl=30, max_ttl=120)
+        return await resolver.resolve(ZONE, "MX")
+
+    assert asyncio.run(main()).ttl == 120
+
+
+def test_nxdomain_is_cached_for_the_negative_ttl(dns_stub):
+    async def main():
+        resolver = resolver_for(dns_stub, negative_ttl=1)
+        first = await resolver.resolve("missing.other.test", "A")
+        again = await resolver.resolve("missing.other.test", "A")
+        queries = dns_stub.queries
+        await asyncio.sleep(1.1)
+        await resolver.resolve("missing.other.test", "A")
+        return first, again, queries
+
+    first, again, queries = asyncio.run(main())
+    assert first.status == "nxdomain" and first.records == ()
+    assert again == first
+    assert queries == 1
+    assert dns_stub.queries == 2
+
+
+def test_failures_are_not_cached():
+    server = DnsStubServer(ZONE, latency_ms=500).start()
+    try:
+        async def main():
+            resolver = resolver_for(server, timeout=0.1)
+            return [await resolver.resolve(ZONE, "A") for _ in range(2)]
+
+        results = asyncio.run(main())
+    finally:
+        server.stop()
+    assert [answer.status for answer in results] == ["error", "error"]
+    assert server.queries >= 2
+
+
+def test_concurrent_lookups_share_one_query(dns_stub):
+    async def main():
+        resolver = resolver_for(dns_stub)
+        return await asyncio.gather(*(resolver.resolve(f"api.{ZONE}", "A") for _ in range(5)))
+
+    answers = asyncio.run(main())
+    assert len(set(answers)) == 1
+    assert dns_stub.queries == 1
+
+
+def test_ct_answers_are_cached_for_their_ttl(crtsh):
+    async def main():
+        source = CrtShSource(crtsh.url, timeout=5, ttl=0.2)
+        try:
+            first = await source.subdomains(ZONE)
+            again = await source.subdomains(ZONE)
+            hits = crtsh_hits(crtsh)
+            await asyncio.sleep(0.3)
+            await source.subdomains(ZONE)
+            return first, again, hits
+        finally:
+            await source.aclose()
+
+    first, again, hits = asyncio.run(main())
+    assert f"host0.{ZONE}" in first and again == first
+    assert hits == 1
+    assert crtsh_hits(crtsh) == 2
+
+
+def test_deadline_returns_what_finished(monkeypatch, crtsh):
+    monkeypatch.setattr(settings, "DOMAIN_RECON_TIMEOUT_SECONDS", 0.5)
+    slow_dns = DnsStubServer(ZONE, latency_ms=3000).start()
+    try:
+        start = time.perf_counter()
+        response = run_recon(
+            lambda: resolver_for(slow_dns, timeout=10),
+            lambda: CrtShSource(crtsh.url, timeout=5, ttl=60),
+            SerpLinks(),
+            company(),
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        slow_dns.stop()
+
+    assert not response.complete
+    assert elapsed < 2
+    # Certificate names arrived in time; their lookups (and the apex records) did not.
+    assert {subdomain.name for subdomain in response.subdomains} >= {f"host0.{ZONE}", f"api0.{ZONE}"}
+    assert all(subdomain.addresses == [] for subdomain in response.subdomains)
+    assert response.records == {}
+
+
+def test_slow_ct_source_is_reported_and_the_rest_returned(dns_stub):
+    slow_crtsh = crtsh_server(latency_ms=2000)
+    try:
+        response = run_recon(
+            lambda: resolver_for(dns_stub),
+            lambda: CrtShSource(slow_crtsh.url, timeout=0.2, ttl=60),
+            SerpLinks(f"https://blog.{ZONE}/"),
+            company(),
+        )
+    finally:
+        slow_crtsh.stop()
+
+    assert response.complete
+    assert response.errors["crt.sh"].startswith("ReadTimeout")
+    assert [subdomain.name for subdomain in response.subdomains] == [f"blog.{ZONE}"]
+    assert response.subdomains[0].addresses
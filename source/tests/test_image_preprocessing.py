@@ -0,0 +1,59 @@
+import io
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image
+
+from services.facecrawler import image_preprocessing
+from services.facecrawler.image_preprocessing import (
+    ImageWorkersUnavailable,
+    image_phash,
+    prepare_image,
+    shutdown_image_pool,
+)
+
+
+@pytest.fixture
+def jpeg() -> bytes:
+    output = io.BytesIO()
+    Image.effect_noise((64, 48), 48).convert("RGB").save(output, "JPEG")
+    return output.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    shutdown_image_pool()
+    yield
+    shutdown_image_pool()
+
+
+def test_a_killed_worker_does_not_break_later_calls(jpeg):
+    expected = image_phash(jpeg)
+    pool = image_preprocessing._pool
+    for process in list(pool._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+
+    assert image_phash(jpeg) == expected
+    assert image_preprocessing._pool is not pool
+    processed, metadata = prepare_image(jpeg)
+    assert processed and metadata["phash"] == f"{expected:016x}"
+
+
+def test_a_pool_that_keeps_breaking_is_reported(monkeypatch, jpeg):
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(image_preprocessing, "_get_pool", BrokenPool)
+    with pytest.raises(ImageWorkersUnavailable):
+        image_phash(jpeg)
+
+
+def test_invalid_images_are_still_value_errors():
+    with pytest.raises(ValueError):
+        image_phash(b"not an image")
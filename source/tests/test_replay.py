@@ -0,0 +1,157 @@
+import json
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+from uuid import UUID
+
+import pytest
+from sqlalchemy import update
+
+from database.models.db_models import ScanHistory, ScanResponse
+from database.session import get_session
+from modules.target.domain import target_replay
+from modules.target.domain.target_archive import response_archive, scan_responses
+from modules.target.domain.target_replay import TargetReplayService, shutdown_replay_pool
+from modules.target.schemas import TargetReplaySchema
+from settings import settings
+
+
+def serp_body(query: str, results: int = 3) -> bytes:
+    return json.dumps({
+        "search_metadata": {"status": "Success"},
+        "organic_results": [
+            {"position": i + 1, "title": f"{query} {i}", "link": f"https://example.com/{query}/{i}",
+             "snippet": f"contact{i}@example.com"}
+            for i in range(results)
+        ],
+    }).encode()
+
+
+def archived_scans(user_id, count: int) -> List[str]:
+    scan_ids = []
+    keys = [response_archive.put("serpapi", serp_body(f"q{i}")) for i in range(count)]
+    with get_session() as session:
+        for i, key in enumerate(keys):
+            scan = ScanHistory(
+                user_id=user_id, query=f"q{i}", engine="google", search_type="person",
+                status="COMPLETED", image_metadata={"country": "Brazil"}, raw_response_key=key,
+            )
+            session.add(scan)
+            session.flush()
+            scan_ids.append(str(scan.scan_id))
+    return scan_ids
+
+
+def replay_lines(user_id) -> List[dict]:
+    body = b"".join(TargetReplayService().stream(TargetReplaySchema(include_data=False), user_id))
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+class FlakyPool:
+    """Runs chunks inline; the first pool's first chunk dies like an OOM-killed worker."""
+
+    created = 0
+
+    def __init__(self):
+        FlakyPool.created += 1
+        self.broken = FlakyPool.created == 1
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool("worker died"))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, **kwargs):
+        self.shut_down = True
+
+
+@pytest.fixture
+def chunked(monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_REPLAY_CHUNK", 2)
+    monkeypatch.setattr(settings, "ARCHIVE_REPLAY_WORKERS", 1)
+    shutdown_replay_pool()
+    yield
+    shutdown_replay_pool()
+
+
+def test_replay_on_the_worker_pool(db_user, chunked):
+    scan_ids = archived_scans(db_user, 5)
+    lines = replay_lines(db_user)
+
+    results, summary = lines[:-1], lines[-1]
+    assert sorted(line["scan_id"] for line in results) == sorted(scan_ids)
+    assert all(line["error"] is None and line["total"] == 3 for line in results)
+    assert summary == {**summary, "scans": 5, "replayed": 5, "failed": 0}
+
+
+def test_a_crashed_chunk_becomes_error_lines(db_user, chunked, monkeypatch):
+    FlakyPool.created = 0
+    pools = []
+
+    def get_pool():
+        if target_replay._pool is None:
+            target_replay._pool = FlakyPool()
+            pools.append(target_replay._pool)
+        return target_replay._pool
+
+    monkeypatch.setattr(target_replay, "_get_pool", get_pool)
+    archived_scans(db_user, 5)
+    lines = replay_lines(db_user)
+
+    results, summary = lines[:-1], lines[-1]
+    failed = [line for line in results if line["error"]]
+    assert len(results) == 5
+    # The first chunk (two scans) and the one queued behind it on the dead
+    # pool fail; the last chunk runs on a replacement pool.
+    assert {line["error"] for line in failed} == {"replay worker crashed"}
+    assert summary["failed"] == len(failed) and summary["replayed"] == 5 - len(failed)
+    assert summary["replayed"] > 0
+    assert len(pools) == 2 and pools[0].shut_down
+
+
+def test_missing_blobs_are_reported_per_scan(db_user):
+    scan_ids = archived_scans(db_user, 2)
+    with get_session() as session:
+        session.execute(
+            update(ScanHistory)
+            .where(ScanHistory.scan_id == UUID(scan_ids[0]))
+            .values(raw_response_key="0" * 64)
+        )
+    lines = replay_lines(db_user)
+    errors = {line["scan_id"]: line["error"] for line in lines[:-1]}
+    assert errors[scan_ids[0]] == "archived response not found"
+    assert errors[scan_ids[1]] is None
+    assert lines[-1]["failed"] == 1
+
+
+def test_multi_page_scans_replay_every_page(db_user):
+    pages = [serp_body("a"), serp_body("b"), serp_body("a", results=4)]
+    keys = [response_archive.put("serpapi", page) for page in pages]
+    with get_session() as session:
+        scan = ScanHistory(
+            user_id=db_user, query="a\nb", engine="google", search_type="person",
+            status="COMPLETED", image_metadata={"country": "Brazil"}, raw_response_key=keys[0],
+        )
+        session.add(scan)
+        session.flush()
+        scan_id = scan.scan_id
+        session.add_all(ScanResponse(**row) for row in scan_responses(scan_id, keys))
+
+    (line, summary) = replay_lines(db_user)
+    # Merged by link: a0-a2 and b0-b2, plus a3 from the last page.
+    assert line["total"] == 7 and line["complete"] and line["error"] is None
+    assert summary["replayed"] == 1
+
+    with get_session() as session:
+        session.execute(
+            update(ScanResponse)
+            .where(ScanResponse.scan_id == scan_id, ScanResponse.position == 1)
+            .values(blob_key="0" * 64)
+        )
+    (line, summary) = replay_lines(db_user)
+    assert line["total"] == 4 and not line["complete"] and line["error"] is None
+    assert summary["failed"] == 0
@@ -0,0 +1,33 @@
+from database.models.db_models import ScanHistory, TargetResult
+from database.session import get_session
+from modules.target.domain.target_results_search import ResultSearchService
+
+
+def stored_results(user_id, snippets):
+    with get_session() as session:
+        scan = ScanHistory(
+            user_id=user_id, query="q", engine="google", search_type="person", status="COMPLETED",
+            image_metadata={"categories": ["social"]},
+        )
+        session.add(scan)
+        session.flush()
+        session.add_all(
+            TargetResult(
+                scan_id=scan.scan_id, scan_timestamp=scan.timestamp, title=f"Result {i}",
+                link=f"https://example.com/{i}", snippet=snippet,
+            )
+            for i, snippet in enumerate(snippets)
+        )
+
+
+def test_total_counts_every_match_not_the_page(db_user):
+    stored_results(db_user, ["maria silva profile"] * 7 + ["someone else"] * 3)
+    service = ResultSearchService()
+
+    first, total = service.search("maria", db_user, limit=3)
+    assert len(first) == 3 and total == 7
+    last, total = service.search("maria", db_user, limit=3, offset=6)
+    assert len(last) == 1 and total == 7
+    beyond, total = service.search("maria", db_user, limit=3, offset=9)
+    assert beyond == [] and total == 7
+    assert service.search("maria", db_user, category="files") == ([], 0)
@@ -0,0 +1,71 @@
+import socket
+
+import pytest
+from pydantic import ValidationError
+
+from modules.target.schemas import CreateWatchlistSchema
+from services.webhooks import url_guard
+from services.webhooks.url_guard import UnsafeURLError, check_public_url, check_url_syntax
+from settings import settings
+
+TARGET = {"name": "Example", "type": "company", "categories": ["social"]}
+
+
+def resolving_to(*addresses):
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in addresses]
+
+    return getaddrinfo
+
+
+@pytest.fixture
+def no_dns(monkeypatch):
+    def getaddrinfo(*args, **kwargs):
+        raise AssertionError("resolved a host")
+
+    monkeypatch.setattr(url_guard.socket, "getaddrinfo", getaddrinfo)
+
+
+def test_schema_validation_never_resolves(no_dns):
+    schema = CreateWatchlistSchema(target=TARGET, notify_url="https://hooks.example.com/x")
+    assert str(schema.notify_url) == "https://hooks.example.com/x"
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://hooks.example.com/x",
+    "http://127.0.0.1/x",
+    "http://10.1.2.3/x",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/x",
+    "http://[::ffff:192.168.0.1]/x",
+])
+def test_schema_rejects_bad_schemes_and_private_literals(no_dns, url):
+    with pytest.raises(ValidationError):
+        CreateWatchlistSchema(target=TARGET, notify_url=url)
+
+
+def test_allowlist_is_applied_without_dns(no_dns, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", ["hooks.example.com"])
+    assert check_url_syntax("https://HOOKS.example.com./x") == "hooks.example.com"
+    with pytest.raises(UnsafeURLError):
+        check_url_syntax("https://other.example.com/x")
+
+
+def test_names_resolving_to_private_addresses_are_refused(monkeypatch):
+    monkeypatch.setattr(url_guard.socket, "getaddrinfo", resolving_to("93.184.215.14", "10.0.0.5"))
+    with pytest.raises(UnsafeURLError, match="non-public"):
+        check_public_url("https://hooks.example.com/x")
+
+
+def test_names_resolving_to_public_addresses_pass(monkeypatch):
+    monkeypatch.setattr(url_guard.socket, "getaddrinfo", resolving_to("93.184.215.14"))
+    check_public_url("https://hooks.example.com/x")
+
+
+def test_unresolvable_names_are_refused(monkeypatch):
+    def getaddrinfo(*args, **kwargs):
+        raise socket.gaierror("Name or service not known")
+
+    monkeypatch.setattr(url_guard.socket, "getaddrinfo", getaddrinfo)
+    with pytest.raises(UnsafeURLError, match="cannot resolve"):
+        check_public_url("https://nowhere.invalid/x")
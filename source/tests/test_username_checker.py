@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from benchmarks.stubs import StubConfig, StubServer, UsernameStubHandler
+from services.usernames.username_checker import (
+    SiteTemplate,
+    UsernameCheck,
+    UsernameChecker,
+    _ResultCache,
+    load_sites,
+)
+from settings import settings
+
+KNOWN = "maria.silva"
+MISSING = "nobody.here"
+
+
+class CountingHandler(UsernameStubHandler):
+    """Records requests per site and the most requests ever in flight at once."""
+
+    stats: dict
+
+    def do_GET(self):
+        stats = self.stats
+        with stats["lock"]:
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            site = self.path.strip("/").split("/")[1:2]
+            stats["hits"][tuple(site)] = stats["hits"].get(tuple(site), 0) + 1
+        try:
+            super().do_GET()
+        finally:
+            with stats["lock"]:
+                stats["in_flight"] -= 1
+
+
+def counting_server(**config) -> StubServer:
+    server = StubServer(
+        CountingHandler, StubConfig(**{"latency_ms": 0, "jitter_ms": 0, **config})
+    )
+    server.httpd.RequestHandlerClass.stats = {
+        "lock": threading.Lock(), "in_flight": 0, "max_in_flight": 0, "hits": {},
+    }
+    return server.start()
+
+
+@pytest.fixture
+def stub():
+    server = counting_server()
+    yield server
+    server.stop()
+
+
+def site(server: StubServer, check: str, name: str = "site", **fields) -> SiteTemplate:
+    prefix = {"status_code": "status", "message": "message", "redirect": "redirect"}[check]
+    if check == "message":
+        fields.setdefault("absent", ("User not found",))
+    return SiteTemplate(
+        name=name, url=f"{server.url}/{prefix}/{name}/{{username}}", check=check, **fields
+    )
+
+
+def hits(server: StubServer) -> int:
+    return sum(server.httpd.RequestHandlerClass.stats["hits"].values())
+
+
+def run_checks(checker: UsernameChecker, *checks):
+    async def main():
+        try:
+            return [await checker.check(username, template) for username, template in checks]
+        finally:
+            await checker.aclose()
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("check", ["status_code", "message", "redirect"])
+def test_heuristics_tell_found_from_missing(stub, check):
+    template = site(stub, check)
+    found, missing = run_checks(UsernameChecker(), (KNOWN, template), (MISSING, template))
+
+    assert found.status == "found"
+    assert found.http_status == 200
+    assert found.url == template.profile_url(KNOWN)
+    assert missing.status == "not_found"
+    assert missing.http_status == {"status_code": 404, "message": 200, "redirect": 302}[check]
+
+
+def test_status_check_follows_redirects_to_a_profile(stub):
+    # Only redirect checks treat a redirect as "missing"; others follow it.
+    template = site(stub, "status_code")
+    template = SiteTemplate(
+        name="moved", url=template.url, check="status_code",
+        probe_url=f"{stub.url}/redirect/moved/{{username}}",
+    )
+    (result,) = run_checks(UsernameChecker(), (MISSING, template))
+    assert result.status == "found"
+    assert result.url == template.profile_url(MISSING)
+
+
+def test_server_errors_are_reported_not_guessed():
+    server = counting_server(error_rate=1.0)
+    try:
+        (result,) = run_checks(UsernameChecker(), (KNOWN, site(server, "status_code")))
+    finally:
+        server.stop()
+    assert result.status == "error"
+    assert result.http_status == 500
+    assert result.error == "HTTP 500"
+
+
+def test_unreachable_host_is_an_error():
+    template = SiteTemplate(name="down", url="http://127.0.0.1:9/{username}")
+    (result,) = run_checks(UsernameChecker(), (KNOWN, template))
+    assert result.status == "error"
+    assert result.error
+
+
+def test_username_pattern_rejects_without_a_request(stub):
+    template = site(stub, "status_code", username_pattern=r"[a-z]+")
+    (result,) = run_checks(UsernameChecker(), ("maria.silva", template))
+    assert result.status == "invalid"
+    assert hits(stub) == 0
+
+
+def test_per_host_cap(monkeypatch):
+    monkeypatch.setattr(settings, "USERNAME_PER_HOST_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "USERNAME_MAX_CONNECTIONS", 50)
+    busy = counting_server(latency_ms=50)
+    other = counting_server(latency_ms=50)
+    templates = [site(busy, "status_code", name=f"busy{i}") for i in range(8)]
+    templates += [site(other, "status_code", name=f"other{i}") for i in range(8)]
+
+    async def main(checker):
+        try:
+            return [check async for check in checker.sweep(KNOWN, templates)]
+        finally:
+            await checker.aclose()
+
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(main(UsernameChecker()))
+        elapsed = time.perf_counter() - start
+    finally:
+        busy.stop()
+        other.stop()
+
+    assert sorted(r.site for r in results) == sorted(t.name for t in templates)
+    assert all(r.status == "found" for r in results)
+    for server in (busy, other):
+        assert server.httpd.RequestHandlerClass.stats["max_in_flight"] == 2
+    # The hosts progress side by side: 4 rounds of 50 ms each, not 8 in a row.
+    assert elapsed < 0.7
+
+
+def test_global_cap(monkeypatch):
+    monkeypatch.setattr(settings, "USERNAME_PER_HOST_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "USERNAME_MAX_CONNECTIONS", 1)
+    server = counting_server(latency_ms=20)
+    # Distinct host names for one server, so only the global cap applies.
+    hosts = ["127.0.0.1", "localhost"]
+    port = server.httpd.server_address[1]
+    templates = [
+        SiteTemplate(name=f"s{i}", url=f"http://{hosts[i % 2]}:{port}/status/s{i}/{{username}}")
+        for i in range(6)
+    ]
+
+    async def main(checker):
+        try:
+            return [check async for check in checker.sweep(KNOWN, templates)]
+        finally:
+            await checker.aclose()
+
+    try:
+        results = asyncio.run(main(UsernameChecker()))
+    finally:
+        server.stop()
+    assert len(results) == 6
+    assert server.httpd.RequestHandlerClass.stats["max_in_flight"] == 1
+
+
+def test_results_are_cached_per_site_and_lowercased_username(stub):
+    template = site(stub, "status_code")
+    first, second, third = run_checks(
+        UsernameChecker(), (KNOWN, template), (KNOWN.upper(), template), (MISSING, template)
+    )
+    assert not first.cached
+    assert second.cached and second.status == "found" and second.elapsed_ms == 0.0
+    assert not third.cached
+    assert hits(stub) == 2
+
+
+def test_cache_lifetimes_differ_for_hits_and_misses(stub):
+    checker = UsernameChecker()
+    checker.cache = _ResultCache(positive_ttl=10, negative_ttl=0.05, max_entries=100)
+    template = site(stub, "status_code")
+
+    async def main():
+        try:
+            await checker.check(KNOWN, template)
+            await checker.check(MISSING, template)
+            await asyncio.sleep(0.1)
+            return await checker.check(KNOWN, template), await checker.check(MISSING, template)
+        finally:
+            await checker.aclose()
+
+    found, missing = asyncio.run(main())
+    assert found.cached
+    assert not missing.cached and missing.status == "not_found"
+    assert hits(stub) == 3
+
+
+def test_errors_are_not_cached():
+    server = counting_server(error_rate=1.0)
+    template = site(server, "status_code")
+    try:
+        results = run_checks(UsernameChecker(), (KNOWN, template), (KNOWN, template))
+    finally:
+        server.stop()
+    assert [r.cached for r in results] == [False, False]
+    assert hits(server) == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = _ResultCache(positive_ttl=60, negative_ttl=60, max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, UsernameCheck(key, "other", "http://x", "found"))
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", UsernameCheck("c", "other", "http://x", "not_found"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_bundled_sites_are_valid():
+    sites = load_sites()
+    names = [s.name for s in sites]
+    assert len(names) == len(set(names))
+    for template in sites:
+        assert template.url.startswith("https://"), template.name
+        assert template.host, template.name